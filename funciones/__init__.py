@@ -3,19 +3,24 @@ Paquete funciones para ORGEST - Organizador de Archivos
 Contiene todos los módulos de procesamiento de archivos.
 """
 
-from .duplicados import eliminar_duplicados, verificar_duplicados
+from .duplicados import eliminar_duplicados, verificar_duplicados, eliminar_duplicados_multiples
 from .ordenar import organizar_archivos_carpetas
+from .planificador import organizar_archivos_planificado
 from .conversiones import convertir_formatos_archivos
 from .extraer import extraer_archivos_raiz
 from .preprocesador import preprocesar_imagenes
 from .limpieza_final import limpiar_carpetas_temporales
+from .similares import eliminar_similares
 
 __all__ = [
     'eliminar_duplicados',
     'verificar_duplicados', 
+    'eliminar_duplicados_multiples',
     'organizar_archivos_carpetas',
+    'organizar_archivos_planificado',
     'convertir_formatos_archivos',
     'extraer_archivos_raiz',
     'preprocesar_imagenes',
-    'limpiar_carpetas_temporales'
+    'limpiar_carpetas_temporales',
+    'eliminar_similares'
 ]
\ No newline at end of file
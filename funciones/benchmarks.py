@@ -0,0 +1,220 @@
+"""
+MÓDULO DE PRUEBAS DE RENDIMIENTO
+Mide en la máquina local la velocidad de las operaciones más costosas de Orgest
+para poder elegir la configuración adecuada.
+
+Uso:
+    python -m funciones.benchmarks hash [--mb 256]
+    python -m funciones.benchmarks lectura [--mb 512] [--carpeta /ruta/de/prueba]
+    python -m funciones.benchmarks webp [--imagenes 200] [--lado 512]
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+from .hashing import algoritmos_disponibles, crear_hasher
+
+def benchmark_algoritmos(tamanio_mb=256, tamanio_bloque=1024 * 1024):
+    """
+    Mide la velocidad de cada algoritmo de hash disponible sobre datos en memoria.
+
+    Args:
+        tamanio_mb (int): Megabytes a procesar con cada algoritmo
+        tamanio_bloque (int): Tamaño de cada bloque pasado a update()
+
+    Returns:
+        dict: algoritmo -> velocidad en MB/s
+    """
+    bloque = os.urandom(tamanio_bloque)
+    repeticiones = max(1, (tamanio_mb * 1024 * 1024) // tamanio_bloque)
+    total_mb = repeticiones * tamanio_bloque / (1024 * 1024)
+    resultados = {}
+
+    print(f"⏱️  Velocidad de hash ({total_mb:.0f} MB por algoritmo, bloques de {tamanio_bloque // 1024} KB):")
+
+    for algoritmo in algoritmos_disponibles():
+        hasher = crear_hasher(algoritmo)
+        inicio = time.perf_counter()
+        for _ in range(repeticiones):
+            hasher.update(bloque)
+        hasher.hexdigest()
+        duracion = time.perf_counter() - inicio
+
+        resultados[algoritmo] = total_mb / duracion if duracion > 0 else float('inf')
+        print(f"   🔑 {algoritmo:<10} {resultados[algoritmo]:>10.1f} MB/s")
+
+    mejor = max(resultados, key=resultados.get)
+    print(f"🏆 Más rápido en esta máquina: {mejor}")
+    print("💡 Configúralo en CONFIG['algoritmo_hash'] de main.py")
+
+    return resultados
+
+def _medir(funcion, repeticiones=3):
+    """Ejecuta una función varias veces y devuelve el mejor tiempo en segundos"""
+    mejor = None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        duracion = time.perf_counter() - inicio
+        mejor = duracion if mejor is None else min(mejor, duracion)
+    return mejor
+
+def benchmark_lectura(tamanio_mb=512, carpeta=None):
+    """
+    Compara la lectura clásica read(8192) con la lectura por búfer reutilizado
+    de calcular_hash_archivo, para distintos tamaños de bloque y con mmap.
+
+    El archivo de prueba se lee una vez antes de medir para que todas las
+    variantes partan de la cache del sistema operativo y se mida solo el coste
+    de Python, no el del disco.
+
+    Args:
+        tamanio_mb (int): Tamaño del archivo temporal de prueba en MB
+        carpeta (str): Carpeta donde crear el archivo (por defecto la temporal del sistema)
+
+    Returns:
+        dict: variante -> velocidad en MB/s
+    """
+    from main import CONFIG  # Importar configuración
+    from .duplicados import calcular_hash_archivo
+    from .hashing import obtener_algoritmo_configurado
+
+    algoritmo = obtener_algoritmo_configurado()
+    configuracion_original = {clave: CONFIG[clave] for clave in
+                              ('usar_cache_hashes', 'tamanio_bloque_hash', 'umbral_mmap_hash')}
+    resultados = {}
+
+    descriptor, ruta_prueba = tempfile.mkstemp(prefix="orgest_bench_", dir=carpeta)
+    try:
+        with os.fdopen(descriptor, 'wb') as archivo:
+            bloque = os.urandom(1024 * 1024)
+            for _ in range(tamanio_mb):
+                archivo.write(bloque)
+
+        def lectura_clasica():
+            hasher = crear_hasher(algoritmo)
+            with open(ruta_prueba, 'rb') as archivo:
+                for bloque in iter(lambda: archivo.read(8192), b""):
+                    hasher.update(bloque)
+            return hasher.hexdigest()
+
+        lectura_clasica()  # Calentar la cache del sistema operativo
+        CONFIG['usar_cache_hashes'] = False  # Medir lectura real, no la cache de hashes
+
+        variantes = [("read(8192) clásico", lectura_clasica, None)]
+        for tamanio_bloque in (64 * 1024, 256 * 1024, 1024 * 1024, 4 * 1024 * 1024):
+            variantes.append((f"readinto {tamanio_bloque // 1024} KB", calcular_hash_archivo,
+                              (tamanio_bloque, 0)))
+        variantes.append(("mmap", calcular_hash_archivo, (1024 * 1024, 1)))
+
+        print(f"⏱️  Lectura para hash ({tamanio_mb} MB, algoritmo {algoritmo}, mejor de 3):")
+        for nombre, funcion, parametros in variantes:
+            if parametros is not None:
+                CONFIG['tamanio_bloque_hash'], CONFIG['umbral_mmap_hash'] = parametros
+                duracion = _medir(lambda: funcion(ruta_prueba, algoritmo))
+            else:
+                duracion = _medir(funcion)
+            resultados[nombre] = tamanio_mb / duracion if duracion > 0 else float('inf')
+            print(f"   📖 {nombre:<20} {resultados[nombre]:>10.1f} MB/s")
+
+        base = resultados["read(8192) clásico"]
+        mejor = max(resultados, key=resultados.get)
+        print(f"🏆 Mejor variante: {mejor} ({resultados[mejor] / base:.2f}x respecto a read(8192))")
+        print("💡 Ajusta CONFIG['tamanio_bloque_hash'] y CONFIG['umbral_mmap_hash'] en main.py")
+    finally:
+        CONFIG.update(configuracion_original)
+        os.remove(ruta_prueba)
+
+    return resultados
+
+def benchmark_webp(num_imagenes=200, lado=512, carpeta=None):
+    """
+    Compara la conversión WEBP → PNG con Pillow en el propio proceso y con un
+    proceso de ffmpeg por imagen, ambas en paralelo como en procesar_conversiones.
+
+    Args:
+        num_imagenes (int): Imágenes WEBP de prueba a generar
+        lado (int): Ancho y alto de cada imagen en píxeles
+        carpeta (str): Carpeta donde crear las imágenes (por defecto la temporal del sistema)
+
+    Returns:
+        dict: conversor -> imágenes por segundo
+    """
+    from PIL import Image
+    from .cola_conversiones import CODIFICAR, ColaConversiones, TrabajoConversion, obtener_limites_conversion
+    from .conversiones import comando_webp_a_png, convertir_webp_con_pillow, verificar_ffmpeg
+
+    carpeta_prueba = tempfile.mkdtemp(prefix="orgest_bench_", dir=carpeta)
+    limites = obtener_limites_conversion()
+    resultados = {}
+    try:
+        # Ruido suave, para que la compresión se parezca a la de una foto y no a un color plano
+        ruido = Image.effect_noise((lado, lado), 48)
+        imagen = Image.merge('RGB', (ruido, ruido.rotate(90), ruido.transpose(Image.FLIP_LEFT_RIGHT)))
+        rutas = []
+        for i in range(num_imagenes):
+            ruta_webp = os.path.join(carpeta_prueba, f"imagen_{i}.webp")
+            imagen.save(ruta_webp, 'WEBP', quality=80)
+            rutas.append(ruta_webp)
+
+        conversores = [("Pillow", convertir_webp_con_pillow)]
+        if verificar_ffmpeg():
+            conversores.append(("ffmpeg", None))
+        else:
+            print("⚠️  ffmpeg no está instalado: solo se mide Pillow")
+
+        print(f"⏱️  Conversión WEBP → PNG ({num_imagenes} imágenes de {lado}x{lado}, "
+              f"{limites[CODIFICAR]} a la vez):")
+        for nombre, funcion in conversores:
+            cola = ColaConversiones(limites)
+            for ruta_webp in rutas:
+                ruta_png = ruta_webp[:-5] + ".png"
+                cola.agregar(TrabajoConversion(ruta_webp, ruta_png, CODIFICAR,
+                                               comando_webp_a_png(ruta_webp, ruta_png), funcion=funcion))
+            estadisticas = cola.ejecutar(lambda trabajo, resultado, segundos: resultado.returncode == 0)
+            duracion = max(estadisticas['duracion'], 1e-6)
+            resultados[nombre] = estadisticas['correctos'] / duracion
+            print(f"   🖼️  {nombre:<10} {resultados[nombre]:>10.1f} imágenes/s")
+
+        if len(resultados) > 1:
+            print(f"🏆 Pillow es {resultados['Pillow'] / max(resultados['ffmpeg'], 1e-6):.1f}x "
+                  f"respecto a un ffmpeg por imagen")
+        print("💡 Elige el conversor en CONFIG['conversor_webp'] de main.py")
+    finally:
+        shutil.rmtree(carpeta_prueba, ignore_errors=True)
+
+    return resultados
+
+def main():
+    """Punto de entrada de la línea de comandos de benchmarks"""
+    parser = argparse.ArgumentParser(description="Pruebas de rendimiento de Orgest")
+    subparsers = parser.add_subparsers(dest='prueba')
+
+    parser_hash = subparsers.add_parser('hash', help="Velocidad de cada algoritmo de hash")
+    parser_hash.add_argument('--mb', type=int, default=256, help="Megabytes a procesar por algoritmo")
+
+    parser_lectura = subparsers.add_parser('lectura', help="Lectura de archivos en calcular_hash_archivo")
+    parser_lectura.add_argument('--mb', type=int, default=512, help="Tamaño del archivo de prueba en MB")
+    parser_lectura.add_argument('--carpeta', default=None, help="Carpeta donde crear el archivo de prueba")
+
+    parser_webp = subparsers.add_parser('webp', help="Conversión WEBP → PNG con Pillow frente a ffmpeg")
+    parser_webp.add_argument('--imagenes', type=int, default=200, help="Imágenes de prueba a convertir")
+    parser_webp.add_argument('--lado', type=int, default=512, help="Ancho y alto de cada imagen en píxeles")
+    parser_webp.add_argument('--carpeta', default=None, help="Carpeta donde crear las imágenes de prueba")
+
+    argumentos = parser.parse_args()
+
+    if argumentos.prueba == 'hash':
+        benchmark_algoritmos(argumentos.mb)
+    elif argumentos.prueba == 'lectura':
+        benchmark_lectura(argumentos.mb, argumentos.carpeta)
+    elif argumentos.prueba == 'webp':
+        benchmark_webp(argumentos.imagenes, argumentos.lado, argumentos.carpeta)
+    else:
+        parser.print_help()
+
+if __name__ == "__main__":
+    main()
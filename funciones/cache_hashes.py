@@ -0,0 +1,264 @@
+"""
+MÓDULO DE CACHE PERSISTENTE DE HASHES
+Guarda en una base SQLite local los hashes ya calculados, identificados por
+(st_dev, st_ino, st_size, st_mtime_ns) y por el algoritmo que los produjo.
+Si un archivo no cambió desde la última ejecución, su hash se recupera con
+un simple stat en lugar de leerlo entero.
+
+La cache se abre la primera vez que se necesita y dura toda la ejecución:
+cada paso confirma sus cambios con guardar_cache_hashes() y main.py la
+cierra (y purga las entradas obsoletas) una sola vez al terminar.
+"""
+
+import sqlite3
+import threading
+import time
+
+from .datos_locales import ruta_datos
+
+NOMBRE_BASE_CACHE = "cache_hashes.sqlite3"
+MAX_ENTRADAS_CACHE = 1000000  # Límite de entradas; se descartan las menos usadas
+DIAS_VALIDEZ_CACHE = 90  # Entradas sin usar durante este tiempo se eliminan
+LOTE_ESCRITURA = 500  # Cambios acumulados antes de hacer commit
+VERSION_ESQUEMA = 2  # Si cambia, la cache anterior se descarta
+
+_cache_global = None
+_cache_deshabilitada = False
+_lock_global = threading.Lock()  # Evita abrir la cache dos veces desde hilos distintos
+
+class CacheHashes:
+    """Cache persistente de hashes de archivos respaldada por SQLite"""
+
+    def __init__(self, ruta_db, max_entradas=MAX_ENTRADAS_CACHE, dias_validez=DIAS_VALIDEZ_CACHE):
+        self.ruta_db = ruta_db
+        self.max_entradas = max_entradas
+        self.dias_validez = dias_validez
+        self.aciertos = 0
+        self.fallos = 0
+        self._pendientes = 0
+        self._usados = []  # Claves leídas cuya fecha de uso hay que actualizar
+        self._lock = threading.Lock()
+
+        self._conexion = sqlite3.connect(ruta_db, check_same_thread=False)
+        self._conexion.execute("PRAGMA journal_mode=WAL")
+        self._conexion.execute("PRAGMA synchronous=NORMAL")
+        version = self._conexion.execute("PRAGMA user_version").fetchone()[0]
+        if version != VERSION_ESQUEMA:
+            # Es solo una cache: ante un esquema distinto se empieza de cero
+            self._conexion.execute("DROP TABLE IF EXISTS hashes")
+            self._conexion.execute(f"PRAGMA user_version={VERSION_ESQUEMA}")
+        self._conexion.execute("""
+            CREATE TABLE IF NOT EXISTS hashes (
+                dispositivo INTEGER NOT NULL,
+                inodo INTEGER NOT NULL,
+                tamanio INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                algoritmo TEXT NOT NULL,
+                tipo TEXT NOT NULL,
+                digest TEXT NOT NULL,
+                ultimo_uso INTEGER NOT NULL,
+                PRIMARY KEY (dispositivo, inodo, tamanio, mtime_ns, algoritmo, tipo)
+            ) WITHOUT ROWID
+        """)
+        self._conexion.execute("CREATE INDEX IF NOT EXISTS idx_ultimo_uso ON hashes (ultimo_uso)")
+        self._conexion.commit()
+
+    @staticmethod
+    def _clave(info_stat, algoritmo, tipo):
+        """Construye la clave de identidad a partir del resultado de os.stat"""
+        return (info_stat.st_dev, info_stat.st_ino, info_stat.st_size, info_stat.st_mtime_ns, algoritmo, tipo)
+
+    def obtener(self, info_stat, algoritmo, tipo):
+        """
+        Busca el hash guardado para un archivo.
+
+        Args:
+            info_stat (os.stat_result): Metadatos actuales del archivo
+            algoritmo (str): Algoritmo con el que se calculó el hash
+            tipo (str): Tipo de hash ('completo' o 'parcial')
+
+        Returns:
+            str or None: Hash guardado o None si no está en cache
+        """
+        clave = self._clave(info_stat, algoritmo, tipo)
+        with self._lock:
+            fila = self._conexion.execute(
+                "SELECT digest FROM hashes WHERE dispositivo=? AND inodo=? AND tamanio=? "
+                "AND mtime_ns=? AND algoritmo=? AND tipo=?", clave
+            ).fetchone()
+            if fila is None:
+                self.fallos += 1
+                return None
+            self.aciertos += 1
+            self._usados.append(clave)
+            if len(self._usados) >= LOTE_ESCRITURA:
+                self._actualizar_usos()
+            return fila[0]
+
+    def guardar(self, info_stat, algoritmo, tipo, digest):
+        """Guarda el hash de un archivo identificado por sus metadatos y algoritmo"""
+        clave = self._clave(info_stat, algoritmo, tipo)
+        with self._lock:
+            self._conexion.execute(
+                "INSERT OR REPLACE INTO hashes VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                clave + (digest, int(time.time()))
+            )
+            self._pendientes += 1
+            if self._pendientes >= LOTE_ESCRITURA:
+                self._conexion.commit()
+                self._pendientes = 0
+
+    def _actualizar_usos(self):
+        """Actualiza la fecha de último uso de las entradas leídas (requiere el lock)"""
+        if self._usados:
+            ahora = int(time.time())
+            self._conexion.executemany(
+                "UPDATE hashes SET ultimo_uso=? WHERE dispositivo=? AND inodo=? AND tamanio=? "
+                "AND mtime_ns=? AND algoritmo=? AND tipo=?",
+                [(ahora,) + clave for clave in self._usados]
+            )
+            self._usados = []
+            self._pendientes += 1
+
+    def purgar(self):
+        """
+        Elimina entradas obsoletas y recorta la cache a su tamaño máximo.
+
+        Returns:
+            int: Número de entradas eliminadas
+        """
+        with self._lock:
+            self._actualizar_usos()
+            limite = int(time.time()) - self.dias_validez * 86400
+            eliminadas = self._conexion.execute(
+                "DELETE FROM hashes WHERE ultimo_uso < ?", (limite,)
+            ).rowcount
+
+            total = self._conexion.execute("SELECT COUNT(*) FROM hashes").fetchone()[0]
+            if total > self.max_entradas:
+                # Descartar primero las entradas usadas hace más tiempo
+                eliminadas += self._conexion.execute(
+                    "DELETE FROM hashes WHERE (dispositivo, inodo, tamanio, mtime_ns, algoritmo, tipo) IN "
+                    "(SELECT dispositivo, inodo, tamanio, mtime_ns, algoritmo, tipo FROM hashes "
+                    "ORDER BY ultimo_uso LIMIT ?)",
+                    (total - self.max_entradas,)
+                ).rowcount
+
+            self._conexion.commit()
+            self._pendientes = 0
+            return eliminadas
+
+    def guardar_cambios(self):
+        """Confirma en disco los cambios pendientes"""
+        with self._lock:
+            self._actualizar_usos()
+            self._conexion.commit()
+            self._pendientes = 0
+
+    def cerrar(self):
+        """Purga la cache y cierra la conexión"""
+        self.purgar()
+        with self._lock:
+            self._conexion.close()
+
+def obtener_cache_hashes():
+    """
+    Devuelve la cache global de hashes, abriéndola la primera vez.
+
+    Returns:
+        CacheHashes or None: Cache lista para usar, None si está desactivada o no se pudo abrir
+    """
+    global _cache_global, _cache_deshabilitada
+    from main import CONFIG  # Importar configuración
+
+    if not CONFIG['usar_cache_hashes'] or _cache_deshabilitada:
+        return None
+
+    with _lock_global:
+        if _cache_global is None:
+            try:
+                _cache_global = CacheHashes(ruta_datos(NOMBRE_BASE_CACHE))
+            except (sqlite3.Error, OSError) as e:
+                print(f"⚠️  No se pudo abrir la cache de hashes, se calcularán de nuevo: {e}")
+                _cache_deshabilitada = True
+                return None
+
+        return _cache_global
+
+def guardar_cache_hashes():
+    """
+    Confirma en disco los cambios de la cache global sin cerrarla.
+
+    Se llama al terminar cada paso, así que un fallo posterior no pierde los
+    hashes ya calculados. Los contadores de aciertos y fallos vuelven a cero.
+
+    Returns:
+        tuple or None: (aciertos, fallos) desde la última llamada, None si no estaba abierta
+    """
+    with _lock_global:
+        if _cache_global is None:
+            return None
+
+        estadisticas = (_cache_global.aciertos, _cache_global.fallos)
+        _cache_global.aciertos = _cache_global.fallos = 0
+        try:
+            _cache_global.guardar_cambios()
+        except sqlite3.Error as e:
+            print(f"⚠️  Error al guardar la cache de hashes: {e}")
+        return estadisticas
+
+def cerrar_cache_hashes():
+    """
+    Guarda, purga y cierra la cache global si estaba abierta (una vez por ejecución).
+
+    Returns:
+        tuple or None: (aciertos, fallos) desde el último guardado, None si no estaba abierta
+    """
+    global _cache_global
+
+    with _lock_global:
+        if _cache_global is None:
+            return None
+
+        estadisticas = (_cache_global.aciertos, _cache_global.fallos)
+        try:
+            _cache_global.cerrar()
+        except sqlite3.Error as e:
+            print(f"⚠️  Error al cerrar la cache de hashes: {e}")
+        _cache_global = None
+        return estadisticas
+
+class IndiceIdentidad:
+    """
+    Índice en memoria de identidades de archivo compartido entre pasos de una ejecución.
+
+    Recuerda los hashes calculados y qué archivos quedaron libres de duplicados
+    en el último escaneo. Como mover un archivo dentro del mismo disco no cambia
+    su inodo, tamaño ni fecha de modificación, la identidad sobrevive a los
+    pasos que solo reorganizan carpetas.
+    """
+
+    def __init__(self):
+        self.hashes = {}
+        self.verificados = set()  # Identidades que no tenían duplicados entre sí
+
+    @staticmethod
+    def identidad(info_stat):
+        """Devuelve la identidad (st_dev, st_ino, st_size, st_mtime_ns) de un archivo"""
+        return (info_stat.st_dev, info_stat.st_ino, info_stat.st_size, info_stat.st_mtime_ns)
+
+    def obtener(self, info_stat, algoritmo, tipo):
+        """Devuelve el hash conocido de un archivo o None"""
+        return self.hashes.get(self.identidad(info_stat) + (algoritmo, tipo))
+
+    def guardar(self, info_stat, algoritmo, tipo, digest):
+        """Recuerda el hash de un archivo para los pasos siguientes"""
+        self.hashes[self.identidad(info_stat) + (algoritmo, tipo)] = digest
+
+    def marcar_verificados(self, lista_stat):
+        """Registra los archivos que quedaron sin duplicados tras un escaneo completo"""
+        self.verificados = {self.identidad(info_stat) for info_stat in lista_stat}
+
+    def esta_verificado(self, info_stat):
+        """Indica si el archivo ya se comparó con el resto y no ha cambiado desde entonces"""
+        return self.identidad(info_stat) in self.verificados
@@ -0,0 +1,200 @@
+"""
+MÓDULO DE SELECCIÓN DE LA MEJOR COPIA
+Decide qué archivo de un grupo de duplicados o similares se conserva, según
+reglas configurables: rutas preferidas, carpetas temporales, resolución,
+bitrate, EXIF o fecha de modificación.
+Solo se leen cabeceras: Pillow abre las imágenes sin decodificar los píxeles
+y ffprobe lee los metadatos del contenedor de los videos.
+"""
+
+import json
+import os
+import subprocess
+
+from .herramientas import ffprobe_disponible
+
+# Reglas disponibles para CONFIG['criterios_conservar'], de más a menos importante
+CRITERIOS_VALIDOS = ('rutas_preferidas', 'evitar_temporales', 'resolucion', 'bitrate',
+                     'duracion', 'exif', 'mas_reciente', 'mas_antiguo')
+# Criterios que necesitan leer la cabecera del archivo (el resto solo usa la ruta y stat)
+CRITERIOS_CABECERA = frozenset(('resolucion', 'bitrate', 'duracion', 'exif'))
+# Nombres de carpeta que indican una copia temporal o de paso
+CARPETAS_TEMPORALES = frozenset(('tmp', 'temp', 'temporal', 'temporales', 'cache', '.cache',
+                                 'descargas', 'downloads', '.trash', 'papelera'))
+EXTENSIONES_IMAGEN_CALIDAD = frozenset(('.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.tif', '.webp'))
+EXTENSIONES_VIDEO_CALIDAD = frozenset(('.mp4', '.avi', '.mov', '.mkv', '.wmv', '.flv', '.mpeg', '.mpg', '.ts'))
+
+def leer_cabecera_imagen(ruta_imagen):
+    """
+    Lee la resolución y si tiene EXIF una imagen, sin decodificar sus píxeles.
+
+    Image.open solo analiza la cabecera; los píxeles no se cargan hasta llamar
+    a load() o convert(), que aquí no se usan.
+
+    Args:
+        ruta_imagen (str): Ruta completa a la imagen
+
+    Returns:
+        dict: 'pixeles' y 'exif' (vacío si no se pudo leer)
+    """
+    try:
+        from PIL import Image
+
+        with Image.open(ruta_imagen) as img:
+            ancho, alto = img.size
+            if hasattr(img, 'getexif'):
+                tiene_exif = len(img.getexif()) > 0
+            else:
+                tiene_exif = bool(img.info.get('exif'))
+        return {'pixeles': ancho * alto, 'exif': tiene_exif}
+    except Exception:
+        return {}
+
+def leer_cabecera_video(ruta_video):
+    """
+    Lee resolución, duración y bitrate de un video con una sola llamada a ffprobe.
+
+    Args:
+        ruta_video (str): Ruta completa al video
+
+    Returns:
+        dict: 'pixeles', 'duracion' y 'bitrate' (vacío si no se pudo leer)
+    """
+    if not ffprobe_disponible():
+        return {}  # Sin ffprobe no se lanza un proceso por video solo para que falle
+
+    comando = ['ffprobe', '-v', 'error', '-select_streams', 'v:0',
+               '-show_entries', 'stream=width,height:format=duration,bit_rate',
+               '-of', 'json', ruta_video]
+    try:
+        resultado = subprocess.run(comando, capture_output=True, text=True, timeout=60)
+        datos = json.loads(resultado.stdout or '{}')
+    except (ValueError, OSError, subprocess.TimeoutExpired):
+        return {}
+
+    cabecera = {}
+    streams = datos.get('streams') or [{}]
+    formato = datos.get('format', {})
+    try:
+        cabecera['pixeles'] = int(streams[0].get('width', 0)) * int(streams[0].get('height', 0))
+        cabecera['duracion'] = float(formato.get('duration', 0))
+        cabecera['bitrate'] = int(formato.get('bit_rate', 0))
+    except (TypeError, ValueError):
+        pass
+    return cabecera
+
+def leer_metadatos(ruta_archivo, leer_cabeceras=True):
+    """
+    Reúne los datos necesarios para puntuar una copia.
+
+    Args:
+        ruta_archivo (str): Ruta completa al archivo
+        leer_cabeceras (bool): Si es False solo se usan la ruta y os.stat
+
+    Returns:
+        dict: Metadatos del archivo (faltan las claves que no se pudieron leer)
+    """
+    metadatos = {}
+    try:
+        metadatos['mtime'] = os.stat(ruta_archivo).st_mtime_ns
+    except OSError:
+        return metadatos
+
+    if leer_cabeceras:
+        extension = os.path.splitext(ruta_archivo)[1].lower()
+        if extension in EXTENSIONES_IMAGEN_CALIDAD:
+            metadatos.update(leer_cabecera_imagen(ruta_archivo))
+        elif extension in EXTENSIONES_VIDEO_CALIDAD:
+            metadatos.update(leer_cabecera_video(ruta_archivo))
+
+    return metadatos
+
+def obtener_criterios_configurados():
+    """
+    Devuelve los criterios de CONFIG['criterios_conservar'] válidos, en orden.
+
+    Returns:
+        list: Criterios a aplicar
+    """
+    from main import CONFIG  # Importar configuración
+
+    criterios = []
+    for criterio in CONFIG['criterios_conservar']:
+        if criterio in CRITERIOS_VALIDOS:
+            criterios.append(criterio)
+        else:
+            print(f"⚠️  Criterio de conservación desconocido ignorado: '{criterio}'. "
+                  f"Disponibles: {', '.join(CRITERIOS_VALIDOS)}")
+    return criterios
+
+def clave_calidad(ruta_archivo, metadatos, criterios, rutas_preferidas):
+    """
+    Construye la clave de ordenación de una copia: la menor es la mejor.
+
+    Args:
+        ruta_archivo (str): Ruta completa al archivo
+        metadatos (dict): Resultado de leer_metadatos
+        criterios (list): Criterios en orden de importancia
+        rutas_preferidas (list): Prefijos absolutos de rutas preferidas, en orden
+
+    Returns:
+        tuple: Clave comparable
+    """
+    clave = []
+    for criterio in criterios:
+        if criterio == 'rutas_preferidas':
+            posicion = len(rutas_preferidas)
+            for i, prefijo in enumerate(rutas_preferidas):
+                if ruta_archivo.startswith(prefijo):
+                    posicion = i
+                    break
+            clave.append(posicion)
+        elif criterio == 'evitar_temporales':
+            carpetas = os.path.dirname(ruta_archivo).lower().split(os.sep)
+            clave.append(1 if CARPETAS_TEMPORALES.intersection(carpetas) else 0)
+        elif criterio == 'exif':
+            clave.append(0 if metadatos.get('exif') else 1)
+        elif criterio == 'mas_reciente':
+            clave.append(-metadatos.get('mtime', 0))
+        elif criterio == 'mas_antiguo':
+            clave.append(metadatos.get('mtime', 0))
+        else:
+            # resolucion -> pixeles; bitrate y duracion con su propio nombre (mayor es mejor)
+            campo = 'pixeles' if criterio == 'resolucion' else criterio
+            clave.append(-metadatos.get(campo, 0))
+    return tuple(clave)
+
+def ordenar_por_calidad(grupos, leer_cabeceras=True):
+    """
+    Ordena cada grupo de copias de mejor a peor según los criterios configurados.
+
+    Los metadatos de todos los archivos de todos los grupos se leen en
+    paralelo de una vez. Los empates mantienen el orden original del grupo
+    (el del recorrido), así que sin criterios el resultado no cambia.
+
+    Args:
+        grupos (list): Grupos de rutas [copia1, copia2, ...]
+        leer_cabeceras (bool): False para copias idénticas byte a byte, cuya
+            resolución, bitrate y EXIF son iguales por definición
+
+    Returns:
+        list: Grupos con la mejor copia en primera posición
+    """
+    from main import CONFIG  # Importar configuración
+    from .duplicados import calcular_en_paralelo, obtener_hilos_hash
+
+    criterios = obtener_criterios_configurados()
+    if not criterios or not grupos:
+        return grupos
+
+    leer_cabeceras = leer_cabeceras and any(criterio in CRITERIOS_CABECERA for criterio in criterios)
+    rutas_preferidas = [os.path.join(os.path.abspath(os.path.expanduser(prefijo)), '')
+                        for prefijo in CONFIG['rutas_preferidas']]
+
+    rutas = sorted({ruta_archivo for grupo in grupos for ruta_archivo in grupo})
+    tareas = [(orden, (ruta_archivo, leer_cabeceras)) for orden, ruta_archivo in enumerate(rutas)]
+    metadatos = calcular_en_paralelo(leer_metadatos, tareas, obtener_hilos_hash())
+    claves = {ruta_archivo: clave_calidad(ruta_archivo, metadatos[orden], criterios, rutas_preferidas)
+              for orden, ruta_archivo in enumerate(rutas)}
+
+    return [sorted(grupo, key=claves.get) for grupo in grupos]
@@ -0,0 +1,144 @@
+"""
+MÓDULO DE CLASIFICACIÓN POR CONTENIDO
+Reconoce imágenes y videos por sus primeros bytes (firma o "número mágico")
+en lugar de fiarse solo de la extensión, de modo que una foto sin extensión o
+con una extensión equivocada no acaba en 'basura'. Si la firma no se
+reconoce, se usa la extensión como antes.
+"""
+
+import os
+
+EXTENSIONES_IMAGEN = frozenset(('.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.tif', '.ico'))
+EXTENSIONES_VIDEO = frozenset(('.mp4', '.avi', '.mov', '.mkv', '.wmv', '.flv', '.mpeg', '.mpg'))
+_TIPO_POR_EXTENSION = dict([(extension, 'imagen') for extension in EXTENSIONES_IMAGEN] +
+                           [(extension, 'video') for extension in EXTENSIONES_VIDEO])
+
+# Bytes leídos de cada archivo: las firmas caben en 32, pero MPEG-TS se
+# reconoce por el byte de sincronización 0x47 al inicio de tres paquetes de 188
+TAMANIO_PAQUETE_TS = 188
+PAQUETES_TS = 3
+BYTES_CABECERA = TAMANIO_PAQUETE_TS * (PAQUETES_TS - 1) + 1
+
+# Firmas al inicio del archivo -> tipo
+FIRMAS = {
+    b'\xff\xd8\xff': 'imagen',                     # JPEG
+    b'\x89PNG\r\n\x1a\n': 'imagen',                # PNG
+    b'GIF87a': 'imagen',                           # GIF
+    b'GIF89a': 'imagen',
+    b'II*\x00': 'imagen',                          # TIFF (little endian)
+    b'MM\x00*': 'imagen',                          # TIFF (big endian)
+    b'\x1a\x45\xdf\xa3': 'video',                  # Matroska / WebM
+    b'FLV\x01': 'video',                           # Flash Video
+    b'\x30\x26\xb2\x75\x8e\x66\xcf\x11': 'video',  # ASF / WMV
+    b'\x00\x00\x01\xba': 'video',                  # MPEG-PS
+    b'\x00\x00\x01\xb3': 'video',                  # MPEG-1/2 elemental
+}
+# Tipo de contenedor RIFF (bytes 8-12)
+FORMATOS_RIFF = {b'WEBP': 'imagen', b'AVI ': 'video'}
+# Contenido reconocido que no es imagen ni video (audio en MP4...): no se clasifica por la extensión
+OTRO = 'otro'
+# Marca principal ISO-BMFF (bytes 8-12 tras 'ftyp') -> tipo; con una marca
+# desconocida decide la extensión
+MARCAS_BMFF = {
+    # Imágenes HEIF / AVIF
+    b'heic': 'imagen', b'heix': 'imagen', b'heim': 'imagen', b'heis': 'imagen',
+    b'hevc': 'imagen', b'hevx': 'imagen', b'mif1': 'imagen', b'msf1': 'imagen',
+    b'avif': 'imagen', b'avis': 'imagen',
+    # Videos MP4, MOV, 3GP, M4V, F4V...
+    b'isom': 'video', b'iso2': 'video', b'iso3': 'video', b'iso4': 'video', b'iso5': 'video',
+    b'iso6': 'video', b'mp41': 'video', b'mp42': 'video', b'avc1': 'video', b'qt  ': 'video',
+    b'3gp4': 'video', b'3gp5': 'video', b'3gp6': 'video', b'3g2a': 'video', b'M4V ': 'video',
+    b'M4VH': 'video', b'M4VP': 'video', b'f4v ': 'video', b'dash': 'video', b'MSNV': 'video',
+    b'XAVC': 'video', b'mmp4': 'video', b'NDAS': 'video', b'MQT ': 'video',
+    # Audio AAC / ALAC, audiolibros y audio Flash
+    b'M4A ': OTRO, b'M4B ': OTRO, b'M4P ': OTRO, b'F4A ': OTRO, b'F4B ': OTRO,
+}
+
+def _compilar_firmas(firmas):
+    """Agrupa las firmas por su primer byte, las más largas primero"""
+    tabla = {}
+    for firma, tipo in firmas.items():
+        tabla.setdefault(firma[0], []).append((firma, tipo))
+    for candidatas in tabla.values():
+        candidatas.sort(key=lambda candidata: -len(candidata[0]))
+    return tabla
+
+_FIRMAS_POR_PRIMER_BYTE = _compilar_firmas(FIRMAS)
+
+def tipo_por_extension(archivo):
+    """
+    Clasifica un archivo solo por su extensión.
+
+    Returns:
+        str or None: 'imagen', 'video' o None
+    """
+    return _TIPO_POR_EXTENSION.get(os.path.splitext(archivo)[1].lower())
+
+def tipo_por_contenido(cabecera):
+    """
+    Clasifica unos bytes iniciales según la tabla de firmas.
+
+    Args:
+        cabecera (bytes): Primeros bytes del archivo
+
+    Returns:
+        str or None: 'imagen', 'video', OTRO si es otro tipo de contenido
+            conocido o None si no se reconoce
+    """
+    if len(cabecera) < 4:
+        return None
+
+    for firma, tipo in _FIRMAS_POR_PRIMER_BYTE.get(cabecera[0], ()):
+        if cabecera.startswith(firma):
+            return tipo
+
+    if cabecera[4:8] == b'ftyp':
+        return MARCAS_BMFF.get(cabecera[8:12])
+    if cabecera[:4] == b'RIFF':
+        return FORMATOS_RIFF.get(cabecera[8:12])
+    if len(cabecera) >= BYTES_CABECERA and all(
+            cabecera[i * TAMANIO_PAQUETE_TS] == 0x47 for i in range(PAQUETES_TS)):
+        return 'video'  # MPEG-TS: sincronización al inicio de paquetes seguidos
+    return None
+
+def leer_cabecera(ruta_archivo, num_bytes=BYTES_CABECERA):
+    """Lee los primeros bytes de un archivo (vacío si no se puede leer)"""
+    try:
+        with open(ruta_archivo, 'rb') as archivo:
+            return archivo.read(num_bytes)
+    except OSError:
+        return b''
+
+def clasificar_archivo(ruta_archivo):
+    """
+    Clasifica un archivo por su contenido y, si no se reconoce, por su extensión.
+
+    Un contenido reconocido que no es imagen ni video (por ejemplo audio
+    M4A guardado como .mp4) no se clasifica por la extensión.
+
+    Args:
+        ruta_archivo (str): Ruta completa al archivo
+
+    Returns:
+        str or None: 'imagen', 'video' o None (irá a basura)
+    """
+    tipo = tipo_por_contenido(leer_cabecera(ruta_archivo))
+    if tipo == OTRO:
+        return None
+    return tipo or tipo_por_extension(ruta_archivo)
+
+def clasificar_archivos(rutas, ejecutor=None):
+    """
+    Clasifica varios archivos leyendo sus cabeceras en paralelo.
+
+    Args:
+        rutas (list): Rutas completas de los archivos
+        ejecutor (ThreadPoolExecutor): Grupo de hilos a reutilizar (opcional;
+            sin él las cabeceras se leen una a una)
+
+    Returns:
+        list: Tipo de cada archivo, en el mismo orden que 'rutas'
+    """
+    if ejecutor is None or len(rutas) <= 1:
+        return [clasificar_archivo(ruta_archivo) for ruta_archivo in rutas]
+    return list(ejecutor.map(clasificar_archivo, rutas))
@@ -0,0 +1,251 @@
+"""
+MÓDULO DE COLA DE CONVERSIONES
+Ejecuta varios procesos de ffmpeg a la vez en lugar de uno detrás de otro
+(o, para las conversiones que se hacen con Pillow, varias en hilos del propio
+programa, ya que Pillow libera el GIL al decodificar y comprimir).
+Hay dos límites: las conversiones que recodifican (WEBP → PNG) usan CPU y
+se limitan a una por núcleo; las que solo cambian de contenedor (TS → MP4
+con '-c copy') dependen del disco y admiten menos a la vez sin competir
+entre ellas. Dentro de cada tipo los trabajos más grandes empiezan primero,
+para que el último en terminar no sea un video enorme lanzado al final.
+"""
+
+import os
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from .hashing import actualizar_hasher_desde_archivo, crear_hasher, obtener_parametros_lectura
+
+CODIFICAR = 'codificar'  # Recodifica: limitado por CPU
+REMUX = 'remux'  # Solo copia los flujos a otro contenedor: limitado por disco
+MAX_REMUX_AUTOMATICO = 4  # Remux a la vez por defecto, sin importar los núcleos
+ENTRADA_TUBERIA = 'pipe:0'  # Entrada de ffmpeg para pasarle el origen por stdin
+
+def obtener_limites_conversion():
+    """
+    Devuelve cuántas conversiones de cada tipo se ejecutan a la vez.
+
+    Returns:
+        dict: {CODIFICAR: int, REMUX: int} según CONFIG['conversiones_simultaneas']
+            y CONFIG['remux_simultaneos'] (0 = automático)
+    """
+    from main import CONFIG  # Importar configuración
+
+    nucleos = os.cpu_count() or 1
+    codificar = CONFIG['conversiones_simultaneas']
+    if not codificar or codificar < 1:
+        codificar = nucleos
+    remux = CONFIG['remux_simultaneos']
+    if not remux or remux < 1:
+        remux = MAX_REMUX_AUTOMATICO  # Apenas usan CPU: el límite lo pone el disco
+    return {CODIFICAR: codificar, REMUX: remux}
+
+def ejecutar_comando(comando):
+    """
+    Ejecuta un comando de ffmpeg y mide cuánto tarda.
+
+    stdin se cierra para que varios ffmpeg a la vez no lean del teclado.
+
+    Returns:
+        tuple: (subprocess.CompletedProcess, segundos)
+    """
+    inicio = time.perf_counter()
+    resultado = subprocess.run(comando, capture_output=True, text=True, stdin=subprocess.DEVNULL)
+    return resultado, time.perf_counter() - inicio
+
+def ejecutar_comando_con_hash(comando, origen, hasher):
+    """
+    Ejecuta un comando de ffmpeg que lee de stdin pasándole el archivo de origen.
+
+    Cada bloque leído se añade al hash antes de enviarlo, así que el origen
+    se lee del disco una sola vez para convertirlo y para calcular su hash.
+    stderr va a un archivo temporal para que ffmpeg nunca se bloquee
+    esperando a que alguien lo lea mientras se le escribe.
+
+    Returns:
+        tuple: (subprocess.CompletedProcess, segundos, True si se leyó el origen entero)
+    """
+    tamanio_bloque, umbral_mmap = obtener_parametros_lectura()
+    inicio = time.perf_counter()
+    completo = False
+    with tempfile.TemporaryFile() as errores, open(origen, 'rb', buffering=0) as archivo:
+        proceso = subprocess.Popen(comando, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=errores)
+        try:
+            while True:
+                bloque = archivo.read(tamanio_bloque)
+                if not bloque:
+                    completo = True
+                    break
+                hasher.update(bloque)
+                proceso.stdin.write(bloque)
+        except BrokenPipeError:
+            pass  # ffmpeg terminó antes de leerlo todo: su código de salida dice por qué
+        finally:
+            try:
+                proceso.stdin.close()
+            except BrokenPipeError:
+                pass
+            codigo = proceso.wait()
+        errores.seek(0)
+        stderr = errores.read().decode('utf-8', 'replace')
+    return subprocess.CompletedProcess(comando, codigo, '', stderr), time.perf_counter() - inicio, completo
+
+def ejecutar_trabajo(trabajo):
+    """
+    Ejecuta una conversión: su función en este mismo proceso o, si no tiene, su comando de ffmpeg.
+
+    Si el trabajo pide el hash del origen ('algoritmo_hash'), se calcula en
+    este mismo hilo: mientras se pasa el archivo a ffmpeg si su comando lee
+    de stdin, o si no leyéndolo justo antes de convertir (quedará en la cache
+    del sistema para la conversión). Se guarda en trabajo.digest_origen solo
+    si el archivo no cambió mientras se leía.
+
+    Returns:
+        tuple: (subprocess.CompletedProcess, segundos)
+    """
+    if trabajo.algoritmo_hash is not None and trabajo.funcion is None and ENTRADA_TUBERIA in trabajo.comando:
+        hasher = crear_hasher(trabajo.algoritmo_hash)
+        resultado, segundos, completo = ejecutar_comando_con_hash(trabajo.comando, trabajo.origen, hasher)
+        if completo:
+            trabajo.digest_origen = trabajo.digest_si_no_cambio(hasher.hexdigest())
+        return resultado, segundos
+
+    inicio = time.perf_counter()
+    if trabajo.algoritmo_hash is not None:
+        hasher = crear_hasher(trabajo.algoritmo_hash)
+        tamanio_bloque, umbral_mmap = obtener_parametros_lectura()
+        try:
+            with open(trabajo.origen, 'rb', buffering=0) as archivo:
+                actualizar_hasher_desde_archivo(hasher, archivo, tamanio_bloque, 0 < umbral_mmap <= trabajo.tamanio)
+            trabajo.digest_origen = trabajo.digest_si_no_cambio(hasher.hexdigest())
+        except OSError:
+            pass  # Sin hash no se registra, pero se convierte igual
+    if trabajo.funcion is None:
+        resultado, segundos = ejecutar_comando(trabajo.comando)
+    else:
+        resultado = trabajo.funcion(trabajo.origen, trabajo.salida)
+    return resultado, time.perf_counter() - inicio
+
+class TrabajoConversion:
+    """Una conversión pendiente: archivo de origen, salida y comando de ffmpeg o función que la hace"""
+
+    def __init__(self, origen, salida, tipo, comando, datos=None, funcion=None, algoritmo_hash=None):
+        """
+        Args:
+            origen (str): Archivo a convertir
+            salida (str): Archivo que se creará
+            tipo (str): CODIFICAR o REMUX
+            comando (list): Comando de ffmpeg; si su entrada es ENTRADA_TUBERIA, el origen se le pasa por stdin
+            datos: Información adicional para quien recoge el resultado (opcional)
+            funcion (callable): Convierte en este proceso en lugar de lanzar 'comando';
+                recibe (origen, salida) y devuelve un subprocess.CompletedProcess (opcional)
+            algoritmo_hash (str): Calcular también el hash del origen con este algoritmo (opcional)
+        """
+        self.origen = origen
+        self.salida = salida
+        self.tipo = tipo
+        self.comando = comando
+        self.datos = datos
+        self.funcion = funcion
+        self.algoritmo_hash = algoritmo_hash
+        self.digest_origen = None
+        try:
+            self.info_origen = os.stat(origen)
+            self.tamanio = self.info_origen.st_size
+        except OSError:
+            self.info_origen = None
+            self.tamanio = 0
+
+    def digest_si_no_cambio(self, digest):
+        """Devuelve el hash calculado si el origen mantiene el tamaño y la fecha de modificación de antes"""
+        try:
+            actual = os.stat(self.origen)
+        except OSError:
+            return None
+        if (self.info_origen is None or actual.st_size != self.info_origen.st_size or
+                actual.st_mtime_ns != self.info_origen.st_mtime_ns):
+            return None
+        return digest
+
+class ColaConversiones:
+    """
+    Reparte las conversiones en dos grupos de hilos (uno por tipo), cada uno
+    esperando a su proceso de ffmpeg, y devuelve los resultados al hilo que
+    llama a medida que terminan.
+    """
+
+    def __init__(self, limites=None):
+        """
+        Args:
+            limites (dict): Conversiones simultáneas por tipo (por defecto según CONFIG)
+        """
+        self.limites = limites or obtener_limites_conversion()
+        self.trabajos = []
+        self.estadisticas = {'trabajos': 0, 'correctos': 0, 'bytes': 0, 'segundos_proceso': 0.0, 'duracion': 0.0}
+
+    def agregar(self, trabajo):
+        """Añade una conversión a la cola"""
+        self.trabajos.append(trabajo)
+
+    def ejecutar(self, al_terminar):
+        """
+        Ejecuta todas las conversiones de la cola, las más grandes primero.
+
+        Args:
+            al_terminar (callable): Se llama en el hilo actual con (trabajo, resultado,
+                segundos) cuando termina cada conversión; devuelve True si fue correcta
+
+        Returns:
+            dict: Trabajos, correctos, bytes de origen, segundos de proceso sumados y duración total
+        """
+        from main import CONFIG  # Importar configuración para modo verbose
+
+        inicio = time.perf_counter()
+        ejecutores = {}
+        futuros = {}
+        try:
+            for trabajo in sorted(self.trabajos, key=lambda t: t.tamanio, reverse=True):
+                if trabajo.tipo not in ejecutores:
+                    ejecutores[trabajo.tipo] = ThreadPoolExecutor(max_workers=self.limites[trabajo.tipo])
+                futuros[ejecutores[trabajo.tipo].submit(ejecutar_trabajo, trabajo)] = trabajo
+
+            for futuro in as_completed(futuros):
+                trabajo = futuros.pop(futuro)
+                try:
+                    resultado, segundos = futuro.result()
+                except OSError as e:  # ffmpeg no se pudo lanzar
+                    resultado, segundos = subprocess.CompletedProcess(trabajo.comando, -1, '', str(e)), 0.0
+                correcto = al_terminar(trabajo, resultado, segundos)
+
+                self.estadisticas['trabajos'] += 1
+                self.estadisticas['segundos_proceso'] += segundos
+                if correcto:
+                    self.estadisticas['correctos'] += 1
+                    self.estadisticas['bytes'] += trabajo.tamanio
+                if CONFIG['modo_verbose'] and correcto:
+                    mb = trabajo.tamanio / (1024 * 1024)
+                    print(f"      ⏱️  {os.path.basename(trabajo.origen)}: {mb:.1f} MB en {segundos:.2f}s "
+                          f"({mb / max(segundos, 1e-6):.1f} MB/s)")
+        finally:
+            for futuro in futuros:
+                futuro.cancel()
+            for ejecutor in ejecutores.values():
+                ejecutor.shutdown()
+
+        self.estadisticas['duracion'] = time.perf_counter() - inicio
+        self.trabajos = []
+        return self.estadisticas
+
+    def mostrar_resumen(self):
+        """Muestra la velocidad total de las conversiones y cuánto ganó el paralelismo"""
+        estadisticas = self.estadisticas
+        if not estadisticas['correctos']:
+            return
+        duracion = max(estadisticas['duracion'], 1e-6)
+        mb = estadisticas['bytes'] / (1024 * 1024)
+        print(f"🎬 Conversiones: {estadisticas['correctos']} archivos ({mb:.1f} MB) en {duracion:.1f}s "
+              f"({estadisticas['correctos'] / duracion:.1f} archivos/s, {mb / duracion:.1f} MB/s)")
+        print(f"   ⚙️  Hasta {self.limites[CODIFICAR]} recodificaciones y {self.limites[REMUX]} remux a la vez "
+              f"({estadisticas['segundos_proceso'] / duracion:.1f}x respecto a una por una)")
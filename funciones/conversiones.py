@@ -1,15 +1,21 @@
 import os
-import shutil
 import subprocess
 import sys
 
+from .cache_hashes import guardar_cache_hashes
+from .cola_conversiones import CODIFICAR, ENTRADA_TUBERIA, REMUX, ColaConversiones, TrabajoConversion, ejecutar_comando
+from .diario import registrar_operacion
+from .duplicados import (calcular_en_paralelo, calcular_hash_archivo, guardar_hash_completo,
+                         obtener_algoritmo_configurado, obtener_hilos_hash)
+from .herramientas import ffmpeg_disponible, ffmpeg_soporta, obtener_herramientas, pillow_soporta
+from .inventario import FileInventory
+from .movimientos import MotorMovimientos
+from .nombres import AsignadorNombres
+from .registro_conversiones import PARAMETROS_CONVERSION, abrir_registro_conversiones, enlazar_salida, salida_registrada
+
 def verificar_ffmpeg():
-    """Verifica si ffmpeg está instalado en el sistema"""
-    try:
-        subprocess.run(['ffmpeg', '-version'], capture_output=True, text=True)
-        return True
-    except FileNotFoundError:
-        return False
+    """Verifica si ffmpeg está instalado en el sistema (sin ejecutarlo si ya se sondeó)"""
+    return ffmpeg_disponible()
 
 def instalar_ffmpeg():
     """Intenta instalar ffmpeg de forma silenciosa o guía al usuario para hacerlo"""
@@ -99,6 +105,17 @@ def instalar_ffmpeg():
     
     return False
 
+def asegurar_ffmpeg():
+    """Comprueba que ffmpeg está instalado e intenta instalarlo si no lo está"""
+    if verificar_ffmpeg():
+        return True
+    print("🔧 ffmpeg no encontrado, se requiere para las conversiones.")
+    if instalar_ffmpeg():
+        print("✅ ffmpeg instalado correctamente")
+        obtener_herramientas(refrescar=True)  # Sondear el ffmpeg recién instalado
+        return True
+    return False
+
 def crear_carpeta_basura(ruta):
     """Crea la carpeta basura si no existe"""
     carpeta_basura = os.path.join(ruta, "basura")
@@ -107,76 +124,174 @@ def crear_carpeta_basura(ruta):
         print(f"📁 Carpeta 'basura' creada en: {carpeta_basura}")
     return carpeta_basura
 
-def convertir_webp_a_png(ruta_webp, carpeta_basura):
-    """Convierte archivos WEBP a PNG usando ffmpeg"""
+def ruta_convertida(ruta_origen, extension):
+    """Devuelve la ruta junto al original con la nueva extensión (ej. foto.webp → foto.png)"""
+    return os.path.splitext(ruta_origen)[0] + extension
+
+def comando_webp_a_png(ruta_webp, ruta_png):
+    """Comando de ffmpeg para convertir un WEBP a PNG (recodifica la imagen)"""
+    return ['ffmpeg', '-i', ruta_webp, ruta_png, '-y']
+
+def comando_ts_a_mp4(ruta_ts, ruta_mp4):
+    """
+    Comando de ffmpeg para pasar un TS a MP4 sin recodificar (solo cambia el contenedor).
+    
+    Con ruta_ts = ENTRADA_TUBERIA el TS se lee de stdin, indicando el formato
+    porque ffmpeg no puede volver atrás en una tubería para detectarlo.
+    """
+    if ruta_ts == ENTRADA_TUBERIA:
+        return ['ffmpeg', '-f', 'mpegts', '-i', ruta_ts, '-c', 'copy', ruta_mp4, '-y']
+    return ['ffmpeg', '-i', ruta_ts, '-c', 'copy', ruta_mp4, '-y']
+
+def pillow_puede_leer_webp():
+    """Indica si Pillow está instalado y compilado con soporte para leer WEBP y guardar PNG"""
+    return pillow_soporta(abrir='WEBP', guardar='PNG')
+
+def usar_pillow_para_webp():
+    """
+    Indica si los WEBP se convierten con Pillow.
+    
+    Se usa Pillow si así lo indica CONFIG['conversor_webp'] y puede leer WEBP,
+    o si se prefiere ffmpeg pero el instalado no puede y Pillow sí.
+    """
+    from main import CONFIG  # Importar configuración
+    
+    if not pillow_puede_leer_webp():
+        return False
+    return CONFIG['conversor_webp'] == 'pillow' or not ffmpeg_soporta(decodificador='webp', codificador='png')
+
+def convertir_webp_con_pillow(ruta_webp, ruta_png):
+    """
+    Convierte un WEBP a PNG con Pillow dentro del propio proceso.
+    
+    Evita lanzar un proceso de ffmpeg por imagen, que en miles de stickers y
+    miniaturas cuesta más que la conversión. Si Pillow no puede leer el
+    archivo se recurre a ffmpeg.
+    
+    Args:
+        ruta_webp (str): Archivo WEBP
+        ruta_png (str): Archivo PNG a crear
+        
+    Returns:
+        subprocess.CompletedProcess: returncode 0 si se convirtió; 'args' indica
+            qué conversor lo hizo (['pillow', ...] o el comando de ffmpeg)
+    """
+    try:
+        from PIL import Image
+        with Image.open(ruta_webp) as img:
+            img.load()
+            opciones = {}
+            if img.info.get('icc_profile'):
+                opciones['icc_profile'] = img.info['icc_profile']
+            img.save(ruta_png, 'PNG', **opciones)
+        return subprocess.CompletedProcess(['pillow', ruta_webp, ruta_png], 0, '', '')
+    except Exception as e:
+        if os.path.exists(ruta_png):
+            os.remove(ruta_png)  # PNG a medias
+        error_pillow = f"Pillow: {e}"
+    
+    if not ffmpeg_soporta(decodificador='webp', codificador='png'):
+        return subprocess.CompletedProcess(['ffmpeg'], 1, '', f"{error_pillow}; ffmpeg no disponible o sin WEBP")
+    try:
+        resultado, segundos = ejecutar_comando(comando_webp_a_png(ruta_webp, ruta_png))
+    except OSError as e:  # Sin ffmpeg para el respaldo
+        return subprocess.CompletedProcess(['ffmpeg'], 1, '', f"{error_pillow}; ffmpeg: {e}")
+    if resultado.returncode != 0:
+        resultado.stderr = f"{error_pillow}\n{resultado.stderr}"
+    return resultado
+
+def finalizar_conversion(ruta_origen, ruta_salida, resultado, carpeta_basura, inventario=None, motor=None):
+    """
+    Registra el archivo convertido y mueve el original a basura.
+    
+    Args:
+        ruta_origen (str): Archivo convertido (WEBP o TS)
+        ruta_salida (str): Archivo creado por ffmpeg
+        resultado (subprocess.CompletedProcess): Resultado de ffmpeg
+        carpeta_basura (str): Carpeta donde mover el original
+        inventario (FileInventory): Inventario a actualizar (opcional)
+        motor (MotorMovimientos): Motor compartido para mover el original (opcional)
+        
+    Returns:
+        bool: True si la conversión fue correcta
+    """
+    from main import CONFIG  # Importar configuración para modo verbose
+    
+    if resultado.returncode != 0:
+        if CONFIG['modo_verbose']:
+            print(f"   ❌ Error en conversión: {os.path.basename(ruta_origen)}")
+            print(f"      Error: {resultado.stderr}")
+        return False
+    
+    if inventario is not None:
+        inventario.agregar(ruta_salida)
+    try:
+        destino = os.path.join(carpeta_basura, os.path.basename(ruta_origen))
+        # Sin motor compartido, mover al momento en lugar de dejar una copia en cola
+        esperar = motor is None
+        if esperar:
+            motor = MotorMovimientos("Conversiones", inventario)
+        motor.mover(ruta_origen, destino, esperar=esperar)
+        if CONFIG['modo_verbose']:
+            print(f"   ✅ Convertido y movido a basura: {os.path.basename(ruta_origen)}")
+    except Exception as e:
+        if CONFIG['modo_verbose']:
+            print(f"   ⚠️  Convertido pero no movido a basura: {os.path.basename(ruta_origen)} - {e}")
+    return True
+
+def convertir_webp_a_png(ruta_webp, carpeta_basura, inventario=None, motor=None, ruta_png=None):
+    """Convierte archivos WEBP a PNG con Pillow o ffmpeg (junto al original si no se indica 'ruta_png')"""
     try:
         from main import CONFIG  # Importar configuración para modo verbose
         
-        ruta_png = ruta_webp.replace('.webp', '.png').replace('.WEBP', '.png')
+        if ruta_png is None:
+            ruta_png = ruta_convertida(ruta_webp, '.png')
         
         if CONFIG['modo_verbose']:
             print(f"   🔄 Convirtiendo: {os.path.basename(ruta_webp)} → {os.path.basename(ruta_png)}")
         
-        comando = ['ffmpeg', '-i', ruta_webp, ruta_png, '-y']
-        resultado = subprocess.run(comando, capture_output=True, text=True)
-        
-        if resultado.returncode == 0:
-            try:
-                shutil.move(ruta_webp, os.path.join(carpeta_basura, os.path.basename(ruta_webp)))
-                if CONFIG['modo_verbose']:
-                    print(f"   ✅ Convertido y movido a basura: {os.path.basename(ruta_webp)}")
-                return True
-            except Exception as e:
-                if CONFIG['modo_verbose']:
-                    print(f"   ⚠️  Convertido pero no movido a basura: {os.path.basename(ruta_webp)} - {e}")
-                return True
+        registrar_operacion('crear', ruta=os.path.abspath(ruta_png), origen=os.path.abspath(ruta_webp))
+        if usar_pillow_para_webp():
+            resultado = convertir_webp_con_pillow(ruta_webp, ruta_png)
         else:
-            if CONFIG['modo_verbose']:
-                print(f"   ❌ Error en conversión: {os.path.basename(ruta_webp)}")
-                print(f"      Error: {resultado.stderr}")
-            return False
+            resultado, segundos = ejecutar_comando(comando_webp_a_png(ruta_webp, ruta_png))
+        return finalizar_conversion(ruta_webp, ruta_png, resultado, carpeta_basura, inventario, motor)
             
     except Exception as e:
         if CONFIG['modo_verbose']:
             print(f"   ❌ Excepción convirtiendo {os.path.basename(ruta_webp)}: {e}")
         return False
 
-def convertir_ts_a_mp4(ruta_ts, carpeta_basura):
-    """Convierte archivos TS a MP4 usando ffmpeg"""
+def convertir_ts_a_mp4(ruta_ts, carpeta_basura, inventario=None, motor=None, ruta_mp4=None):
+    """Convierte archivos TS a MP4 usando ffmpeg (junto al original si no se indica 'ruta_mp4')"""
     try:
         from main import CONFIG  # Importar configuración para modo verbose
         
-        ruta_mp4 = ruta_ts.replace('.ts', '.mp4').replace('.TS', '.mp4')
+        if ruta_mp4 is None:
+            ruta_mp4 = ruta_convertida(ruta_ts, '.mp4')
         
         if CONFIG['modo_verbose']:
             print(f"   🔄 Convirtiendo: {os.path.basename(ruta_ts)} → {os.path.basename(ruta_mp4)}")
         
-        comando = ['ffmpeg', '-i', ruta_ts, '-c', 'copy', ruta_mp4, '-y']
-        resultado = subprocess.run(comando, capture_output=True, text=True)
-        
-        if resultado.returncode == 0:
-            try:
-                shutil.move(ruta_ts, os.path.join(carpeta_basura, os.path.basename(ruta_ts)))
-                if CONFIG['modo_verbose']:
-                    print(f"   ✅ Convertido y movido a basura: {os.path.basename(ruta_ts)}")
-                return True
-            except Exception as e:
-                if CONFIG['modo_verbose']:
-                    print(f"   ⚠️  Convertido pero no movido a basura: {os.path.basename(ruta_ts)} - {e}")
-                return True
-        else:
-            if CONFIG['modo_verbose']:
-                print(f"   ❌ Error en conversión: {os.path.basename(ruta_ts)}")
-                print(f"      Error: {resultado.stderr}")
-            return False
+        registrar_operacion('crear', ruta=os.path.abspath(ruta_mp4), origen=os.path.abspath(ruta_ts))
+        resultado, segundos = ejecutar_comando(comando_ts_a_mp4(ruta_ts, ruta_mp4))
+        return finalizar_conversion(ruta_ts, ruta_mp4, resultado, carpeta_basura, inventario, motor)
             
     except Exception as e:
         if CONFIG['modo_verbose']:
             print(f"   ❌ Excepción convirtiendo {os.path.basename(ruta_ts)}: {e}")
         return False
 
-def procesar_conversiones(ruta):
-    """Procesa la conversión de archivos webp y ts"""
+def procesar_conversiones(ruta, inventario=None, carpeta_salida=None):
+    """
+    Procesa la conversión de archivos webp y ts.
+    
+    Args:
+        ruta (str): Ruta de la carpeta a procesar
+        inventario (FileInventory): Inventario compartido entre pasos (opcional)
+        carpeta_salida (str): Carpeta donde dejar los archivos convertidos; por
+            defecto junto a cada original (el planificador los deja ya en su destino final)
+    """
     from main import CONFIG  # Importar configuración
     
     if CONFIG['modo_verbose']:
@@ -185,24 +300,29 @@ def procesar_conversiones(ruta):
     else:
         print("🔄 Procesando conversiones de archivos...")
     
+    # Con Pillow para los WEBP, ffmpeg solo hace falta si hay archivos TS
+    pillow_webp = usar_pillow_para_webp()
+    
     # Verificar e instalar ffmpeg si es necesario
-    if not verificar_ffmpeg():
-        print("🔧 ffmpeg no encontrado, se requiere para las conversiones.")
-        if instalar_ffmpeg():
-            print("✅ ffmpeg instalado correctamente")
-        else:
-            print("❌ No se puede continuar sin ffmpeg.")
-            return {
-                'webp_total': 0,
-                'webp_convertidos': 0,
-                'ts_total': 0,
-                'ts_convertidos': 0,
-                'error': 'ffmpeg_no_instalado'
-            }
+    if not pillow_webp and not asegurar_ffmpeg():
+        print("❌ No se puede continuar sin ffmpeg.")
+        return {
+            'webp_total': 0,
+            'webp_convertidos': 0,
+            'ts_total': 0,
+            'ts_convertidos': 0,
+            'error': 'ffmpeg_no_instalado'
+        }
     
     # Crear carpeta basura
     carpeta_basura = crear_carpeta_basura(ruta)
     
+    if inventario is None:
+        inventario = FileInventory(ruta)
+    inventario.agregar_carpeta(carpeta_basura)
+    motor = MotorMovimientos("Conversiones", inventario)  # Mueve los originales a basura
+    asignador = AsignadorNombres() if carpeta_salida is not None else None
+    
     archivos_webp = []
     archivos_ts = []
     
@@ -210,7 +330,7 @@ def procesar_conversiones(ruta):
     if CONFIG['modo_verbose']:
         print("🔍 Buscando archivos WEBP y TS...")
     
-    for root, dirs, files in os.walk(ruta):
+    for root, dirs, files in inventario.recorrer(ruta):
         if "basura" in root:
             continue
             
@@ -222,8 +342,13 @@ def procesar_conversiones(ruta):
     
     total_webp = len(archivos_webp)
     total_ts = len(archivos_ts)
-    convertidos_webp = 0
-    convertidos_ts = 0
+    
+    if pillow_webp and archivos_ts and not asegurar_ffmpeg():
+        print("⚠️  Sin ffmpeg los archivos TS no se pueden convertir; solo se convertirán los WEBP.")
+        archivos_ts = []
+    elif archivos_ts and not ffmpeg_soporta(demuxer='mpegts', muxer='mp4'):
+        print("⚠️  El ffmpeg instalado no puede leer TS o escribir MP4; los archivos TS no se convertirán.")
+        archivos_ts = []
     
     if CONFIG['modo_verbose']:
         print(f"📊 ARCHIVOS ENCONTRADOS:")
@@ -235,39 +360,178 @@ def procesar_conversiones(ruta):
     
     print()
     
-    # Convertir WEBP a PNG
-    if total_webp > 0:
-        if CONFIG['modo_verbose']:
-            print("🖼️  INICIANDO CONVERSIÓN WEBP A PNG:")
-        else:
-            print("🖼️  Convirtiendo WEBP a PNG:")
+    # Hash del contenido de los orígenes para el registro. Antes de convertir solo hace falta el de los
+    # que pueden estar ya convertidos o repetidos: los que tienen el tamaño de un origen del registro o
+    # de otro archivo del mismo tipo. El resto se calcula en la propia conversión mientras se lee.
+    registro = abrir_registro_conversiones()
+    algoritmo = obtener_algoritmo_configurado() if registro is not None else None
+    claves = {}
+    if registro is not None and (archivos_webp or archivos_ts):
+        candidatos = []
+        for tipo, origenes in (('webp', archivos_webp), ('ts', archivos_ts)):
+            tamanios = {}
+            for origen in origenes:
+                info = inventario.stat(origen)
+                tamanio = info.st_size if info is not None else os.path.getsize(origen)
+                if tamanio:
+                    tamanios.setdefault(tamanio, []).append(origen)
+            registrados = registro.tamanios_origen(PARAMETROS_CONVERSION[tipo])
+            for tamanio, mismos in tamanios.items():
+                if len(mismos) > 1 or tamanio in registrados:
+                    candidatos.extend((origen, tipo) for origen in mismos)
+        digests = calcular_en_paralelo(calcular_hash_archivo,
+                                       [(i, (origen, algoritmo)) for i, (origen, tipo) in enumerate(candidatos)],
+                                       obtener_hilos_hash())
+        for i, (origen, tipo) in enumerate(candidatos):
+            if digests[i] not in (None, "empty_file"):
+                claves[origen] = (algoritmo, digests[i], PARAMETROS_CONVERSION[tipo])
+    
+    progreso = {'terminados': 0, 'webp': 0, 'ts': 0, 'webp_ffmpeg': 0, 'reutilizados': 0, 'webp_reutilizados': 0}
+    copias = {}  # clave -> [(origen, salida)] con el mismo contenido que una conversión en cola
+    
+    def asignar_salida(origen, extension):
+        """Elige el nombre del archivo convertido (en carpeta_salida o junto al original)"""
+        if asignador is not None:
+            return asignador.asignar(carpeta_salida, os.path.splitext(os.path.basename(origen))[0] + extension)
+        return ruta_convertida(origen, extension)
+    
+    def reutilizar(origen, salida, existente, tipo):
+        """Da un origen por convertido enlazando 'salida' a una conversión con el mismo contenido"""
+        try:
+            if salida != existente:
+                modo = enlazar_salida(existente, salida)
+            else:
+                modo = 'existente'
+            correcto = finalizar_conversion(origen, salida, subprocess.CompletedProcess([modo, existente, salida], 0, '', ''),
+                                            carpeta_basura, inventario, motor)
+        except Exception as e:
+            if CONFIG['modo_verbose']:
+                print(f"   ⚠️  No se pudo reutilizar {os.path.basename(existente)} para {os.path.basename(origen)}: {e}")
+            correcto = False
+        if correcto:
+            progreso[tipo] += 1
+            progreso['reutilizados'] += 1
+            if tipo == 'webp':
+                progreso['webp_reutilizados'] += 1
+            progreso['terminados'] += 1
+            if CONFIG['modo_verbose']:
+                print(f"   ♻️  Ya convertido: {os.path.basename(origen)} → {os.path.basename(salida)} ({modo})")
+        return correcto
+    
+    # Encolar todas las conversiones: se ejecutan a la vez, las más grandes primero
+    cola = ColaConversiones()
+    for origen in archivos_webp + archivos_ts:
+        tipo = 'webp' if origen.lower().endswith('.webp') else 'ts'
+        extension = '.png' if tipo == 'webp' else '.mp4'
+        clave = claves.get(origen)
+        salida = None
         
-        for i, webp in enumerate(archivos_webp, 1):
-            if convertir_webp_a_png(webp, carpeta_basura):
-                convertidos_webp += 1
+        if clave is not None:
+            if clave in copias:  # Mismo contenido que otro origen en cola: se enlazará a su salida
+                salida = asignar_salida(origen, extension)
+                copias[clave].append((origen, salida))
+                registrar_operacion('crear', ruta=os.path.abspath(salida), origen=os.path.abspath(origen))
+                continue
             
-            if not CONFIG['modo_verbose']:
-                print(f"   📊 Progreso: {i}/{total_webp} - Convertidos: {convertidos_webp}", end='\r')
+            anterior = salida_registrada(registro, *clave)
+            if anterior is not None:
+                existente, digest_salida = anterior
+                # Si la salida de este origen ya está en su sitio (conversión interrumpida antes de
+                # mover el original), no se crea nada; si no, se enlaza a la salida registrada
+                natural = os.path.join(carpeta_salida or os.path.dirname(origen),
+                                       os.path.splitext(os.path.basename(origen))[0] + extension)
+                if os.path.isfile(natural) and (os.path.abspath(natural) == existente or
+                                                calcular_hash_archivo(natural, clave[0]) == digest_salida):
+                    if reutilizar(origen, natural, natural, tipo):
+                        continue
+                else:
+                    # Si no se puede enlazar, se convierte con este mismo nombre (ya anotado en el diario)
+                    salida = asignar_salida(origen, extension)
+                    registrar_operacion('crear', ruta=os.path.abspath(salida), origen=os.path.abspath(origen))
+                    if reutilizar(origen, salida, existente, tipo):
+                        continue
+            copias[clave] = []
+        
+        if salida is None:
+            salida = asignar_salida(origen, extension)
+            registrar_operacion('crear', ruta=os.path.abspath(salida), origen=os.path.abspath(origen))
+        # Sin hash previo, el trabajo lo calcula al leer el origen (los TS se le pasan a ffmpeg por stdin)
+        algoritmo_trabajo = algoritmo if clave is None else None
+        if tipo == 'webp':
+            cola.agregar(TrabajoConversion(origen, salida, CODIFICAR, comando_webp_a_png(origen, salida), (tipo, clave),
+                                           convertir_webp_con_pillow if pillow_webp else None, algoritmo_trabajo))
+        else:
+            entrada = ENTRADA_TUBERIA if algoritmo_trabajo is not None else origen
+            cola.agregar(TrabajoConversion(origen, salida, REMUX, comando_ts_a_mp4(entrada, salida), (tipo, clave),
+                                           algoritmo_hash=algoritmo_trabajo))
+    
+    def al_terminar(trabajo, resultado, segundos):
+        """Recoge cada conversión terminada en el hilo principal"""
+        tipo, clave = trabajo.datos
+        if CONFIG['modo_verbose']:
+            print(f"   🔄 Convertido: {os.path.basename(trabajo.origen)} → {os.path.basename(trabajo.salida)}")
+        try:
+            correcto = finalizar_conversion(trabajo.origen, trabajo.salida, resultado, carpeta_basura, inventario, motor)
+        except Exception as e:
+            if CONFIG['modo_verbose']:
+                print(f"   ❌ Excepción convirtiendo {os.path.basename(trabajo.origen)}: {e}")
+            correcto = False
+        if correcto:
+            progreso[tipo] += 1
+            if pillow_webp and tipo == 'webp' and resultado.args[0] != 'pillow':
+                progreso['webp_ffmpeg'] += 1  # Pillow no pudo y se recurrió a ffmpeg
+        elif asignador is not None:
+            asignador.liberar(trabajo.salida)
+        progreso['terminados'] += 1
+        
+        if clave is None and trabajo.digest_origen is not None:
+            # Hash calculado durante la conversión: a la cache de hashes y al registro
+            guardar_hash_completo(trabajo.info_origen, trabajo.digest_origen, algoritmo)
+            clave = (algoritmo, trabajo.digest_origen, PARAMETROS_CONVERSION[tipo])
+        if clave is not None:
+            if correcto:
+                digest_salida = calcular_hash_archivo(trabajo.salida, clave[0])
+                if digest_salida not in (None, "empty_file"):
+                    registro.registrar(*clave, trabajo.tamanio, trabajo.salida, digest_salida,
+                                       os.path.getsize(trabajo.salida))
+            for origen, salida in copias.pop(clave, []):
+                if not (correcto and reutilizar(origen, salida, trabajo.salida, tipo)):
+                    progreso['terminados'] += 1
+                    if asignador is not None:
+                        asignador.liberar(salida)
         
         if not CONFIG['modo_verbose']:
-            print()
+            print(f"   📊 Progreso: {progreso['terminados']}/{len(archivos_webp) + len(archivos_ts)} - "
+                  f"Convertidos: {progreso['webp']} WEBP, {progreso['ts']} TS", end='\r')
+        return correcto
     
-    # Convertir TS a MP4
-    if total_ts > 0:
+    if archivos_webp or archivos_ts:
         if CONFIG['modo_verbose']:
-            print("🎥 INICIANDO CONVERSIÓN TS A MP4:")
+            print("🎬 INICIANDO CONVERSIONES (WEBP A PNG Y TS A MP4):")
         else:
-            print("🎥 Convirtiendo TS a MP4:")
+            print("🎬 Convirtiendo WEBP a PNG y TS a MP4:")
         
-        for i, ts in enumerate(archivos_ts, 1):
-            if convertir_ts_a_mp4(ts, carpeta_basura):
-                convertidos_ts += 1
-            
-            if not CONFIG['modo_verbose']:
-                print(f"   📊 Progreso: {i}/{total_ts} - Convertidos: {convertidos_ts}", end='\r')
+        cola.ejecutar(al_terminar)
         
         if not CONFIG['modo_verbose']:
             print()
+        cola.mostrar_resumen()
+        if progreso['reutilizados']:
+            print(f"   ♻️  Conversiones evitadas: {progreso['reutilizados']} (ya convertidas antes o con el mismo "
+                  f"contenido que otro archivo)")
+        if pillow_webp and len(archivos_webp) > progreso['webp_reutilizados']:
+            print(f"   🖼️  WEBP convertidos con Pillow: {progreso['webp'] - progreso['webp_reutilizados'] - progreso['webp_ffmpeg']}"
+                  f" (con ffmpeg como respaldo: {progreso['webp_ffmpeg']})")
+    
+    convertidos_webp = progreso['webp']
+    convertidos_ts = progreso['ts']
+    
+    motor.terminar()
+    if registro is not None:
+        registro.cerrar()
+        # Los checksums de los orígenes y de las salidas registradas están en la cache de hashes:
+        # sin confirmarlos, la próxima vez habría que volver a leer cada salida para comprobarla
+        guardar_cache_hashes()
     
     if CONFIG['modo_verbose']:
         print("✅ PROCESO DE CONVERSIONES COMPLETADO")
@@ -279,14 +543,16 @@ def procesar_conversiones(ruta):
         'ts_convertidos': convertidos_ts
     }
 
-def convertir_formatos_archivos(ruta):
+def convertir_formatos_archivos(ruta, inventario=None, carpeta_salida=None):
     """
     Función principal para convertir archivos WEBP y TS.
     
     Args:
         ruta (str): Ruta de la carpeta a procesar
+        inventario (FileInventory): Inventario compartido entre pasos (opcional)
+        carpeta_salida (str): Carpeta para los archivos convertidos (opcional)
     """
-    resultados = procesar_conversiones(ruta)
+    resultados = procesar_conversiones(ruta, inventario, carpeta_salida)
     
     if resultados.get('error') == 'ffmpeg_no_instalado':
         print("\n❌ No se pudieron realizar las conversiones porque ffmpeg no está instalado.")
@@ -0,0 +1,24 @@
+"""
+MÓDULO DE DATOS LOCALES DE ORGEST
+Ubica la carpeta donde Orgest guarda su estado persistente (caches, registros)
+fuera de las carpetas que organiza, para no mezclarlo con los archivos del usuario.
+"""
+
+import os
+
+def obtener_carpeta_datos():
+    """
+    Devuelve la carpeta de datos de Orgest, creándola si no existe.
+    
+    Se puede cambiar con la variable de entorno ORGEST_DATOS.
+    
+    Returns:
+        str: Ruta absoluta de la carpeta de datos
+    """
+    carpeta = os.environ.get('ORGEST_DATOS') or os.path.join(os.path.expanduser('~'), '.orgest')
+    os.makedirs(carpeta, exist_ok=True)
+    return carpeta
+
+def ruta_datos(nombre):
+    """Devuelve la ruta de un archivo dentro de la carpeta de datos de Orgest"""
+    return os.path.join(obtener_carpeta_datos(), nombre)
@@ -0,0 +1,414 @@
+"""
+MÓDULO DE DIARIO DE MOVIMIENTOS
+Antes de mover, crear o eliminar un archivo se anota la operación en un
+diario JSONL (una línea por operación) dentro de ~/.orgest/diarios. Si el
+programa se interrumpe a mitad de un paso, el diario dice exactamente qué
+quedó a medias: se puede reanudar sin volver a recorrer la carpeta, o
+deshacer una ejecución completa recorriendo el diario al revés.
+
+La frecuencia con que el diario se fuerza a disco (fsync) se elige en
+CONFIG['diario_sincronizacion']:
+    'ninguna'  - solo se vacía el búfer (sobrevive a un cierre del programa, no a un corte de luz)
+    'lotes'    - fsync cada LOTE_SINCRONIZACION anotaciones o SEGUNDOS_SINCRONIZACION segundos
+    'estricta' - fsync antes de cada operación
+"""
+
+import json
+import os
+import shutil
+import threading
+import time
+
+from .datos_locales import ruta_datos
+
+POLITICAS_SINCRONIZACION = ('ninguna', 'lotes', 'estricta')
+LOTE_SINCRONIZACION = 256
+SEGUNDOS_SINCRONIZACION = 2.0
+MAX_DIARIOS = 20  # Diarios guardados; se borran los más antiguos
+VERSION_DIARIO = 1
+
+_diario_activo = None
+
+class DiarioMovimientos:
+    """Diario de operaciones de solo anexado, escrito antes de cada operación"""
+
+    def __init__(self, ruta_diario, politica='lotes'):
+        """
+        Args:
+            ruta_diario (str): Archivo JSONL del diario (se crea o se continúa)
+            politica (str): 'ninguna', 'lotes' o 'estricta'
+        """
+        if politica not in POLITICAS_SINCRONIZACION:
+            print(f"⚠️  Política de sincronización desconocida '{politica}', se usa 'lotes'")
+            politica = 'lotes'
+        self.ruta_diario = ruta_diario
+        self.politica = politica
+        self._archivo = open(ruta_diario, 'a', encoding='utf-8')
+        self._sin_sincronizar = 0
+        self._ultima_sincronizacion = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _escribir(self, entrada):
+        """Añade una línea al diario y la deja al menos en el búfer del sistema"""
+        self._archivo.write(json.dumps(entrada, ensure_ascii=False) + "\n")
+        self._archivo.flush()
+        self._sin_sincronizar += 1
+
+    def registrar(self, operacion, **datos):
+        """
+        Anota una operación antes de realizarla.
+
+        Args:
+            operacion (str): 'mover', 'crear', 'enlazar', 'eliminar', 'eliminar_carpeta'...
+            **datos: Rutas y demás datos de la operación
+        """
+        datos['op'] = operacion
+        with self._lock:
+            self._escribir(datos)
+            self._sincronizar_segun_politica()
+
+    def registrar_lote(self, operaciones):
+        """
+        Anota varias operaciones de una vez con un solo fsync (por ejemplo, un plan completo).
+
+        Args:
+            operaciones (list): Lista de (operacion, dict_de_datos)
+        """
+        with self._lock:
+            for operacion, datos in operaciones:
+                entrada = dict(datos)
+                entrada['op'] = operacion
+                self._escribir(entrada)
+            if self.politica != 'ninguna':
+                self._sincronizar()
+
+    def _sincronizar_segun_politica(self):
+        """Hace fsync cuando lo pide la política configurada"""
+        if self.politica == 'estricta':
+            self._sincronizar()
+        elif self.politica == 'lotes':
+            if (self._sin_sincronizar >= LOTE_SINCRONIZACION or
+                    time.monotonic() - self._ultima_sincronizacion >= SEGUNDOS_SINCRONIZACION):
+                self._sincronizar()
+
+    def _sincronizar(self):
+        """Fuerza a disco las anotaciones pendientes"""
+        if self._sin_sincronizar:
+            os.fsync(self._archivo.fileno())
+            self._sin_sincronizar = 0
+        self._ultima_sincronizacion = time.monotonic()
+
+    def cerrar(self, completado=True):
+        """
+        Cierra el diario.
+
+        Args:
+            completado (bool): False si la ejecución se interrumpió (queda pendiente de reanudar)
+        """
+        with self._lock:
+            if self._archivo.closed:
+                return
+            if completado:
+                self._escribir({'op': 'fin', 'fecha': time.time()})
+            if self.politica != 'ninguna':
+                self._sincronizar()
+            self._archivo.close()
+
+def carpeta_diarios():
+    """Devuelve la carpeta donde se guardan los diarios, creándola si no existe"""
+    carpeta = ruta_datos("diarios")
+    os.makedirs(carpeta, exist_ok=True)
+    return carpeta
+
+def leer_diario(ruta_diario):
+    """
+    Lee todas las anotaciones de un diario.
+
+    Una última línea a medio escribir (corte durante la escritura) se ignora.
+
+    Returns:
+        list: Anotaciones (dict) en orden
+    """
+    entradas = []
+    try:
+        with open(ruta_diario, 'r', encoding='utf-8') as archivo:
+            for linea in archivo:
+                try:
+                    entradas.append(json.loads(linea))
+                except ValueError:
+                    break
+    except OSError:
+        pass
+    return entradas
+
+def estado_diario(entradas):
+    """Devuelve 'revertido', 'completado' o 'interrumpido' según las últimas anotaciones"""
+    operaciones = [entrada.get('op') for entrada in entradas]
+    if 'revertido' in operaciones:
+        return 'revertido'
+    if 'fin' in operaciones:
+        return 'completado'
+    return 'interrumpido'
+
+def _limpiar_diarios_antiguos(carpeta):
+    """Conserva solo los MAX_DIARIOS diarios más recientes"""
+    diarios = sorted(nombre for nombre in os.listdir(carpeta) if nombre.endswith('.jsonl'))
+    for nombre in diarios[:-MAX_DIARIOS]:
+        try:
+            os.remove(os.path.join(carpeta, nombre))
+        except OSError:
+            pass
+
+def abrir_diario(ruta, descripcion=""):
+    """
+    Empieza un diario nuevo para una ejecución sobre 'ruta' y lo deja activo.
+
+    Args:
+        ruta (str): Carpeta que se va a organizar
+        descripcion (str): Modo o paso que se ejecuta, para mostrarlo al reanudar o deshacer
+
+    Returns:
+        DiarioMovimientos: Diario activo (None si está desactivado en CONFIG)
+    """
+    global _diario_activo
+    from main import CONFIG  # Importar configuración
+
+    cerrar_diario()
+    if not CONFIG['usar_diario']:
+        return None
+
+    carpeta = carpeta_diarios()
+    _limpiar_diarios_antiguos(carpeta)
+    nombre = f"{time.strftime('%Y%m%d_%H%M%S')}_{int(time.time() * 1000000) % 1000000:06d}_{os.getpid()}.jsonl"
+    _diario_activo = DiarioMovimientos(os.path.join(carpeta, nombre), CONFIG['diario_sincronizacion'])
+    _diario_activo.registrar('inicio', ruta=os.path.abspath(ruta), descripcion=descripcion,
+                             fecha=time.time(), version=VERSION_DIARIO)
+    return _diario_activo
+
+def obtener_diario():
+    """Devuelve el diario activo, o None si no hay ninguno"""
+    return _diario_activo
+
+def registrar_operacion(operacion, **datos):
+    """Anota una operación en el diario activo (no hace nada si no hay diario)"""
+    if _diario_activo is not None:
+        _diario_activo.registrar(operacion, **datos)
+
+def cerrar_diario(completado=True):
+    """Cierra el diario activo"""
+    global _diario_activo
+    if _diario_activo is not None:
+        _diario_activo.cerrar(completado)
+        _diario_activo = None
+
+def buscar_diarios(ruta, estados=None):
+    """
+    Busca los diarios de ejecuciones sobre una carpeta, del más reciente al más antiguo.
+
+    Args:
+        ruta (str): Carpeta organizada
+        estados (tuple): Estados a incluir ('completado', 'interrumpido', 'revertido'); todos si es None
+
+    Returns:
+        list: Lista de (ruta_diario, entradas)
+    """
+    ruta = os.path.abspath(ruta)
+    activo = _diario_activo.ruta_diario if _diario_activo is not None else None
+    carpeta = carpeta_diarios()
+    encontrados = []
+    for nombre in sorted(os.listdir(carpeta), reverse=True):
+        ruta_diario = os.path.join(carpeta, nombre)
+        if not nombre.endswith('.jsonl') or ruta_diario == activo:
+            continue
+        entradas = leer_diario(ruta_diario)
+        if not entradas or entradas[0].get('op') != 'inicio' or entradas[0].get('ruta') != ruta:
+            continue
+        if estados is None or estado_diario(entradas) in estados:
+            encontrados.append((ruta_diario, entradas))
+    return encontrados
+
+def _completar_movimiento(origen, destino):
+    """
+    Termina un movimiento anotado que pudo quedar a medias.
+
+    Una copia a otro disco interrumpida solo puede haber dejado su archivo
+    temporal (el destino se crea al final renombrándolo), que se borra. Si el
+    destino ya existe con otro contenido no es de este movimiento y no se toca.
+
+    Returns:
+        str: 'hecho' (ya estaba), 'completado' (se hizo ahora), 'perdido' (no hay
+            origen ni destino) o 'conflicto' (origen y destino distintos; se conservan ambos)
+    """
+    from .enlaces import son_identicos
+    from .movimientos import mover_entre_discos, ruta_temporal_movimiento
+
+    temporal = ruta_temporal_movimiento(destino)
+    if os.path.lexists(temporal):
+        os.remove(temporal)  # Copia a medias de este movimiento
+
+    existe_origen, existe_destino = os.path.lexists(origen), os.path.lexists(destino)
+    if not existe_origen:
+        return 'hecho' if existe_destino else 'perdido'
+    if existe_destino:
+        # La copia terminó y faltó borrar el original
+        if son_identicos(origen, destino):
+            os.remove(origen)
+            return 'completado'
+        return 'conflicto'
+
+    os.makedirs(os.path.dirname(destino), exist_ok=True)
+    try:
+        os.rename(origen, destino)
+    except OSError:
+        mover_entre_discos(origen, destino)
+    return 'completado'
+
+def reanudar_diario(ruta_diario):
+    """
+    Completa los movimientos anotados en un diario interrumpido, sin recorrer la carpeta.
+
+    Solo se consulta el estado de las rutas anotadas. El diario se continúa y
+    se marca como terminado, así que después se puede deshacer como cualquier otro.
+
+    Returns:
+        dict: Movimientos ya hechos, completados ahora, perdidos, en conflicto y con error
+    """
+    from main import CONFIG  # Importar configuración para modo verbose
+
+    resultados = {'hechos': 0, 'completados': 0, 'perdidos': 0, 'conflictos': 0, 'errores': 0}
+    for entrada in leer_diario(ruta_diario):
+        if entrada.get('op') != 'mover':
+            continue
+        try:
+            estado = _completar_movimiento(entrada['origen'], entrada['destino'])
+        except OSError as e:
+            resultados['errores'] += 1
+            print(f"❌ No se pudo completar {os.path.basename(entrada['origen'])}: {e}")
+            continue
+        resultados[estado + 's'] += 1
+        if estado == 'conflicto':
+            print(f"⚠️  {entrada['destino']} ya existe con otro contenido; se conservan ambos archivos "
+                  f"({os.path.basename(entrada['origen'])} sigue en su sitio)")
+        elif CONFIG['modo_verbose'] and estado == 'completado':
+            print(f"   ▶️  Completado: {os.path.basename(entrada['origen'])} → {entrada['destino']}")
+
+    diario = DiarioMovimientos(ruta_diario, CONFIG['diario_sincronizacion'])
+    diario.registrar('reanudado', fecha=time.time())
+    diario.cerrar(completado=True)
+    return resultados
+
+def _independizar(ruta, original):
+    """
+    Vuelve a hacer de 'ruta' una copia independiente tras sustituirla por un enlace.
+
+    Returns:
+        bool: True si se restauró la copia, False si no queda de dónde sacarla
+    """
+    if not os.path.lexists(ruta):
+        if not os.path.lexists(original):
+            return False
+        shutil.copy2(original, ruta)
+        return True
+    if os.path.lexists(original) and os.path.samefile(ruta, original):
+        # Enlace duro: copiar el contenido a un inodo propio
+        carpeta, nombre = os.path.split(ruta)
+        temporal = os.path.join(carpeta, f".{nombre}.orgest_tmp")
+        try:
+            shutil.copy2(ruta, temporal)
+            os.replace(temporal, ruta)
+        except OSError:
+            if os.path.lexists(temporal):
+                os.remove(temporal)
+            raise
+    return True  # Un reflink ya es un archivo independiente con el mismo contenido
+
+def revertir_diario(ruta_diario):
+    """
+    Deshace una ejecución recorriendo su diario al revés.
+
+    Los archivos movidos vuelven a su sitio, los duplicados sustituidos por
+    enlaces vuelven a ser copias independientes y las carpetas vacías
+    eliminadas se vuelven a crear. Un archivo creado (imagen procesada, PNG o MP4
+    convertido) solo se borra si el original del que salió vuelve a su sitio
+    en esta misma pasada; si el original ya no existe (se vació 'basura' o se
+    eliminó 'sin_edit'), el archivo creado es la única copia que queda y se
+    conserva. Los archivos eliminados definitivamente no se pueden recuperar.
+
+    Returns:
+        dict: Operaciones restauradas, irreversibles y con error
+    """
+    from main import CONFIG  # Importar configuración para modo verbose
+    from .movimientos import MotorMovimientos
+
+    entradas = leer_diario(ruta_diario)
+    raiz = entradas[0].get('ruta') if entradas else None
+    resultados = {'restaurados': 0, 'borrados': 0, 'carpetas': 0, 'irreversibles': 0, 'errores': 0}
+    motor = MotorMovimientos("Deshacer")
+    carpetas_destino = set()
+    restaurados = set()  # Rutas a las que ha vuelto un archivo en esta pasada
+
+    # Archivos creados cuyo original se movió antes a otra carpeta (el preprocesador
+    # mueve el original a 'sin_edit' y guarda la versión procesada en su lugar): al
+    # recorrer el diario al revés, el original se restaura justo después de borrarlos
+    destinos = set()
+    con_respaldo = set()
+    for posicion, entrada in enumerate(entradas):
+        if entrada.get('op') == 'mover':
+            destinos.add(entrada.get('destino'))
+        elif entrada.get('op') == 'crear' and entrada.get('origen') in destinos:
+            con_respaldo.add(posicion)
+
+    for posicion in range(len(entradas) - 1, -1, -1):
+        entrada = entradas[posicion]
+        operacion = entrada.get('op')
+        try:
+            if operacion == 'mover':
+                origen, destino = entrada['origen'], entrada['destino']
+                if os.path.lexists(destino) and not os.path.lexists(origen):
+                    os.makedirs(os.path.dirname(origen), exist_ok=True)
+                    motor.mover(destino, origen, esperar=True)
+                    carpetas_destino.add(os.path.dirname(destino))
+                    restaurados.add(origen)
+                    resultados['restaurados'] += 1
+                    if CONFIG['modo_verbose']:
+                        print(f"   ↩️  {os.path.basename(destino)} → {origen}")
+                elif not os.path.lexists(origen):
+                    resultados['irreversibles'] += 1  # El destino se eliminó después
+            elif operacion == 'crear':
+                if os.path.lexists(entrada['ruta']):
+                    origen = entrada.get('origen')
+                    if origen in restaurados or (posicion in con_respaldo and os.path.lexists(origen)):
+                        os.remove(entrada['ruta'])
+                        resultados['borrados'] += 1
+                    else:
+                        resultados['irreversibles'] += 1  # Su original ya no existe: es la única copia
+                        if CONFIG['modo_verbose']:
+                            print(f"   ⚠️  Se conserva {entrada['ruta']}: su original no se pudo restaurar")
+            elif operacion == 'enlazar':
+                if _independizar(entrada['ruta'], entrada['original']):
+                    resultados['restaurados'] += 1
+                else:
+                    resultados['irreversibles'] += 1
+            elif operacion == 'eliminar_carpeta':
+                os.makedirs(entrada['ruta'], exist_ok=True)
+                resultados['carpetas'] += 1
+            elif operacion == 'eliminar':
+                resultados['irreversibles'] += 1
+        except OSError as e:
+            resultados['errores'] += 1
+            print(f"❌ No se pudo deshacer '{operacion}' en {entrada.get('destino') or entrada.get('ruta')}: {e}")
+    motor.terminar()
+
+    # Quitar las carpetas que la ejecución creó y que han quedado vacías
+    for carpeta in sorted(carpetas_destino, key=len, reverse=True):
+        while raiz and carpeta.startswith(os.path.join(raiz, '')):
+            try:
+                os.rmdir(carpeta)
+            except OSError:
+                break
+            carpeta = os.path.dirname(carpeta)
+
+    diario = DiarioMovimientos(ruta_diario, CONFIG['diario_sincronizacion'])
+    diario.registrar('revertido', fecha=time.time())
+    diario.cerrar(completado=False)
+    return resultados
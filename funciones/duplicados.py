@@ -1,129 +1,563 @@
 """
 MÓDULO DE DETECCIÓN Y ELIMINACIÓN DE ARCHIVOS DUPLICADOS
-Utiliza hash MD5 para identificar archivos idénticos y gestiona su eliminación.
+Utiliza hashes de contenido (MD5, BLAKE2b, xxHash...) para identificar archivos
+idénticos y gestiona su eliminación.
 Incluye funciones para escaneo completo y verificación rápida.
 """
 
 import os
 import shutil
-import hashlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
-def calcular_hash_archivo(ruta_archivo):
+from .cache_hashes import obtener_cache_hashes, guardar_cache_hashes
+from .calidad import ordenar_por_calidad
+from .diario import registrar_operacion
+from .enlaces import enlazar_duplicados, MODOS_ENLACE
+from .inventario import FileInventory
+from .movimientos import MotorMovimientos
+from .nombres import AsignadorNombres
+from .progreso import Progreso
+from .hashing import (crear_hasher, obtener_algoritmo_configurado,
+                      actualizar_hasher_desde_archivo, obtener_parametros_lectura)
+
+# Archivos de hasta este tamaño se comparan byte a byte en lugar de por hash
+TAMANIO_COMPARACION_DIRECTA = 4096
+# Bytes que se leen del inicio y del final para el hash parcial
+TAMANIO_MUESTRA_PARCIAL = 64 * 1024
+
+def calcular_hash_archivo(ruta_archivo, algoritmo=None, indice=None):
     """
-    Calcula el hash MD5 de un archivo para comparación de contenido.
+    Calcula el hash de un archivo para comparación de contenido.
+    
+    Consulta primero el índice de la ejecución y la cache persistente: si el
+    archivo no cambió desde que se calculó su hash (mismo inodo, tamaño y
+    fecha de modificación), no se lee.
     
     Args:
         ruta_archivo (str): Ruta completa al archivo a analizar
+        algoritmo (str): Algoritmo de hash; por defecto CONFIG['algoritmo_hash']
+        indice (IndiceIdentidad): Índice en memoria compartido entre pasos (opcional)
         
     Returns:
-        str or None: Hash MD5 del archivo, None si hay error o "empty_file" si está vacío
+        str or None: Hash del archivo, None si hay error o "empty_file" si está vacío
     """
-    hasher = hashlib.md5()
+    algoritmo = algoritmo or obtener_algoritmo_configurado()
+    hasher = crear_hasher(algoritmo)
     try:
         # Verificar que el archivo existe y es accesible
         if not os.path.exists(ruta_archivo):
             return None
             
         # Verificar tamaño del archivo - archivos vacíos se tratan diferente
-        file_size = os.path.getsize(ruta_archivo)
-        if file_size == 0:
+        info_stat = os.stat(ruta_archivo)
+        if info_stat.st_size == 0:
             return "empty_file"  # Identificador especial para archivos vacíos
+        
+        digest = _buscar_hash(info_stat, algoritmo, 'completo', indice)
+        if digest:
+            return digest
             
-        # Calcular hash leyendo el archivo en bloques para eficiencia
-        with open(ruta_archivo, 'rb') as archivo:
-            for bloque in iter(lambda: archivo.read(8192), b""):  # Bloques de 8KB
-                hasher.update(bloque)
-        return hasher.hexdigest()
+        # Calcular hash leyendo el archivo en bloques sobre un búfer reutilizado
+        tamanio_bloque, umbral_mmap = obtener_parametros_lectura()
+        usar_mmap = 0 < umbral_mmap <= info_stat.st_size
+        with open(ruta_archivo, 'rb', buffering=0) as archivo:
+            actualizar_hasher_desde_archivo(hasher, archivo, tamanio_bloque, usar_mmap)
+        digest = hasher.hexdigest()
+        
+        # Guardar solo si el archivo no cambió mientras se leía
+        if _sin_cambios(ruta_archivo, info_stat):
+            _guardar_hash(info_stat, algoritmo, 'completo', digest, indice)
+        return digest
         
     except Exception as e:
         print(f"❌ Error al calcular hash de {os.path.basename(ruta_archivo)}: {e}")
         return None
 
-def encontrar_duplicados(ruta):
+def _buscar_hash(info_stat, algoritmo, tipo, indice=None):
+    """Busca un hash en el índice de la ejecución y luego en la cache persistente"""
+    if indice is not None:
+        digest = indice.obtener(info_stat, algoritmo, tipo)
+        if digest:
+            return digest
+    
+    cache = obtener_cache_hashes()
+    if cache is not None:
+        digest = cache.obtener(info_stat, algoritmo, tipo)
+        if digest and indice is not None:
+            indice.guardar(info_stat, algoritmo, tipo, digest)
+        return digest
+    return None
+
+def _guardar_hash(info_stat, algoritmo, tipo, digest, indice=None):
+    """Guarda un hash recién calculado en el índice y en la cache persistente"""
+    if indice is not None:
+        indice.guardar(info_stat, algoritmo, tipo, digest)
+    cache = obtener_cache_hashes()
+    if cache is not None:
+        cache.guardar(info_stat, algoritmo, tipo, digest)
+
+def guardar_hash_completo(info_stat, digest, algoritmo=None, indice=None):
+    """
+    Guarda en la cache el hash completo de un archivo calculado fuera de este módulo.
+
+    Args:
+        info_stat (os.stat_result): Metadatos del archivo cuando se empezó a leer
+        digest (str): Hash de todo su contenido
+        algoritmo (str): Algoritmo con el que se calculó; por defecto CONFIG['algoritmo_hash']
+        indice (IndiceIdentidad): Índice en memoria compartido entre pasos (opcional)
     """
-    Escanea recursivamente una carpeta buscando archivos duplicados usando MD5.
+    _guardar_hash(info_stat, algoritmo or obtener_algoritmo_configurado(), 'completo', digest, indice)
+
+def _sin_cambios(ruta_archivo, info_stat):
+    """Comprueba que un archivo mantiene el tamaño y la fecha de modificación de info_stat"""
+    try:
+        actual = os.stat(ruta_archivo)
+    except OSError:
+        return False
+    return actual.st_size == info_stat.st_size and actual.st_mtime_ns == info_stat.st_mtime_ns
+
+def calcular_hash_parcial(ruta_archivo, tamanio, tamanio_muestra=TAMANIO_MUESTRA_PARCIAL, algoritmo=None, indice=None):
+    """
+    Calcula un hash rápido usando solo el inicio y el final del archivo.
+    
+    Dos archivos del mismo tamaño con hash parcial distinto son seguro
+    diferentes, por lo que el hash completo solo se calcula si coinciden.
     
     Args:
-        ruta (str): Ruta de la carpeta a escanear
+        ruta_archivo (str): Ruta completa al archivo a analizar
+        tamanio (int): Tamaño del archivo en bytes
+        tamanio_muestra (int): Bytes a leer del inicio y del final
+        algoritmo (str): Algoritmo de hash; por defecto CONFIG['algoritmo_hash']
+        indice (IndiceIdentidad): Índice en memoria compartido entre pasos (opcional)
         
     Returns:
-        tuple: (lista_de_duplicados, total_archivos_escaneados)
+        str or None: Hash de la muestra, None si hay error
+    """
+    algoritmo = algoritmo or obtener_algoritmo_configurado()
+    hasher = crear_hasher(algoritmo)
+    try:
+        info_stat = os.stat(ruta_archivo)
+        tipo = f"parcial_{tamanio_muestra}"
+        digest = _buscar_hash(info_stat, algoritmo, tipo, indice)
+        if digest:
+            return digest
+        
+        with open(ruta_archivo, 'rb') as archivo:
+            hasher.update(archivo.read(tamanio_muestra))
+            if tamanio > tamanio_muestra:
+                # Leer el final sin volver a leer bytes del inicio
+                archivo.seek(max(tamanio_muestra, tamanio - tamanio_muestra))
+                hasher.update(archivo.read(tamanio_muestra))
+        digest = hasher.hexdigest()
+        
+        if _sin_cambios(ruta_archivo, info_stat):
+            _guardar_hash(info_stat, algoritmo, tipo, digest, indice)
+        return digest
+        
+    except Exception as e:
+        print(f"❌ Error al calcular hash parcial de {os.path.basename(ruta_archivo)}: {e}")
+        return None
+
+def requiere_hash_completo(tamanio, tamanio_muestra=TAMANIO_MUESTRA_PARCIAL):
+    """Indica si el hash parcial no cubre el archivo entero y hace falta el completo"""
+    return tamanio > TAMANIO_COMPARACION_DIRECTA and tamanio > 2 * tamanio_muestra
+
+def calcular_clave_contenido(ruta_archivo, tamanio, algoritmo=None, indice=None):
+    """
+    Obtiene la clave de identidad de un archivo dentro de su grupo de tamaño.
+    
+    Los archivos pequeños se comparan directamente por su contenido, ya que
+    leerlos cuesta lo mismo que calcular su hash. El resto usa un hash
+    parcial del inicio y del final como primera etapa de comparación.
+    
+    Args:
+        ruta_archivo (str): Ruta completa al archivo
+        tamanio (int): Tamaño del archivo en bytes (obtenido en el escaneo)
+        algoritmo (str): Algoritmo de hash; por defecto CONFIG['algoritmo_hash']
+        indice (IndiceIdentidad): Índice en memoria compartido entre pasos (opcional)
+        
+    Returns:
+        bytes, str or None: Contenido o hash parcial del archivo, None si hay error
+    """
+    if tamanio == 0:
+        return "empty_file"
+    
+    if tamanio <= TAMANIO_COMPARACION_DIRECTA:
+        try:
+            with open(ruta_archivo, 'rb') as archivo:
+                return archivo.read()
+        except Exception as e:
+            print(f"❌ Error al leer {os.path.basename(ruta_archivo)}: {e}")
+            return None
+    
+    return calcular_hash_parcial(ruta_archivo, tamanio, algoritmo=algoritmo, indice=indice)
+
+def preparar_raices(rutas, autoritativas=()):
+    """
+    Normaliza las carpetas raíz de un escaneo y las ordena para recorrerlas.
+    
+    Las raíces autoritativas se recorren primero, así sus archivos aparecen
+    antes en el recorrido y son los que se conservan. Las rutas repetidas se
+    descartan.
+    
+    Args:
+        rutas (str or list): Carpeta o lista de carpetas a escanear
+        autoritativas (list): Carpetas cuyas copias se conservan siempre
+        
+    Returns:
+        tuple: (lista de raíces en orden de recorrido, tupla de raíces autoritativas)
+    """
+    if isinstance(rutas, str):
+        rutas = [rutas]
+    autoritativas = [os.path.abspath(raiz) for raiz in autoritativas]
+    
+    raices = []
+    for raiz in autoritativas + [os.path.abspath(raiz) for raiz in rutas]:
+        if raiz not in raices:
+            raices.append(raiz)
+    
+    return raices, tuple(autoritativas)
+
+def raiz_de_archivo(ruta_archivo, raices):
+    """
+    Devuelve la raíz del escaneo que contiene un archivo (la más profunda si hay varias).
+    
+    Args:
+        ruta_archivo (str): Ruta del archivo
+        raices (list): Raíces del escaneo
+        
+    Returns:
+        str or None: Raíz que contiene el archivo, None si no está en ninguna
+    """
+    contenedoras = [raiz for raiz in raices if ruta_archivo.startswith(os.path.join(raiz, ''))]
+    return max(contenedoras, key=len) if contenedoras else None
+
+def agrupar_por_tamanio(rutas, inventario=None):
+    """
+    Agrupa los archivos de una o varias carpetas según su tamaño en bytes.
+    
+    Solo los archivos que comparten tamaño pueden ser duplicados, así que
+    los grupos con un único archivo no necesitan calcular ningún hash.
+    
+    Cada archivo físico (st_dev, st_ino) se registra una sola vez en los
+    grupos: las raíces que se solapan, los enlaces duros y los duplicados ya
+    sustituidos por enlaces no se comparan consigo mismos ni se leen dos
+    veces. El total sí cuenta cada ruta recorrida, como antes de agrupar por
+    identidad.
+    
+    Los tamaños salen del inventario de archivos: si no se recibe uno que
+    contenga la carpeta, se construye con un único recorrido de os.scandir
+    mostrando el avance sobre la marcha.
+    
+    Args:
+        rutas (str or list): Carpeta o lista de carpetas a escanear, en orden de recorrido
+        inventario (FileInventory): Inventario compartido entre pasos (opcional)
+        
+    Returns:
+        tuple: (diccionario tamaño -> [(orden, ruta, os.stat_result)], total_rutas_escaneadas)
     """
+    if isinstance(rutas, str):
+        rutas = [rutas]
+    
+    grupos = {}
+    total_archivos = 0
+    vistos = set()  # (st_dev, st_ino) ya registrados
+    
     from main import CONFIG  # Importar configuración para modo verbose
     
+    for ruta in rutas:
+        if inventario is not None and inventario.contiene(ruta):
+            inventario_ruta = inventario
+        elif CONFIG['modo_verbose']:
+            inventario_ruta = FileInventory(ruta)
+        else:
+            progreso = Progreso("📊 Archivos encontrados: {actual}/{total}", cada=100)
+            inventario_ruta = FileInventory(ruta, progreso)
+            progreso.terminar()
+        for root, dirs, files in inventario_ruta.recorrer(ruta):
+            if "basura" in root:  # Ignorar carpeta de basura
+                continue
+                
+            for archivo in files:
+                ruta_completa = os.path.join(root, archivo)
+                info_stat = inventario_ruta.stat(ruta_completa)
+                orden = total_archivos
+                total_archivos += 1  # Toda ruta cuenta, aunque no se compare
+                if info_stat is None:
+                    continue  # Archivo inaccesible o enlace roto
+                identidad = (info_stat.st_dev, info_stat.st_ino)
+                if identidad in vistos:
+                    continue  # Mismo archivo alcanzado por otra ruta: no se vuelve a leer
+                vistos.add(identidad)
+                grupos.setdefault(info_stat.st_size, []).append((orden, ruta_completa, info_stat))
+    
+    return grupos, total_archivos
+
+def obtener_hilos_hash():
+    """
+    Devuelve el número de hilos a usar para calcular hashes.
+    
+    hashlib libera el GIL mientras procesa bloques grandes, así que varios
+    hilos aprovechan la concurrencia de E/S de discos NVMe y unidades de red.
+    
+    Returns:
+        int: Número de hilos (CONFIG['hilos_hash'], o automático si es 0)
+    """
+    from main import CONFIG  # Importar configuración
+    
+    hilos = CONFIG['hilos_hash']
+    if not hilos or hilos < 1:
+        hilos = min(32, (os.cpu_count() or 1) + 4)
+    return hilos
+
+def calcular_en_paralelo(funcion, tareas, hilos, al_completar=None):
+    """
+    Ejecuta una función de hash sobre varias tareas con un grupo acotado de hilos.
+    
+    Los resultados se indexan por el orden de cada tarea, de modo que quien
+    los consuma obtiene siempre el mismo resultado sin importar qué hilo
+    termine primero.
+    
+    Args:
+        funcion (callable): Función a ejecutar con los argumentos de cada tarea
+        tareas (list): Lista de (orden, argumentos)
+        hilos (int): Número máximo de hilos simultáneos
+        al_completar (callable): Se llama en el hilo principal tras cada tarea
+        
+    Returns:
+        dict: orden -> resultado de la función
+    """
+    resultados = {}
+    
+    if hilos <= 1 or len(tareas) <= 1:
+        for orden, argumentos in tareas:
+            resultados[orden] = funcion(*argumentos)
+            if al_completar:
+                al_completar(argumentos[0])
+        return resultados
+    
+    with ThreadPoolExecutor(max_workers=hilos) as ejecutor:
+        futuros = {ejecutor.submit(funcion, *argumentos): (orden, argumentos) for orden, argumentos in tareas}
+        for futuro in as_completed(futuros):
+            orden, argumentos = futuros[futuro]
+            resultados[orden] = futuro.result()
+            if al_completar:
+                al_completar(argumentos[0])
+    
+    return resultados
+
+def _escanear_duplicados(ruta, indice=None, autoritativas=(), inventario=None):
+    """
+    Escanea recursivamente una o varias carpetas buscando archivos duplicados por hash de contenido.
+    
+    Primero agrupa los archivos por tamaño y solo compara el contenido de los
+    grupos con dos o más archivos. De cada grupo se conserva la mejor copia
+    según CONFIG['criterios_conservar'] (en empate, la primera del recorrido).
+    Los archivos de las raíces autoritativas se recorren primero, tienen
+    preferencia y nunca se marcan como duplicados.
+    
+    Con un índice de identidad de un escaneo anterior de la misma ejecución,
+    los grupos formados solo por archivos ya verificados y sin cambios se
+    omiten, y los hashes conocidos no se vuelven a calcular.
+    
+    Args:
+        ruta (str or list): Carpeta o lista de carpetas a escanear
+        indice (IndiceIdentidad): Índice compartido entre pasos (opcional)
+        autoritativas (list): Carpetas cuyas copias se conservan siempre
+        inventario (FileInventory): Inventario compartido entre pasos (opcional)
+        
+    Returns:
+        tuple: (lista_de_duplicados, grupos_de_iguales, total_archivos_escaneados)
+    """
+    from main import CONFIG  # Importar configuración para modo verbose
+    
+    algoritmo = obtener_algoritmo_configurado()
+    nombre_algoritmo = algoritmo.upper()
+    raices, autoritativas = preparar_raices(ruta, autoritativas)
+    
     if CONFIG['modo_verbose']:
-        print("🔍 INICIANDO BÚSQUEDA DE DUPLICADOS CON MD5...")
-        print(f"📁 Ruta: {ruta}")
+        print(f"🔍 INICIANDO BÚSQUEDA DE DUPLICADOS CON {nombre_algoritmo}...")
+        for raiz in raices:
+            marca = " (autoritativa)" if raiz in autoritativas else ""
+            print(f"📁 Ruta: {raiz}{marca}")
     else:
-        print("🔍 Buscando archivos duplicados con MD5...")
-    
-    hashes = {}  # Diccionario para almacenar hashes únicos
-    duplicados = []  # Lista de rutas de archivos duplicados
-    total_archivos = 0
-    archivos_procesados = 0
+        print(f"🔍 Buscando archivos duplicados con {nombre_algoritmo}...")
     
-    # Primera pasada: contar archivos totales para mostrar progreso
+    # Primera pasada: agrupar por tamaño (solo metadatos, sin leer contenido)
     if CONFIG['modo_verbose']:
-        print("📊 CONTANDO ARCHIVOS...")
+        print("📊 AGRUPANDO ARCHIVOS POR TAMAÑO...")
     else:
-        print("📊 Contando archivos...")
-        
-    for root, dirs, files in os.walk(ruta):
-        if "basura" in root:  # Ignorar carpeta de basura
+        print("📊 Agrupando archivos por tamaño...")
+    
+    grupos, total_archivos = agrupar_por_tamanio(raices, inventario)
+    candidatos = []
+    omitidos = 0
+    for tamanio, grupo in grupos.items():
+        if len(grupo) < 2:
+            continue
+        if indice is not None and all(indice.esta_verificado(info_stat) for _, _, info_stat in grupo):
+            omitidos += len(grupo)  # Ya comparados entre sí y sin cambios desde entonces
             continue
-        total_archivos += len(files)
+        candidatos.append((tamanio, grupo))
+    total_candidatos = sum(len(grupo) for tamanio, grupo in candidatos)
     
     if CONFIG['modo_verbose']:
-        print(f"📊 TOTAL DE ARCHIVOS A ESCANEAR: {total_archivos}")
+        print(f"📊 TOTAL DE ARCHIVOS ESCANEADOS: {total_archivos}")
+        print(f"📊 ARCHIVOS CON TAMAÑO REPETIDO A COMPARAR: {total_candidatos}")
+        if omitidos:
+            print(f"🧠 ARCHIVOS YA VERIFICADOS EN ESTA EJECUCIÓN (OMITIDOS): {omitidos}")
     else:
-        print(f"📁 Total de archivos a escanear: {total_archivos}")
+        print(f"📁 Total de archivos escaneados: {total_archivos}")
+        print(f"📁 Archivos a comparar (mismo tamaño): {total_candidatos}")
+        if omitidos:
+            print(f"🧠 Archivos ya verificados en esta ejecución: {omitidos}")
     
     print()
     
-    # Segunda pasada: calcular hashes y detectar duplicados
-    for root, dirs, files in os.walk(ruta):
-        if "basura" in root:  # Excluir carpeta de basura del análisis
-            continue
-            
-        for archivo in files:
-            archivos_procesados += 1
-            ruta_completa = os.path.join(root, archivo)
-            
-            # Mostrar progreso según el modo
-            if CONFIG['modo_verbose']:
-                if archivos_procesados % 5 == 0 or archivos_procesados == total_archivos:
-                    print(f"   📄 Procesando: {archivo} ({archivos_procesados}/{total_archivos})")
-            else:
-                if archivos_procesados % 10 == 0 or archivos_procesados == total_archivos:
-                    print(f"🔍 Progreso: {archivos_procesados}/{total_archivos} - MD5: {len(duplicados)} dup", end='\r')
-            
-            file_hash = calcular_hash_archivo(ruta_completa)
-            
-            if file_hash:
-                if file_hash in hashes:
-                    # Hash repetido encontrado - archivo duplicado
-                    if CONFIG['modo_verbose']:
-                        print(f"   🔍 DUPLICADO ENCONTRADO: {archivo}")
-                    duplicados.append(ruta_completa)
+    duplicados = []  # Lista de (orden, ruta) de archivos duplicados
+    hilos = obtener_hilos_hash()
+    progreso = {'procesados': 0, 'total': total_candidatos, 'etapa': nombre_algoritmo}
+    
+    if CONFIG['modo_verbose']:
+        print(f"🧵 HILOS DE CÁLCULO DE HASH: {hilos}")
+    
+    def mostrar_progreso(ruta_completa):
+        """Actualiza los contadores de progreso desde el hilo principal"""
+        progreso['procesados'] += 1
+        procesados, total = progreso['procesados'], progreso['total']
+        if CONFIG['modo_verbose']:
+            if procesados % 5 == 0 or procesados == total:
+                print(f"   📄 Procesando: {os.path.basename(ruta_completa)} ({procesados}/{total})")
+        else:
+            if procesados % 10 == 0 or procesados == total:
+                print(f"🔍 Progreso: {procesados}/{total} - {progreso['etapa']}: {len(duplicados)} dup", end='\r')
+    
+    # Segunda pasada, etapa 1: contenido directo o hash parcial (inicio y final)
+    tareas = [(orden, (ruta_completa, tamanio, algoritmo, indice))
+              for tamanio, grupo in candidatos for orden, ruta_completa, _ in grupo]
+    claves = calcular_en_paralelo(calcular_clave_contenido, tareas, hilos, mostrar_progreso)
+    
+    sin_comparar = {orden for orden, clave in claves.items() if clave is None}  # Errores de lectura
+    coincidencias_parciales = {}  # (tamaño, clave) -> [(orden, ruta)] en orden de recorrido
+    for tamanio, grupo in candidatos:
+        for orden, ruta_completa, _ in grupo:
+            if claves[orden] is not None:
+                coincidencias_parciales.setdefault((tamanio, claves[orden]), []).append((orden, ruta_completa))
+    del claves
+    
+    grupos_iguales = []
+    pendientes_completos = []
+    for (tamanio, clave), coincidencias in coincidencias_parciales.items():
+        if len(coincidencias) < 2:
+            continue  # Muestra única: no puede tener duplicados
+        if requiere_hash_completo(tamanio):
+            pendientes_completos.append(coincidencias)
+        else:
+            grupos_iguales.append(coincidencias)
+    
+    # Etapa 2: hash completo solo cuando las muestras coinciden
+    if pendientes_completos:
+        if not CONFIG['modo_verbose']:
+            print()
+        tareas = [(orden, (ruta_completa, algoritmo, indice)) for coincidencias in pendientes_completos
+                  for orden, ruta_completa in coincidencias]
+        progreso.update({'procesados': 0, 'total': len(tareas), 'etapa': f"{nombre_algoritmo} completo"})
+        hashes = calcular_en_paralelo(calcular_hash_archivo, tareas, hilos, mostrar_progreso)
+        
+        for coincidencias in pendientes_completos:
+            por_hash = {}
+            for orden, ruta_completa in coincidencias:
+                if hashes[orden]:
+                    por_hash.setdefault(hashes[orden], []).append((orden, ruta_completa))
                 else:
-                    # Hash nuevo - almacenar como referencia
-                    hashes[file_hash] = ruta_completa
+                    sin_comparar.add(orden)
+            grupos_iguales.extend(por_hash.values())
+    
+    # Elegir en cada grupo la copia a conservar: la mejor según los criterios
+    # configurados y, en empate, la primera del recorrido. Las copias de
+    # raíces autoritativas tienen preferencia y también se conservan.
+    if not CONFIG['modo_verbose'] and total_candidatos > 0:
+        print()
+    prefijos_autoritativos = tuple(os.path.join(raiz, '') for raiz in autoritativas)
+    orden_de_ruta = {ruta_completa: orden for archivos_iguales in grupos_iguales
+                     for orden, ruta_completa in archivos_iguales}
+    ordenados = ordenar_por_calidad([[ruta_completa for orden, ruta_completa in archivos_iguales]
+                                     for archivos_iguales in grupos_iguales], leer_cabeceras=False)
+    
+    for posicion, rutas_ordenadas in enumerate(ordenados):
+        archivos_iguales = [(orden_de_ruta[ruta_completa], ruta_completa) for ruta_completa in rutas_ordenadas]
+        if prefijos_autoritativos:
+            autoritativos = [archivo for archivo in archivos_iguales if archivo[1].startswith(prefijos_autoritativos)]
+            conservado = autoritativos[0] if autoritativos else archivos_iguales[0]
+            archivos_iguales = [conservado] + [archivo for archivo in archivos_iguales
+                                               if archivo not in autoritativos and archivo != conservado]
+        grupos_iguales[posicion] = archivos_iguales
+        for orden, ruta_completa in archivos_iguales[1:]:
+            if CONFIG['modo_verbose']:
+                print(f"   🔍 DUPLICADO ENCONTRADO: {os.path.basename(ruta_completa)}")
+            duplicados.append((orden, ruta_completa))
+    grupos_iguales = [archivos_iguales for archivos_iguales in grupos_iguales if len(archivos_iguales) > 1]
     
-    if not CONFIG['modo_verbose']:
-        print()  # Nueva línea después de la barra de progreso
+    estadisticas_cache = guardar_cache_hashes()
+    if estadisticas_cache and CONFIG['modo_verbose']:
+        print(f"💾 CACHE DE HASHES: {estadisticas_cache[0]} reutilizados, {estadisticas_cache[1]} calculados")
     
     if CONFIG['modo_verbose']:
         print(f"✅ BÚSQUEDA COMPLETADA: {len(duplicados)} duplicados encontrados")
     
+    # Mantener el orden del recorrido original
+    duplicados.sort()
+    
+    if indice is not None:
+        # Los archivos que quedan no tienen duplicados entre sí
+        excluidos = sin_comparar | {orden for orden, _ in duplicados}
+        indice.marcar_verificados(info_stat for grupo in grupos.values()
+                                  for orden, _, info_stat in grupo if orden not in excluidos)
+    
+    # Grupos ordenados por la posición de su archivo conservado en el recorrido
+    grupos_iguales.sort(key=lambda archivos_iguales: archivos_iguales[0][0])
+    grupos_rutas = [[ruta_completa for orden, ruta_completa in archivos_iguales] for archivos_iguales in grupos_iguales]
+    
+    return [ruta_completa for orden, ruta_completa in duplicados], grupos_rutas, total_archivos
+
+def encontrar_duplicados(ruta, indice=None, inventario=None):
+    """
+    Escanea recursivamente una carpeta buscando archivos duplicados por hash de contenido.
+    
+    Args:
+        ruta (str): Ruta de la carpeta a escanear
+        indice (IndiceIdentidad): Índice compartido entre pasos (opcional)
+        inventario (FileInventory): Inventario compartido entre pasos (opcional)
+        
+    Returns:
+        tuple: (lista_de_duplicados, total_archivos_escaneados)
+    """
+    duplicados, grupos, total_archivos = _escanear_duplicados(ruta, indice, inventario=inventario)
     return duplicados, total_archivos
 
-def mover_duplicados_a_basura(ruta, duplicados):
+def encontrar_grupos_duplicados(ruta, indice=None, inventario=None):
+    """
+    Igual que encontrar_duplicados, pero devuelve cada grupo de archivos iguales.
+    
+    Args:
+        ruta (str): Ruta de la carpeta a escanear
+        indice (IndiceIdentidad): Índice compartido entre pasos (opcional)
+        inventario (FileInventory): Inventario compartido entre pasos (opcional)
+        
+    Returns:
+        tuple: (lista de grupos [conservado, duplicado1, ...], total_archivos_escaneados)
+    """
+    duplicados, grupos, total_archivos = _escanear_duplicados(ruta, indice, inventario=inventario)
+    return grupos, total_archivos
+
+def mover_duplicados_a_basura(ruta, duplicados, inventario=None):
     """
     Mueve archivos duplicados a la carpeta 'basura' de forma segura.
     
     Args:
         ruta (str): Ruta base donde crear la carpeta basura
         duplicados (list): Lista de rutas de archivos duplicados a mover
+        inventario (FileInventory): Inventario a actualizar con los movimientos (opcional)
         
     Returns:
         int: Número de archivos movidos exitosamente
@@ -132,6 +566,8 @@ def mover_duplicados_a_basura(ruta, duplicados):
     
     carpeta_basura = os.path.join(ruta, "basura")
     os.makedirs(carpeta_basura, exist_ok=True)  # Crear carpeta si no existe
+    asignador = AsignadorNombres()  # Nombres libres en basura
+    motor = MotorMovimientos("Mover duplicados", inventario)
     
     movidos_exitosos = 0
     total_duplicados = len(duplicados)
@@ -145,16 +581,13 @@ def mover_duplicados_a_basura(ruta, duplicados):
     for i, duplicado in enumerate(duplicados, 1):
         try:
             nombre_archivo = os.path.basename(duplicado)
-            destino = os.path.join(carpeta_basura, nombre_archivo)
-            
-            # Si ya existe un archivo con ese nombre en basura, renombrar
-            contador = 1
-            while os.path.exists(destino):
-                nombre, extension = os.path.splitext(nombre_archivo)
-                destino = os.path.join(carpeta_basura, f"{nombre}_{contador}{extension}")
-                contador += 1
+            destino = asignador.asignar(carpeta_basura, nombre_archivo)
             
-            shutil.move(duplicado, destino)
+            try:
+                motor.mover(duplicado, destino)
+            except Exception:
+                asignador.liberar(destino)
+                raise
             movidos_exitosos += 1
             
             # Mostrar progreso del movimiento según el modo
@@ -172,19 +605,73 @@ def mover_duplicados_a_basura(ruta, duplicados):
     
     if total_duplicados > 0 and not CONFIG['modo_verbose']:
         print()  # Nueva línea después de la barra de progreso
+    movidos_exitosos -= motor.terminar()['fallos']
     
     if CONFIG['modo_verbose']:
         print(f"✅ MOVIMIENTO COMPLETADO: {movidos_exitosos}/{total_duplicados} archivos movidos")
     
     return movidos_exitosos
 
-def eliminar_duplicados(ruta, modo_automatico=False):
+def sustituir_duplicados_por_enlaces(grupos, resultados, inventario=None, indice=None):
+    """
+    Reemplaza los duplicados por enlaces al archivo conservado y actualiza los resultados.
+    
+    Un reflink es un inodo nuevo: su hash (el del conservado) se guarda con su
+    nueva identidad en la cache de hashes, que sigue abierta tras el escaneo,
+    para que los pasos siguientes y las próximas ejecuciones no tengan que leerlo.
+    
+    Args:
+        grupos (list): Grupos [conservado, duplicado1, ...] del escaneo
+        resultados (dict): Resultados del paso a completar
+        inventario (FileInventory): Inventario a actualizar con los nuevos inodos (opcional)
+        indice (IndiceIdentidad): Índice compartido entre pasos (opcional)
+    """
+    from main import CONFIG  # Importar configuración para modo verbose
+    
+    enlaces = enlazar_duplicados(grupos, CONFIG['modo_duplicados'])
+    algoritmo = obtener_algoritmo_configurado()
+    for grupo in grupos:
+        try:
+            digest = _buscar_hash(os.stat(grupo[0]), algoritmo, 'completo', indice)
+        except OSError:
+            digest = None
+        for duplicado in grupo[1:]:
+            if inventario is not None:
+                inventario.agregar(duplicado)
+            if not digest:
+                continue
+            try:
+                info_duplicado = os.stat(duplicado)
+            except OSError:
+                continue  # Desapareció tras enlazarlo: no hay identidad que guardar
+            _guardar_hash(info_duplicado, algoritmo, 'completo', digest, indice)
+    guardar_cache_hashes()  # Confirmar los hashes de las nuevas identidades
+    enlazados = enlaces['reflinks'] + enlaces['hardlinks']
+    espacio_mb = enlaces['bytes_recuperados'] / (1024 * 1024)
+    
+    resultados['duplicados_eliminados'] = enlazados
+    resultados['duplicados_enlazados'] = enlazados
+    resultados['espacio_liberado_mb'] = espacio_mb
+    
+    if CONFIG['modo_verbose']:
+        print(f"🔗 DUPLICADOS SUSTITUIDOS POR ENLACES: {enlazados} "
+              f"(reflinks: {enlaces['reflinks']}, enlaces duros: {enlaces['hardlinks']})")
+        print(f"   Ya enlazados previamente: {enlaces['ya_enlazados']}")
+        print(f"   Errores: {enlaces['fallos']}")
+        print(f"💾 ESPACIO LIBERADO: {espacio_mb:.2f} MB")
+    else:
+        print(f"🔗 Duplicados sustituidos por enlaces: {enlazados}")
+        print(f"💾 Espacio liberado: {espacio_mb:.2f} MB")
+
+def eliminar_duplicados(ruta, modo_automatico=False, indice=None, inventario=None):
     """
     Función principal para eliminar duplicados con opción de limpieza inmediata.
     
     Args:
         ruta (str): Ruta de la carpeta a procesar
         modo_automatico (bool): Si es True, no pregunta por eliminar carpeta basura
+        indice (IndiceIdentidad): Índice para reutilizar los hashes en pasos posteriores
+        inventario (FileInventory): Inventario compartido entre pasos (opcional)
         
     Returns:
         dict: Resultados del proceso para el estado del programa
@@ -194,7 +681,7 @@ def eliminar_duplicados(ruta, modo_automatico=False):
     if CONFIG['modo_verbose']:
         print("🚀 INICIANDO ELIMINACIÓN DE DUPLICADOS...")
     
-    duplicados, total_archivos = encontrar_duplicados(ruta)
+    duplicados, grupos, total_archivos = _escanear_duplicados(ruta, indice, inventario=inventario)
     
     if CONFIG['modo_verbose']:
         print(f"📊 RESULTADOS DEL ESCANEO:")
@@ -211,8 +698,10 @@ def eliminar_duplicados(ruta, modo_automatico=False):
         'carpeta_basura_eliminada': False
     }
     
-    if duplicados:
-        movidos = mover_duplicados_a_basura(ruta, duplicados)
+    if duplicados and CONFIG['modo_duplicados'] in MODOS_ENLACE:
+        sustituir_duplicados_por_enlaces(grupos, resultados, inventario, indice)
+    elif duplicados:
+        movidos = mover_duplicados_a_basura(ruta, duplicados, inventario)
         resultados['duplicados_eliminados'] = movidos
         
         if CONFIG['modo_verbose']:
@@ -229,7 +718,10 @@ def eliminar_duplicados(ruta, modo_automatico=False):
                 respuesta = input("¿Deseas eliminar la carpeta 'basura' ahora? (s/n): ").strip().lower()
                 if respuesta in ('s', 'si', 'sí', 'y', 'yes'):
                     try:
+                        registrar_operacion('eliminar', ruta=os.path.abspath(carpeta_basura))
                         shutil.rmtree(carpeta_basura)
+                        if inventario is not None:
+                            inventario.eliminar_carpeta(carpeta_basura)
                         print("✅ Carpeta 'basura' eliminada exitosamente")
                         resultados['carpeta_basura_eliminada'] = True
                     except Exception as e:
@@ -247,13 +739,18 @@ def eliminar_duplicados(ruta, modo_automatico=False):
     
     return resultados
 
-def verificar_duplicados(ruta, modo_automatico=False):
+def verificar_duplicados(ruta, modo_automatico=False, indice=None, inventario=None):
     """
     Verificación rápida de duplicados, ideal para usar antes del preprocesamiento.
     
+    Si recibe el índice del primer escaneo, solo compara los archivos nuevos o
+    modificados desde entonces (por ejemplo, los resultados de conversiones).
+    
     Args:
         ruta (str): Ruta de la carpeta a verificar
         modo_automatico (bool): Si es True, no pregunta por eliminar carpeta basura
+        indice (IndiceIdentidad): Índice del escaneo anterior de esta ejecución
+        inventario (FileInventory): Inventario compartido entre pasos (opcional)
         
     Returns:
         dict: Resultados de la verificación para el estado del programa
@@ -265,7 +762,7 @@ def verificar_duplicados(ruta, modo_automatico=False):
     else:
         print("🔍 Verificación rápida de duplicados...")
         
-    duplicados, total_archivos = encontrar_duplicados(ruta)
+    duplicados, grupos, total_archivos = _escanear_duplicados(ruta, indice, inventario=inventario)
     
     if CONFIG['modo_verbose']:
         print(f"📊 RESULTADOS DE LA VERIFICACIÓN:")
@@ -282,8 +779,10 @@ def verificar_duplicados(ruta, modo_automatico=False):
         'carpeta_basura_eliminada': False
     }
     
-    if duplicados:
-        movidos = mover_duplicados_a_basura(ruta, duplicados)
+    if duplicados and CONFIG['modo_duplicados'] in MODOS_ENLACE:
+        sustituir_duplicados_por_enlaces(grupos, resultados, inventario, indice)
+    elif duplicados:
+        movidos = mover_duplicados_a_basura(ruta, duplicados, inventario)
         resultados['duplicados_eliminados'] = movidos
         
         if CONFIG['modo_verbose']:
@@ -299,7 +798,10 @@ def verificar_duplicados(ruta, modo_automatico=False):
                 respuesta = input("¿Deseas eliminar la carpeta 'basura' ahora? (s/n): ").strip().lower()
                 if respuesta in ('s', 'si', 'sí', 'y', 'yes'):
                     try:
+                        registrar_operacion('eliminar', ruta=os.path.abspath(carpeta_basura))
                         shutil.rmtree(carpeta_basura)
+                        if inventario is not None:
+                            inventario.eliminar_carpeta(carpeta_basura)
                         print("✅ Carpeta 'basura' eliminada exitosamente")
                         resultados['carpeta_basura_eliminada'] = True
                     except Exception as e:
@@ -315,4 +817,102 @@ def verificar_duplicados(ruta, modo_automatico=False):
     if CONFIG['modo_verbose']:
         print("✅ VERIFICACIÓN DE DUPLICADOS COMPLETADA")
     
-    return resultados
\ No newline at end of file
+    return resultados
+
+def eliminar_duplicados_multiples(rutas, autoritativas=(), modo_automatico=False, indice=None, inventario=None):
+    """
+    Elimina duplicados repartidos entre varias carpetas raíz en un único escaneo.
+    
+    Todas las raíces comparten el mismo índice y la misma cache de hashes, así
+    que cada archivo se lee una sola vez aunque las carpetas se solapen. Las
+    copias que están en raíces autoritativas se conservan siempre, y cada
+    duplicado se mueve a la carpeta 'basura' de su propia raíz para no copiar
+    datos entre discos.
+    
+    Args:
+        rutas (list): Carpetas raíz a comparar entre sí
+        autoritativas (list): Carpetas cuyas copias se conservan siempre
+        modo_automatico (bool): Si es True, no pregunta por eliminar las carpetas basura
+        indice (IndiceIdentidad): Índice compartido entre pasos (opcional)
+        inventario (FileInventory): Inventario de una de las raíces a mantener al día (opcional)
+        
+    Returns:
+        dict: Resultados del proceso para el estado del programa
+    """
+    from main import CONFIG  # Importar configuración para modo verbose
+    
+    if CONFIG['modo_verbose']:
+        print("🚀 INICIANDO ELIMINACIÓN DE DUPLICADOS ENTRE VARIAS CARPETAS...")
+    
+    raices, autoritativas = preparar_raices(rutas, autoritativas)
+    duplicados, grupos, total_archivos = _escanear_duplicados(raices, indice, autoritativas, inventario)
+    
+    if CONFIG['modo_verbose']:
+        print(f"📊 RESULTADOS DEL ESCANEO:")
+        print(f"   Carpetas comparadas: {len(raices)}")
+        print(f"   Total de archivos escaneados: {total_archivos}")
+        print(f"   Archivos duplicados encontrados: {len(duplicados)}")
+    else:
+        print(f"📊 Total de archivos escaneados en {len(raices)} carpetas: {total_archivos}")
+        print(f"🔍 Archivos duplicados encontrados: {len(duplicados)}")
+    
+    resultados = {
+        'total_archivos': total_archivos,
+        'duplicados_encontrados': len(duplicados),
+        'duplicados_eliminados': 0,
+        'carpeta_basura_eliminada': False
+    }
+    
+    if duplicados and CONFIG['modo_duplicados'] in MODOS_ENLACE:
+        sustituir_duplicados_por_enlaces(grupos, resultados, inventario, indice)
+    elif duplicados:
+        # Cada duplicado va a la basura de la raíz que lo contiene
+        por_raiz = {}
+        for duplicado in duplicados:
+            por_raiz.setdefault(raiz_de_archivo(duplicado, raices), []).append(duplicado)
+        
+        movidos = 0
+        for raiz, duplicados_raiz in por_raiz.items():
+            if CONFIG['modo_verbose']:
+                print(f"📁 {raiz}: {len(duplicados_raiz)} duplicados")
+            movidos += mover_duplicados_a_basura(raiz, duplicados_raiz, inventario)
+        resultados['duplicados_eliminados'] = movidos
+        
+        if CONFIG['modo_verbose']:
+            print(f"🗑️  ARCHIVOS MOVIDOS A BASURA: {movidos}")
+        else:
+            print(f"🗑️  Archivos movidos a basura: {movidos}")
+        
+        # Solo preguntar si eliminar las carpetas basura en modo personalizado
+        if not modo_automatico:
+            carpetas_basura = [os.path.join(raiz, "basura") for raiz in por_raiz
+                               if os.path.exists(os.path.join(raiz, "basura"))]
+            if carpetas_basura:
+                print(f"\n📦 Carpetas 'basura' con {movidos} archivos duplicados:")
+                for carpeta_basura in carpetas_basura:
+                    print(f"   {carpeta_basura}")
+                print("Se recomienda que se revisen antes de borrarlas.")
+                respuesta = input("¿Deseas eliminar las carpetas 'basura' ahora? (s/n): ").strip().lower()
+                if respuesta in ('s', 'si', 'sí', 'y', 'yes'):
+                    try:
+                        for carpeta_basura in carpetas_basura:
+                            registrar_operacion('eliminar', ruta=os.path.abspath(carpeta_basura))
+                            shutil.rmtree(carpeta_basura)
+                            if inventario is not None:
+                                inventario.eliminar_carpeta(carpeta_basura)
+                        print("✅ Carpetas 'basura' eliminadas exitosamente")
+                        resultados['carpeta_basura_eliminada'] = True
+                    except Exception as e:
+                        print(f"❌ Error al eliminar carpeta 'basura': {e}")
+                else:
+                    print("✅ Carpetas 'basura' conservadas")
+    else:
+        if CONFIG['modo_verbose']:
+            print("✅ NO SE ENCONTRARON ARCHIVOS DUPLICADOS")
+        else:
+            print("✅ No se encontraron archivos duplicados.")
+    
+    if CONFIG['modo_verbose']:
+        print("✅ PROCESO DE ELIMINACIÓN DE DUPLICADOS COMPLETADO")
+    
+    return resultados
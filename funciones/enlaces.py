@@ -0,0 +1,235 @@
+"""
+MÓDULO DE DEDUPLICACIÓN POR ENLACES
+En lugar de mover los duplicados a 'basura', los sustituye en su sitio por un
+enlace al archivo conservado: un reflink (copia con copy-on-write mediante el
+ioctl FICLONE, en Btrfs, XFS...) o un enlace duro. Las rutas siguen
+funcionando y el espacio se recupera al momento sin copiar datos.
+"""
+
+import os
+import struct
+
+from .diario import registrar_operacion
+
+try:
+    import fcntl  # Solo disponible en sistemas Unix
+except ImportError:
+    fcntl = None
+
+FICLONE = 0x40049409  # _IOW(0x94, 9, int) en Linux
+FS_IOC_FIEMAP = 0xC020660B  # _IOWR('f', 11, struct fiemap) en Linux
+FIEMAP_FLAG_SYNC = 0x1
+FIEMAP_EXTENT_LAST = 0x1
+FIEMAP_EXTENT_SHARED = 0x2000
+CABECERA_FIEMAP = struct.Struct('=QQIIII')  # fm_start, fm_length, fm_flags, fm_mapped_extents, fm_extent_count, reservado
+EXTENSION_FIEMAP = struct.Struct('=QQQQQI12x')  # fe_logical, fe_physical, fe_length, reservado x2, fe_flags
+EXTENSIONES_POR_CONSULTA = 64
+MAX_EXTENSIONES_COMPARADAS = 4096  # Archivos más fragmentados se tratan como no enlazados
+TAMANIO_BLOQUE_COMPARACION = 1024 * 1024
+MODOS_ENLACE = ('enlace', 'hardlink', 'reflink')
+
+def son_identicos(ruta_a, ruta_b, tamanio_bloque=TAMANIO_BLOQUE_COMPARACION):
+    """
+    Compara dos archivos byte a byte.
+
+    Args:
+        ruta_a (str): Primer archivo
+        ruta_b (str): Segundo archivo
+        tamanio_bloque (int): Bytes comparados en cada lectura
+
+    Returns:
+        bool: True si el contenido es exactamente igual
+    """
+    if os.path.getsize(ruta_a) != os.path.getsize(ruta_b):
+        return False
+
+    with open(ruta_a, 'rb') as archivo_a, open(ruta_b, 'rb') as archivo_b:
+        while True:
+            bloque_a = archivo_a.read(tamanio_bloque)
+            if bloque_a != archivo_b.read(tamanio_bloque):
+                return False
+            if not bloque_a:
+                return True
+
+def crear_reflink(origen, destino):
+    """
+    Crea 'destino' como clon copy-on-write de 'origen' (comparten bloques en disco).
+
+    Raises:
+        OSError: Si el sistema de archivos o el sistema operativo no admite reflinks
+    """
+    if fcntl is None:
+        raise OSError("reflink no disponible en este sistema operativo")
+
+    with open(origen, 'rb') as archivo_origen:
+        try:
+            with open(destino, 'wb') as archivo_destino:
+                fcntl.ioctl(archivo_destino.fileno(), FICLONE, archivo_origen.fileno())
+        except OSError:
+            if os.path.exists(destino):
+                os.remove(destino)
+            raise
+
+def _leer_extensiones(ruta):
+    """
+    Devuelve los bloques físicos de un archivo con el ioctl FIEMAP.
+
+    Returns:
+        list or None: (inicio lógico, inicio físico, longitud, compartida) de cada
+            extensión; None si el sistema no lo admite o el archivo está muy fragmentado
+    """
+    if fcntl is None:
+        return None
+
+    extensiones = []
+    inicio = 0
+    with open(ruta, 'rb') as archivo:
+        while len(extensiones) < MAX_EXTENSIONES_COMPARADAS:
+            buffer = bytearray(CABECERA_FIEMAP.size + EXTENSION_FIEMAP.size * EXTENSIONES_POR_CONSULTA)
+            CABECERA_FIEMAP.pack_into(buffer, 0, inicio, 0xFFFFFFFFFFFFFFFF - inicio, FIEMAP_FLAG_SYNC,
+                                      0, EXTENSIONES_POR_CONSULTA, 0)
+            try:
+                fcntl.ioctl(archivo.fileno(), FS_IOC_FIEMAP, buffer, True)
+            except OSError:
+                return None
+            mapeadas = CABECERA_FIEMAP.unpack_from(buffer, 0)[3]
+            if mapeadas == 0:
+                return extensiones
+            for i in range(mapeadas):
+                logico, fisico, longitud, _, _, banderas = EXTENSION_FIEMAP.unpack_from(
+                    buffer, CABECERA_FIEMAP.size + i * EXTENSION_FIEMAP.size)
+                extensiones.append((logico, fisico, longitud, bool(banderas & FIEMAP_EXTENT_SHARED)))
+                if banderas & FIEMAP_EXTENT_LAST:
+                    return extensiones
+            inicio = logico + longitud
+    return None
+
+def comparten_bloques(ruta_a, ruta_b):
+    """
+    Indica si dos archivos son reflinks el uno del otro (ocupan los mismos bloques en disco).
+
+    Un reflink tiene su propio inodo, así que no se distingue de una copia
+    por st_ino; se comparan sus extensiones físicas con FIEMAP.
+
+    Returns:
+        bool: True si todas sus extensiones coinciden y están marcadas como compartidas
+    """
+    extensiones_a = _leer_extensiones(ruta_a)
+    if not extensiones_a or not all(compartida for _, _, _, compartida in extensiones_a):
+        return False
+    return extensiones_a == _leer_extensiones(ruta_b)
+
+def enlazar_duplicado(original, duplicado, modo='enlace'):
+    """
+    Sustituye un duplicado por un enlace al archivo original tras verificar su contenido.
+
+    El enlace se crea primero con un nombre temporal en la misma carpeta y
+    luego reemplaza al duplicado con os.replace, así que el duplicado nunca
+    queda a medias si algo falla.
+
+    Args:
+        original (str): Archivo que se conserva
+        duplicado (str): Archivo a sustituir por el enlace
+        modo (str): 'reflink', 'hardlink' o 'enlace' (reflink si se puede, si no hardlink)
+
+    Returns:
+        str or None: Tipo de enlace creado ('reflink' o 'hardlink'), None si ya estaban
+            enlazados (mismo inodo o mismos bloques en disco)
+
+    Raises:
+        OSError: Si están en sistemas de archivos distintos o no se pudo enlazar
+        ValueError: Si el contenido no es idéntico
+    """
+    info_original = os.stat(original)
+    info_duplicado = os.stat(duplicado)
+
+    if (info_original.st_dev, info_original.st_ino) == (info_duplicado.st_dev, info_duplicado.st_ino):
+        return None  # Ya son el mismo archivo
+    if info_original.st_dev != info_duplicado.st_dev:
+        raise OSError("los archivos están en sistemas de archivos distintos")
+    if comparten_bloques(original, duplicado):
+        return None  # Reflink de una ejecución anterior: ya no ocupan espacio extra
+    if not son_identicos(original, duplicado):
+        raise ValueError("el contenido no es idéntico byte a byte")
+
+    carpeta, nombre = os.path.split(duplicado)
+    temporal = os.path.join(carpeta, f".{nombre}.orgest_tmp")
+
+    tipo = None
+    if modo in ('reflink', 'enlace'):
+        try:
+            crear_reflink(original, temporal)
+            tipo = 'reflink'
+        except OSError:
+            if modo == 'reflink':
+                raise
+    if tipo is None:
+        os.link(original, temporal)
+        tipo = 'hardlink'
+
+    try:
+        if tipo == 'reflink':
+            # El clon es un archivo nuevo: conservar permisos y fechas del duplicado
+            os.chmod(temporal, info_duplicado.st_mode & 0o7777)
+            os.utime(temporal, ns=(info_duplicado.st_atime_ns, info_duplicado.st_mtime_ns))
+        os.replace(temporal, duplicado)
+    except OSError:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        raise
+
+    return tipo
+
+def enlazar_duplicados(grupos, modo='enlace'):
+    """
+    Sustituye por enlaces todos los duplicados de cada grupo.
+
+    Args:
+        grupos (list): Lista de grupos [original, duplicado1, duplicado2, ...]
+        modo (str): 'reflink', 'hardlink' o 'enlace'
+
+    Returns:
+        dict: Contadores de enlaces creados, fallos y espacio recuperado
+    """
+    from main import CONFIG  # Importar configuración para modo verbose
+
+    resultados = {'reflinks': 0, 'hardlinks': 0, 'ya_enlazados': 0, 'fallos': 0, 'bytes_recuperados': 0}
+    total_duplicados = sum(len(grupo) - 1 for grupo in grupos)
+    procesados = 0
+
+    if total_duplicados > 0:
+        if CONFIG['modo_verbose']:
+            print(f"🔗 SUSTITUYENDO {total_duplicados} DUPLICADOS POR ENLACES ({modo.upper()})...")
+        else:
+            print(f"🔗 Sustituyendo {total_duplicados} duplicados por enlaces...")
+
+    for grupo in grupos:
+        original = grupo[0]
+        for duplicado in grupo[1:]:
+            procesados += 1
+            nombre_archivo = os.path.basename(duplicado)
+            try:
+                tamanio = os.path.getsize(duplicado)
+                registrar_operacion('enlazar', original=os.path.abspath(original), ruta=os.path.abspath(duplicado))
+                tipo = enlazar_duplicado(original, duplicado, modo)
+                if tipo is None:
+                    resultados['ya_enlazados'] += 1
+                else:
+                    resultados[tipo + 's'] += 1
+                    resultados['bytes_recuperados'] += tamanio
+                    if CONFIG['modo_verbose']:
+                        print(f"   🔗 {tipo}: {nombre_archivo} → {os.path.basename(original)}")
+            except (OSError, ValueError) as e:
+                resultados['fallos'] += 1
+                if CONFIG['modo_verbose']:
+                    print(f"   ❌ ERROR enlazando {nombre_archivo}: {e}")
+                else:
+                    print(f"❌ Error al enlazar {nombre_archivo}: {e}")
+
+            if not CONFIG['modo_verbose'] and (procesados % 5 == 0 or procesados == total_duplicados):
+                print(f"🔗 Progreso: {procesados}/{total_duplicados} duplicados enlazados", end='\r')
+
+    if total_duplicados > 0 and not CONFIG['modo_verbose']:
+        print()  # Nueva línea después de la barra de progreso
+
+    return resultados
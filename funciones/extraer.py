@@ -1,16 +1,36 @@
 import os
-import shutil
 
-def contar_archivos_a_extraer(ruta):
-    """Cuenta el total de archivos que serán extraídos"""
+from .diario import registrar_operacion
+from .movimientos import MotorMovimientos
+from .nombres import AsignadorNombres
+from .progreso import Progreso
+
+CARPETAS_POR_FECHA = ("Imagenes", "Videos")
+
+def se_conserva(root, ruta):
+    """
+    Indica si los archivos de una carpeta se quedan donde están al extraer.
+
+    Se conservan la raíz, la carpeta basura y, con CONFIG['carpetas_por_fecha'],
+    las carpetas Imagenes/AAAA/MM y Videos/AAAA/MM creadas al ordenar.
+    """
+    from main import CONFIG  # Importar configuración
+    
+    if root == ruta or "basura" in root:
+        return True
+    return CONFIG['carpetas_por_fecha'] and os.path.relpath(root, ruta).split(os.sep)[0] in CARPETAS_POR_FECHA
+
+def contar_archivos_a_extraer(ruta, inventario=None):
+    """Cuenta el total de archivos que serán extraídos (desde el inventario si se recibe uno)"""
     from main import CONFIG  # Importar configuración para modo verbose
     
     total_archivos = 0
     if CONFIG['modo_verbose']:
         print("🔍 CONTANDO ARCHIVOS A EXTRAER...")
     
-    for root, dirs, files in os.walk(ruta):
-        if root == ruta or "basura" in root:
+    recorrido = inventario.recorrer(ruta) if inventario is not None else os.walk(ruta)
+    for root, dirs, files in recorrido:
+        if se_conserva(root, ruta):
             continue
         total_archivos += len(files)
         if CONFIG['modo_verbose']:
@@ -21,8 +41,14 @@ def contar_archivos_a_extraer(ruta):
     
     return total_archivos
 
-def extraer_archivos_de_carpetas(ruta):
-    """Saca todos los archivos de las subcarpetas (excepto basura) a la raíz"""
+def extraer_archivos_de_carpetas(ruta, inventario=None):
+    """
+    Saca todos los archivos de las subcarpetas (excepto basura) a la raíz.
+    
+    Con el inventario de un paso anterior el total se conoce de antemano; sin
+    él, la extracción empieza de inmediato y el total se estima durante el
+    recorrido, sin una pasada previa para contar.
+    """
     from main import CONFIG  # Importar configuración para modo verbose
     
     if CONFIG['modo_verbose']:
@@ -35,26 +61,27 @@ def extraer_archivos_de_carpetas(ruta):
     archivos_extraidos = 0
     carpetas_procesadas = 0
     
-    # Primero contar el total de archivos para el progreso
-    if CONFIG['modo_verbose']:
-        print("📊 CONTANDO ARCHIVOS...")
-    else:
-        print("📊 Contando archivos a extraer...")
-        
-    total_archivos = contar_archivos_a_extraer(ruta)
-    
-    if CONFIG['modo_verbose']:
-        print(f"📊 TOTAL DE ARCHIVOS A EXTRAER: {total_archivos}")
+    if inventario is not None:
+        # Total conocido sin tocar el disco
+        total_archivos = contar_archivos_a_extraer(ruta, inventario)
+        recorrido = inventario.recorrer(ruta)
+        if not CONFIG['modo_verbose']:
+            print(f"📁 Total de archivos a extraer: {total_archivos}")
     else:
-        print(f"📁 Total de archivos a extraer: {total_archivos}")
+        total_archivos = None  # Se estima durante el recorrido
+        recorrido = os.walk(ruta)
     
     print()
     
-    archivos_procesados = 0
+    progreso = Progreso("📦 Progreso: {actual}/{total} archivos extraídos", total_archivos, cada=5)
+    asignador = AsignadorNombres()  # Nombres libres en la raíz sin comprobar el disco en bucle
+    motor = MotorMovimientos("Extraer", inventario)
     
-    for root, dirs, files in os.walk(ruta):
-        # Ignorar la carpeta basura y la raíz principal
-        if root == ruta or "basura" in root:
+    for root, dirs, files in recorrido:
+        # Ignorar la carpeta basura, la raíz principal y las carpetas por fecha
+        omitida = se_conserva(root, ruta)
+        progreso.carpeta_visitada(len(files), len(dirs), contar=not omitida)
+        if omitida:
             continue
             
         carpetas_procesadas += 1
@@ -64,28 +91,25 @@ def extraer_archivos_de_carpetas(ruta):
             print(f"📂 PROCESANDO CARPETA: {os.path.basename(root)}")
         
         for archivo in files:
-            archivos_procesados += 1
             ruta_completa = os.path.join(root, archivo)
             
             # Mostrar progreso según el modo
             if CONFIG['modo_verbose']:
                 print(f"   📄 Extrayendo: {archivo}")
             else:
-                if archivos_procesados % 5 == 0 or archivos_procesados == total_archivos:
-                    print(f"📦 Progreso: {archivos_procesados}/{total_archivos} archivos extraídos", end='\r')
+                progreso.avanzar()
             
             try:
                 destino = os.path.join(ruta, archivo)
                 
                 # Si ya existe en destino, renombrar
-                contador = 1
-                nombre_base, extension = os.path.splitext(archivo)
-                destino_temp = destino
-                while os.path.exists(destino_temp):
-                    destino_temp = os.path.join(ruta, f"{nombre_base}_{contador}{extension}")
-                    contador += 1
+                destino_temp = asignador.asignar(ruta, archivo)
                 
-                shutil.move(ruta_completa, destino_temp)
+                try:
+                    motor.mover(ruta_completa, destino_temp)
+                except Exception:
+                    asignador.liberar(destino_temp)
+                    raise
                 archivos_extraidos += 1
                 archivos_en_carpeta += 1
                 
@@ -105,7 +129,13 @@ def extraer_archivos_de_carpetas(ruta):
             print(f"   📊 Carpeta {os.path.basename(root)}: {archivos_en_carpeta} archivos extraídos")
     
     if not CONFIG['modo_verbose']:
-        print()  # Nueva línea después de la barra de progreso
+        progreso.terminar()
+    # Las carpetas solo quedan vacías cuando terminan las copias entre discos
+    archivos_extraidos -= motor.terminar()['fallos']
+    total_archivos = progreso.total  # Exacto una vez terminado el recorrido
+    
+    if CONFIG['modo_verbose'] and inventario is None:
+        print(f"📊 TOTAL DE ARCHIVOS RECORRIDOS: {total_archivos}")
     
     # Eliminar carpetas vacías (excepto basura)
     if CONFIG['modo_verbose']:
@@ -116,11 +146,21 @@ def extraer_archivos_de_carpetas(ruta):
     carpetas_eliminadas = 0
     carpetas_vacias_encontradas = 0
     
-    for root, dirs, files in os.walk(ruta, topdown=False):
-        if root != ruta and root != carpeta_basura and not os.listdir(root):
+    if inventario is not None:
+        recorrido = inventario.recorrer(ruta, topdown=False)
+        esta_vacia = inventario.esta_vacia
+    else:
+        recorrido = os.walk(ruta, topdown=False)
+        esta_vacia = lambda carpeta: not os.listdir(carpeta)
+    
+    for root, dirs, files in recorrido:
+        if root != ruta and root != carpeta_basura and esta_vacia(root):
             carpetas_vacias_encontradas += 1
             try:
+                registrar_operacion('eliminar_carpeta', ruta=os.path.abspath(root))
                 os.rmdir(root)
+                if inventario is not None:
+                    inventario.eliminar_carpeta(root)
                 carpetas_eliminadas += 1
                 if CONFIG['modo_verbose']:
                     print(f"   🗑️  Eliminada carpeta vacía: {os.path.basename(root)}")
@@ -145,13 +185,14 @@ def extraer_archivos_de_carpetas(ruta):
         'total_archivos': total_archivos
     }
 
-def extraer_archivos_raiz(ruta, modo_automatico=False):
+def extraer_archivos_raiz(ruta, modo_automatico=False, inventario=None):
     """
     Función principal para extraer archivos a la raíz.
     
     Args:
         ruta (str): Ruta de la carpeta a procesar
         modo_automatico (bool): Si es True, salta las confirmaciones
+        inventario (FileInventory): Inventario compartido entre pasos (opcional)
         
     Returns:
         dict: Resultados de la extracción para el estado del programa
@@ -176,7 +217,7 @@ def extraer_archivos_raiz(ruta, modo_automatico=False):
         else:
             print("📤 Ejecutando extracción automáticamente...")
     
-    resultados_extraccion = extraer_archivos_de_carpetas(ruta)
+    resultados_extraccion = extraer_archivos_de_carpetas(ruta, inventario)
     
     # Mostrar resumen según el modo
     if CONFIG['modo_verbose']:
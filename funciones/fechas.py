@@ -0,0 +1,118 @@
+"""
+MÓDULO DE FECHAS DE ARCHIVOS
+Obtiene el año y el mes de cada foto o video para repartirlos en carpetas
+Imagenes/AAAA/MM y Videos/AAAA/MM. En las imágenes se usa la fecha EXIF en
+que se tomó la foto (Pillow solo lee la cabecera, sin decodificar píxeles);
+si no la tienen, y en los videos, se usa la fecha de modificación.
+"""
+
+import os
+import time
+
+EXIF_IFD = 0x8769  # Sub-IFD con los datos de la cámara
+ETIQUETA_FECHA_ORIGINAL = 36867  # DateTimeOriginal
+ETIQUETA_FECHA_DIGITALIZADA = 36868  # DateTimeDigitized
+ETIQUETA_FECHA = 306  # DateTime (fecha de la última edición)
+
+def interpretar_fecha_exif(valor):
+    """
+    Convierte una fecha EXIF ('AAAA:MM:DD HH:MM:SS') en (año, mes).
+
+    Returns:
+        tuple or None: (año, mes), None si está vacía o no es válida ('0000:00:00...')
+    """
+    if isinstance(valor, bytes):
+        valor = valor.decode('ascii', 'ignore')
+    try:
+        anio, mes = int(str(valor)[0:4]), int(str(valor)[5:7])
+    except (TypeError, ValueError):
+        return None
+    if anio < 1900 or not 1 <= mes <= 12:
+        return None
+    return anio, mes
+
+def leer_fecha_exif(ruta_imagen):
+    """
+    Lee la fecha en que se tomó una foto desde su EXIF, sin decodificar la imagen.
+
+    Args:
+        ruta_imagen (str): Ruta completa a la imagen
+
+    Returns:
+        tuple or None: (año, mes), None si no tiene fecha EXIF o Pillow no está instalado
+    """
+    try:
+        from PIL import Image
+    except ImportError:
+        return None
+
+    try:
+        with Image.open(ruta_imagen) as img:
+            if not hasattr(img, 'getexif'):
+                return None
+            exif = img.getexif()
+            valores = []
+            if hasattr(exif, 'get_ifd'):
+                datos_camara = exif.get_ifd(EXIF_IFD)
+                valores.extend((datos_camara.get(ETIQUETA_FECHA_ORIGINAL),
+                                datos_camara.get(ETIQUETA_FECHA_DIGITALIZADA)))
+            valores.append(exif.get(ETIQUETA_FECHA))
+    except Exception:
+        return None
+
+    for valor in valores:
+        fecha = interpretar_fecha_exif(valor) if valor else None
+        if fecha:
+            return fecha
+    return None
+
+def fecha_de_archivo(ruta_archivo, tipo=None, info_stat=None):
+    """
+    Devuelve el año y el mes de un archivo: EXIF en imágenes, si no su fecha de modificación.
+
+    Args:
+        ruta_archivo (str): Ruta completa al archivo
+        tipo (str): 'imagen', 'video' o None (solo se busca EXIF en imágenes)
+        info_stat (os.stat_result): Metadatos ya conocidos, para no volver a leerlos
+
+    Returns:
+        tuple or None: (año, mes), None si no se pudo obtener ninguna fecha
+    """
+    if tipo == 'imagen':
+        fecha = leer_fecha_exif(ruta_archivo)
+        if fecha:
+            return fecha
+
+    try:
+        if info_stat is None:
+            info_stat = os.stat(ruta_archivo)
+        fecha_local = time.localtime(info_stat.st_mtime)
+    except (OSError, ValueError, OverflowError):
+        return None
+    return fecha_local.tm_year, fecha_local.tm_mon
+
+def fechas_de_archivos(rutas, tipos, stats=None, ejecutor=None):
+    """
+    Obtiene la fecha de varios archivos leyendo sus cabeceras en paralelo.
+
+    Args:
+        rutas (list): Rutas completas de los archivos
+        tipos (list): Tipo de cada archivo ('imagen', 'video'...)
+        stats (list): Metadatos ya conocidos de cada archivo (opcional)
+        ejecutor (ThreadPoolExecutor): Grupo de hilos a reutilizar (opcional)
+
+    Returns:
+        list: (año, mes) o None por archivo, en el mismo orden que 'rutas'
+    """
+    if stats is None:
+        stats = [None] * len(rutas)
+    if ejecutor is None or len(rutas) <= 1:
+        return [fecha_de_archivo(*datos) for datos in zip(rutas, tipos, stats)]
+    return list(ejecutor.map(fecha_de_archivo, rutas, tipos, stats))
+
+def carpeta_por_fecha(carpeta_base, fecha):
+    """Devuelve la subcarpeta AAAA/MM de 'carpeta_base' ('sin_fecha' si no se conoce)"""
+    if fecha is None:
+        return os.path.join(carpeta_base, "sin_fecha")
+    anio, mes = fecha
+    return os.path.join(carpeta_base, f"{anio:04d}", f"{mes:02d}")
@@ -0,0 +1,152 @@
+"""
+MÓDULO DE ALGORITMOS DE HASH
+Permite elegir el algoritmo usado para comparar contenido de archivos.
+Usa xxHash si está instalado (muy rápido, no criptográfico) y si no,
+los algoritmos de hashlib de la biblioteca estándar.
+"""
+
+import hashlib
+import mmap
+
+try:
+    import xxhash  # Opcional: pip install xxhash
+except ImportError:
+    xxhash = None
+
+# Algoritmos de la biblioteca estándar, siempre disponibles
+ALGORITMOS_STDLIB = ('md5', 'sha1', 'sha256', 'blake2b')
+# Algoritmos de xxHash, solo si el paquete está instalado
+ALGORITMOS_XXHASH = ('xxh3_128', 'xxh64')
+# Algoritmo usado con 'auto' cuando xxHash no está disponible
+ALGORITMO_RESPALDO = 'blake2b'
+# Tamaño de bloque por defecto para leer archivos al calcular hashes
+TAMANIO_BLOQUE_DEFECTO = 1024 * 1024
+
+def algoritmos_disponibles():
+    """
+    Lista los algoritmos de hash que se pueden usar en esta máquina.
+
+    Returns:
+        list: Nombres de algoritmos disponibles
+    """
+    disponibles = list(ALGORITMOS_STDLIB)
+    if xxhash is not None:
+        disponibles.extend(ALGORITMOS_XXHASH)
+    return disponibles
+
+def resolver_algoritmo(nombre):
+    """
+    Traduce el nombre configurado a un algoritmo concreto disponible.
+
+    Args:
+        nombre (str): Nombre del algoritmo o 'auto'
+
+    Returns:
+        str: Nombre del algoritmo a usar
+
+    Raises:
+        ValueError: Si el algoritmo no existe o su paquete no está instalado
+    """
+    nombre = (nombre or 'auto').lower()
+
+    if nombre == 'auto':
+        return ALGORITMOS_XXHASH[0] if xxhash is not None else ALGORITMO_RESPALDO
+
+    if nombre not in algoritmos_disponibles():
+        if nombre in ALGORITMOS_XXHASH:
+            raise ValueError(f"El algoritmo '{nombre}' requiere el paquete xxhash (pip install xxhash)")
+        raise ValueError(f"Algoritmo de hash desconocido: '{nombre}'. Disponibles: {', '.join(algoritmos_disponibles())}")
+
+    return nombre
+
+def crear_hasher(algoritmo):
+    """
+    Crea un objeto hasher con la interfaz de hashlib (update/hexdigest).
+
+    Args:
+        algoritmo (str): Nombre de un algoritmo ya resuelto
+
+    Returns:
+        object: Hasher listo para recibir datos
+    """
+    if algoritmo in ALGORITMOS_XXHASH:
+        return getattr(xxhash, algoritmo)()
+    return hashlib.new(algoritmo)
+
+def obtener_algoritmo_configurado():
+    """
+    Devuelve el algoritmo elegido en CONFIG['algoritmo_hash'].
+
+    Si el algoritmo configurado no está disponible se avisa y se usa el
+    algoritmo automático.
+
+    Returns:
+        str: Nombre del algoritmo a usar
+    """
+    from main import CONFIG  # Importar configuración
+
+    try:
+        return resolver_algoritmo(CONFIG['algoritmo_hash'])
+    except ValueError as e:
+        print(f"⚠️  {e}. Se usará '{resolver_algoritmo('auto')}'.")
+        CONFIG['algoritmo_hash'] = 'auto'
+        return resolver_algoritmo('auto')
+
+def actualizar_hasher_desde_archivo(hasher, archivo, tamanio_bloque=TAMANIO_BLOQUE_DEFECTO, usar_mmap=False):
+    """
+    Pasa todo el contenido de un archivo abierto al hasher sin crear objetos por bloque.
+
+    Lee sobre un único búfer reservado de antemano con readinto() y entrega al
+    hasher una vista (memoryview) de la parte leída, en lugar de crear un objeto
+    bytes nuevo en cada lectura. Con usar_mmap se mapea el archivo en memoria y
+    se pasa al hasher por bloques directamente desde el mapeo.
+
+    Args:
+        hasher (object): Hasher con método update()
+        archivo (file): Archivo abierto en modo binario ('rb')
+        tamanio_bloque (int): Bytes por lectura
+        usar_mmap (bool): Si es True intenta leer mediante mmap
+
+    Returns:
+        int: Bytes procesados
+    """
+    if usar_mmap:
+        try:
+            mapeo = mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError):
+            mapeo = None  # Archivo vacío o sistema de archivos sin soporte: leer normal
+        if mapeo is not None:
+            with mapeo:
+                vista = memoryview(mapeo)
+                try:
+                    for inicio in range(0, len(mapeo), tamanio_bloque):
+                        hasher.update(vista[inicio:inicio + tamanio_bloque])
+                finally:
+                    vista.release()
+                return len(mapeo)
+
+    bufer = bytearray(tamanio_bloque)
+    vista = memoryview(bufer)
+    total = 0
+    try:
+        while True:
+            leidos = archivo.readinto(bufer)
+            if not leidos:
+                break
+            hasher.update(vista[:leidos])
+            total += leidos
+    finally:
+        vista.release()
+    return total
+
+def obtener_parametros_lectura():
+    """
+    Devuelve los parámetros de lectura configurados para calcular hashes.
+
+    Returns:
+        tuple: (tamanio_bloque, umbral_mmap); umbral_mmap es 0 si mmap está desactivado
+    """
+    from main import CONFIG  # Importar configuración
+
+    tamanio_bloque = CONFIG['tamanio_bloque_hash'] or TAMANIO_BLOQUE_DEFECTO
+    return max(4096, int(tamanio_bloque)), int(CONFIG['umbral_mmap_hash'] or 0)
@@ -0,0 +1,227 @@
+"""
+MÓDULO DE DETECCIÓN DE HERRAMIENTAS
+Averigua una sola vez qué ffmpeg, ffprobe y Pillow hay instalados, sus
+versiones y qué saben hacer (códecs y formatos de ffmpeg, formatos que Pillow
+puede abrir y guardar). El resultado se guarda en ~/.orgest/herramientas.json
+asociado a la ruta y la fecha de modificación de cada binario: mientras no
+cambien, ni el arranque ni los pasos vuelven a lanzar 'ffmpeg -version' ni a
+importar Pillow para comprobarlo, y cada paso elige cómo convertir según lo
+que ya se sabe que funciona.
+"""
+
+import importlib.util
+import json
+import os
+import shutil
+import subprocess
+import threading
+
+from .datos_locales import ruta_datos
+
+NOMBRE_CACHE_HERRAMIENTAS = "herramientas.json"
+VERSION_CACHE_HERRAMIENTAS = 1  # Si cambia, la cache anterior se descarta
+TIEMPO_MAXIMO_SONDEO = 30  # Segundos por llamada a ffmpeg/ffprobe
+
+_herramientas = None
+_lock_herramientas = threading.Lock()
+
+def _clave_archivo(ruta):
+    """Identifica una versión concreta de un binario o paquete: ruta, tamaño y fecha de modificación"""
+    if ruta is None:
+        return None
+    try:
+        info_stat = os.stat(ruta)
+    except OSError:
+        return None
+    return f"{os.path.realpath(ruta)}|{info_stat.st_size}|{info_stat.st_mtime_ns}"
+
+def _ejecutar_sondeo(comando):
+    """Ejecuta ffmpeg/ffprobe con un comando de consulta y devuelve su salida ('' si falla)"""
+    try:
+        resultado = subprocess.run(comando, capture_output=True, text=True, stdin=subprocess.DEVNULL,
+                                   timeout=TIEMPO_MAXIMO_SONDEO)
+    except (OSError, subprocess.TimeoutExpired):
+        return ''
+    return resultado.stdout if resultado.returncode == 0 else ''
+
+def _leer_version(salida):
+    """Extrae la versión de la primera línea de '-version' ('ffmpeg version 6.1.1 ...')"""
+    partes = salida.split(None, 3)
+    return partes[2] if len(partes) > 2 and partes[1] == 'version' else None
+
+def _leer_tabla(salida):
+    """
+    Lee las tablas de 'ffmpeg -codecs' y 'ffmpeg -formats'.
+
+    La leyenda (' D..... = Decoding supported') dice cuántas columnas de
+    banderas hay; tras la línea de guiones cada fila es 'BANDERAS nombre descripción',
+    con espacios en las banderas que no aplican ('  E mp4').
+
+    Returns:
+        list: (banderas, [nombres]) por fila; un formato puede tener varios nombres separados por comas
+    """
+    filas = []
+    ancho = None
+    en_tabla = False
+    for linea in salida.splitlines():
+        if not en_tabla:
+            if ancho is None and ' = ' in linea:
+                ancho = len(linea.split()[0])
+            en_tabla = linea.strip().startswith('--')
+            continue
+        if ancho is None or len(linea) <= ancho + 1:
+            continue
+        partes = linea[ancho + 1:].split(None, 1)
+        if partes:
+            filas.append((linea[1:ancho + 1], partes[0].split(',')))
+    return filas
+
+def _sondear_ffmpeg(ruta_ffmpeg):
+    """Consulta la versión, códecs y formatos de un ffmpeg (tres procesos, solo al cambiar el binario)"""
+    datos = {'ruta': ruta_ffmpeg, 'version': _leer_version(_ejecutar_sondeo([ruta_ffmpeg, '-version'])),
+             'decodificadores': [], 'codificadores': [], 'demuxers': [], 'muxers': []}
+
+    for banderas, nombres in _leer_tabla(_ejecutar_sondeo([ruta_ffmpeg, '-hide_banner', '-codecs'])):
+        if banderas[:1] == 'D':
+            datos['decodificadores'].extend(nombres)
+        if banderas[1:2] == 'E':
+            datos['codificadores'].extend(nombres)
+
+    for banderas, nombres in _leer_tabla(_ejecutar_sondeo([ruta_ffmpeg, '-hide_banner', '-formats'])):
+        if banderas[:1] == 'D':
+            datos['demuxers'].extend(nombres)
+        if banderas[1:2] == 'E':
+            datos['muxers'].extend(nombres)
+    return datos
+
+def _sondear_ffprobe(ruta_ffprobe):
+    """Consulta la versión de ffprobe"""
+    return {'ruta': ruta_ffprobe, 'version': _leer_version(_ejecutar_sondeo([ruta_ffprobe, '-version']))}
+
+def _sondear_pillow():
+    """Importa Pillow y anota su versión y los formatos que puede abrir y guardar"""
+    try:
+        import PIL
+        from PIL import Image
+    except ImportError:
+        return None
+    Image.init()  # Registrar todos los formatos, no solo los más comunes
+    return {'version': getattr(PIL, '__version__', None) or getattr(Image, 'VERSION', None),
+            'abrir': sorted(Image.OPEN), 'guardar': sorted(Image.SAVE)}
+
+def _ubicar_pillow():
+    """Devuelve el __init__.py de Pillow sin importarlo (None si no está instalado)"""
+    try:
+        especificacion = importlib.util.find_spec('PIL')
+    except (ImportError, ValueError):
+        return None
+    return especificacion.origin if especificacion is not None else None
+
+def _cargar_cache(ruta_cache):
+    """Lee la cache de herramientas (vacía si no existe o es de otra versión)"""
+    try:
+        with open(ruta_cache, 'r', encoding='utf-8') as archivo:
+            cache = json.load(archivo)
+    except (OSError, ValueError):
+        return {}
+    return cache if cache.get('version') == VERSION_CACHE_HERRAMIENTAS else {}
+
+def _guardar_cache(ruta_cache, cache):
+    """Escribe la cache de herramientas de forma atómica"""
+    temporal = ruta_cache + ".tmp"
+    try:
+        with open(temporal, 'w', encoding='utf-8') as archivo:
+            json.dump(cache, archivo, ensure_ascii=False)
+        os.replace(temporal, ruta_cache)
+    except OSError:
+        pass  # Sin cache se vuelve a sondear en la próxima ejecución
+
+def obtener_herramientas(refrescar=False):
+    """
+    Devuelve lo que se sabe de ffmpeg, ffprobe y Pillow, sondeándolos solo si cambiaron.
+
+    Localizar los binarios (PATH) y comparar su fecha de modificación no lanza
+    ningún proceso; solo se ejecutan cuando un binario es nuevo o cambió.
+
+    Args:
+        refrescar (bool): Volver a comprobar las rutas (por ejemplo, tras instalar ffmpeg o Pillow)
+
+    Returns:
+        dict: 'ffmpeg', 'ffprobe' y 'pillow', cada uno con sus datos o None si no está instalado
+    """
+    global _herramientas
+
+    with _lock_herramientas:
+        if _herramientas is not None and not refrescar:
+            return _herramientas
+
+        ruta_cache = ruta_datos(NOMBRE_CACHE_HERRAMIENTAS)
+        cache = _cargar_cache(ruta_cache)
+        cambios = False
+        herramientas = {}
+
+        componentes = (
+            ('ffmpeg', shutil.which('ffmpeg'), _sondear_ffmpeg),
+            ('ffprobe', shutil.which('ffprobe'), _sondear_ffprobe),
+            ('pillow', _ubicar_pillow(), lambda ruta: _sondear_pillow()),
+        )
+        for nombre, ruta, sondear in componentes:
+            clave = _clave_archivo(ruta)
+            guardado = cache.get(nombre)
+            if guardado is not None and guardado.get('clave') == clave:
+                herramientas[nombre] = guardado.get('datos')
+                continue
+            datos = sondear(ruta) if clave is not None else None
+            cache[nombre] = {'clave': clave, 'datos': datos}
+            herramientas[nombre] = datos
+            cambios = True
+
+        if cambios:
+            cache['version'] = VERSION_CACHE_HERRAMIENTAS
+            _guardar_cache(ruta_cache, cache)
+        _herramientas = herramientas
+        return herramientas
+
+def ffmpeg_disponible():
+    """Indica si ffmpeg está instalado"""
+    return obtener_herramientas()['ffmpeg'] is not None
+
+def ffprobe_disponible():
+    """Indica si ffprobe está instalado"""
+    return obtener_herramientas()['ffprobe'] is not None
+
+def ffmpeg_soporta(decodificador=None, codificador=None, demuxer=None, muxer=None):
+    """
+    Indica si el ffmpeg instalado tiene los códecs y formatos indicados.
+
+    Si no se pudo leer la lista (un ffmpeg con salida inesperada), se supone
+    que sí para no descartar un ffmpeg que funciona.
+
+    Returns:
+        bool: False si ffmpeg no está instalado o le falta alguno
+    """
+    ffmpeg = obtener_herramientas()['ffmpeg']
+    if ffmpeg is None:
+        return False
+    for clave, valor in (('decodificadores', decodificador), ('codificadores', codificador),
+                         ('demuxers', demuxer), ('muxers', muxer)):
+        if valor is not None and ffmpeg[clave] and valor not in ffmpeg[clave]:
+            return False
+    return True
+
+def pillow_disponible():
+    """Indica si Pillow está instalado"""
+    return obtener_herramientas()['pillow'] is not None
+
+def pillow_soporta(abrir=None, guardar=None):
+    """
+    Indica si Pillow puede abrir y/o guardar un formato ('WEBP', 'PNG'...).
+
+    Returns:
+        bool: False si Pillow no está instalado o no tiene el formato
+    """
+    pillow = obtener_herramientas()['pillow']
+    if pillow is None:
+        return False
+    return ((abrir is None or abrir in pillow['abrir']) and
+            (guardar is None or guardar in pillow['guardar']))
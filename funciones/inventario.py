@@ -0,0 +1,252 @@
+"""
+MÓDULO DE INVENTARIO DE ARCHIVOS
+Recorre la carpeta una sola vez con os.scandir y guarda en memoria qué
+archivos hay en cada carpeta junto con sus metadatos (tamaño, fecha de
+modificación, inodo). Todos los pasos del modo automático consultan este
+inventario en lugar de volver a recorrer el disco, y lo actualizan cuando
+mueven, crean o eliminan archivos.
+"""
+
+import hashlib
+import os
+
+class FileInventory:
+    """
+    Inventario en memoria de una carpeta y todas sus subcarpetas.
+
+    Cada archivo físico (st_dev, st_ino) se guarda una sola vez aunque sea
+    accesible desde varias rutas mediante enlaces duros: las rutas apuntan a
+    la misma entrada de metadatos.
+    """
+
+    def __init__(self, raiz, progreso=None):
+        """
+        Args:
+            raiz (str): Carpeta a inventariar
+            progreso (Progreso): Progreso a actualizar durante el escaneo (opcional)
+        """
+        self.raiz = os.path.abspath(raiz)
+        self._carpetas = {}  # carpeta -> [lista de subcarpetas, {nombre: identidad o None}]
+        self._metadatos = {}  # (st_dev, st_ino) -> os.stat_result, una vez por archivo físico
+        self._escanear(self.raiz, progreso)
+
+    def _escanear(self, raiz, progreso=None):
+        """Recorre 'raiz' con os.scandir guardando carpetas, archivos y metadatos"""
+        pendientes = [raiz]
+        while pendientes:
+            carpeta = pendientes.pop()
+            subcarpetas, archivos, hijas = [], {}, []
+            self._carpetas[carpeta] = [subcarpetas, archivos]
+            try:
+                with os.scandir(carpeta) as entradas:
+                    for entrada in entradas:
+                        try:
+                            es_carpeta = entrada.is_dir()
+                        except OSError:
+                            es_carpeta = False
+                        if es_carpeta:
+                            subcarpetas.append(entrada.name)
+                            if not entrada.is_symlink():  # Igual que os.walk: no seguir enlaces a carpetas
+                                hijas.append(entrada.path)
+                        else:
+                            try:
+                                archivos[entrada.name] = self._registrar(entrada.stat())
+                            except OSError:
+                                archivos[entrada.name] = None  # Archivo inaccesible o enlace roto
+            except OSError:
+                pass  # Carpeta inaccesible: queda vacía en el inventario, como en os.walk
+
+            if progreso is not None:
+                progreso.carpeta_visitada(len(archivos), len(hijas))
+                progreso.avanzar(len(archivos))
+            pendientes.extend(reversed(hijas))
+
+    def _registrar(self, info_stat, reemplazar=False):
+        """Guarda los metadatos de un archivo físico y devuelve su identidad (st_dev, st_ino)"""
+        identidad = (info_stat.st_dev, info_stat.st_ino)
+        if reemplazar or identidad not in self._metadatos:
+            self._metadatos[identidad] = info_stat
+        return identidad
+
+    def _asegurar_carpeta(self, carpeta):
+        """Registra una carpeta (y sus carpetas padre) si aún no está en el inventario"""
+        if carpeta in self._carpetas:
+            return self._carpetas[carpeta]
+        registro = self._carpetas[carpeta] = [[], {}]
+        padre, nombre = os.path.split(carpeta)
+        if carpeta != self.raiz and padre != carpeta and self.contiene(padre):
+            hermanas = self._asegurar_carpeta(padre)[0]
+            if nombre not in hermanas:
+                hermanas.append(nombre)
+        return registro
+
+    def contiene(self, ruta):
+        """Indica si una ruta está dentro de la carpeta inventariada"""
+        ruta = os.path.abspath(ruta)
+        return ruta == self.raiz or ruta.startswith(os.path.join(self.raiz, ''))
+
+    def recorrer(self, ruta=None, topdown=True):
+        """
+        Recorre el inventario con la misma interfaz y orden que os.walk.
+
+        Como os.walk, las listas de cada carpeta se copian al visitarla: los
+        archivos movidos durante el recorrido no alteran las carpetas ya
+        visitadas, y quitar nombres de 'dirs' evita entrar en ellas.
+
+        Args:
+            ruta (str): Carpeta desde la que recorrer (por defecto la raíz)
+            topdown (bool): Si es False, cada carpeta se entrega después de sus subcarpetas
+
+        Yields:
+            tuple: (carpeta, lista_de_subcarpetas, lista_de_archivos)
+        """
+        carpeta = ruta or self.raiz  # Las rutas entregadas conservan la forma recibida, como en os.walk
+        registro = self._carpetas.get(os.path.abspath(carpeta))
+        if registro is None:
+            return
+
+        subcarpetas, archivos = list(registro[0]), list(registro[1])
+        if topdown:
+            yield carpeta, subcarpetas, archivos
+        for nombre in subcarpetas:
+            for resultado in self.recorrer(os.path.join(carpeta, nombre), topdown):
+                yield resultado
+        if not topdown:
+            yield carpeta, subcarpetas, archivos
+
+    def contar(self, ruta=None, excluir=(), omitir_raiz=False):
+        """
+        Cuenta los archivos del inventario sin tocar el disco.
+
+        Args:
+            ruta (str): Carpeta desde la que contar (por defecto la raíz)
+            excluir (list): Carpetas cuya ruta contiene alguno de estos textos se omiten
+            omitir_raiz (bool): Si es True no se cuentan los archivos de la propia 'ruta'
+
+        Returns:
+            int: Número de archivos
+        """
+        inicio = ruta or self.raiz
+        total = 0
+        for carpeta, subcarpetas, archivos in self.recorrer(inicio):
+            if (omitir_raiz and carpeta == inicio) or any(x in carpeta for x in excluir):
+                continue
+            total += len(archivos)
+        return total
+
+    def huella(self):
+        """
+        Calcula una huella del estado de la carpeta sin tocar el disco.
+
+        Es la suma de un hash por archivo (ruta relativa, tamaño y fecha de
+        modificación), así que no depende del orden del recorrido y dos
+        inventarios con los mismos archivos dan la misma huella.
+
+        Returns:
+            str: Huella en hexadecimal seguida del número de archivos
+        """
+        total, cantidad = 0, 0
+        for carpeta, (subcarpetas, archivos) in self._carpetas.items():
+            relativa = os.path.relpath(carpeta, self.raiz)
+            for nombre, identidad in archivos.items():
+                info_stat = self._metadatos.get(identidad) if identidad is not None else None
+                if info_stat is not None:
+                    clave = f"{relativa}/{nombre}\0{info_stat.st_size}\0{int(info_stat.st_mtime)}"
+                else:
+                    clave = f"{relativa}/{nombre}\0?"
+                digest = hashlib.blake2b(clave.encode('utf-8', 'surrogateescape'), digest_size=8).digest()
+                total = (total + int.from_bytes(digest, 'little')) & 0xFFFFFFFFFFFFFFFF
+                cantidad += 1
+        return f"{total:016x}-{cantidad}"
+
+    def stat(self, ruta):
+        """
+        Devuelve los metadatos guardados de un archivo.
+
+        Returns:
+            os.stat_result or None: Metadatos, None si no está en el inventario o no se pudo leer
+        """
+        carpeta, nombre = os.path.split(os.path.abspath(ruta))
+        registro = self._carpetas.get(carpeta)
+        if registro is None:
+            return None
+        identidad = registro[1].get(nombre)
+        return self._metadatos.get(identidad) if identidad is not None else None
+
+    def existe(self, ruta):
+        """Indica si el inventario tiene registrado un archivo en esa ruta"""
+        carpeta, nombre = os.path.split(os.path.abspath(ruta))
+        registro = self._carpetas.get(carpeta)
+        return registro is not None and nombre in registro[1]
+
+    def nombres_en(self, carpeta):
+        """Devuelve los nombres de archivo registrados en una carpeta (sin recorrer el disco)"""
+        registro = self._carpetas.get(os.path.abspath(carpeta))
+        return list(registro[1]) if registro is not None else []
+
+    def esta_vacia(self, carpeta):
+        """Indica si una carpeta no tiene archivos ni subcarpetas según el inventario"""
+        registro = self._carpetas.get(os.path.abspath(carpeta))
+        return registro is not None and not registro[0] and not registro[1]
+
+    def agregar(self, ruta):
+        """
+        Registra un archivo nuevo o modificado leyendo sus metadatos del disco.
+
+        Args:
+            ruta (str): Ruta del archivo creado o modificado
+        """
+        ruta = os.path.abspath(ruta)
+        if not self.contiene(ruta):
+            return
+        carpeta, nombre = os.path.split(ruta)
+        try:
+            # Sustituir los metadatos anteriores del mismo inodo (el archivo pudo cambiar)
+            identidad = self._registrar(os.stat(ruta), reemplazar=True)
+        except OSError:
+            identidad = None
+        self._asegurar_carpeta(carpeta)[1][nombre] = identidad
+
+    def agregar_carpeta(self, carpeta):
+        """Registra una carpeta recién creada"""
+        carpeta = os.path.abspath(carpeta)
+        if self.contiene(carpeta):
+            self._asegurar_carpeta(carpeta)
+
+    def mover(self, origen, destino):
+        """
+        Refleja en el inventario un archivo movido o renombrado.
+
+        Mover dentro del mismo disco no cambia inodo, tamaño ni fecha de
+        modificación, así que los metadatos se conservan.
+
+        Args:
+            origen (str): Ruta anterior del archivo
+            destino (str): Ruta nueva del archivo
+        """
+        carpeta, nombre = os.path.split(os.path.abspath(origen))
+        registro = self._carpetas.get(carpeta)
+        identidad = registro[1].pop(nombre, None) if registro is not None else None
+
+        destino = os.path.abspath(destino)
+        if self.contiene(destino):
+            carpeta_destino, nombre_destino = os.path.split(destino)
+            self._asegurar_carpeta(carpeta_destino)[1][nombre_destino] = identidad
+
+    def eliminar(self, ruta):
+        """Quita un archivo eliminado del inventario"""
+        carpeta, nombre = os.path.split(os.path.abspath(ruta))
+        registro = self._carpetas.get(carpeta)
+        if registro is not None:
+            registro[1].pop(nombre, None)
+
+    def eliminar_carpeta(self, carpeta):
+        """Quita del inventario una carpeta eliminada y todo su contenido"""
+        carpeta = os.path.abspath(carpeta)
+        prefijo = os.path.join(carpeta, '')
+        for otra in [otra for otra in self._carpetas if otra == carpeta or otra.startswith(prefijo)]:
+            del self._carpetas[otra]
+        padre, nombre = os.path.split(carpeta)
+        registro = self._carpetas.get(padre)
+        if registro is not None and nombre in registro[0]:
+            registro[0].remove(nombre)
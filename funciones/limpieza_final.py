@@ -1,6 +1,8 @@
 import os
 import shutil
 
+from .diario import registrar_operacion
+
 def limpiar_consola():
     """Limpia la consola según el sistema operativo"""
     from main import CONFIG  # Importar configuración
@@ -110,6 +112,7 @@ def eliminar_carpeta_segura(ruta_carpeta, nombre_carpeta):
             if CONFIG['modo_verbose']:
                 print(f"   🗑️  Eliminando carpeta: {ruta_carpeta}")
                 
+            registrar_operacion('eliminar', ruta=os.path.abspath(ruta_carpeta))
             shutil.rmtree(ruta_carpeta)
             
             if CONFIG['modo_verbose']:
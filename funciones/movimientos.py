@@ -0,0 +1,262 @@
+"""
+MÓDULO DE MOVIMIENTO DE ARCHIVOS
+Mueve archivos intentando primero os.rename, que dentro del mismo disco solo
+cambia la entrada del directorio. Los archivos cuyo destino está en otro
+disco se detectan antes de intentarlo comparando st_dev y se copian en
+paralelo con os.copy_file_range u os.sendfile (el kernel copia los datos sin
+pasar por Python) antes de borrar el original.
+Al terminar cada paso se muestra cuántos archivos se movieron y a qué velocidad.
+"""
+
+import errno
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .diario import registrar_operacion
+
+TAMANIO_BLOQUE_COPIA = 8 * 1024 * 1024
+
+def obtener_hilos_copia():
+    """
+    Devuelve el número de hilos para copiar archivos entre discos.
+
+    Returns:
+        int: Número de hilos (CONFIG['hilos_copia'], o automático si es 0)
+    """
+    from main import CONFIG  # Importar configuración
+
+    hilos = CONFIG['hilos_copia']
+    if not hilos or hilos < 1:
+        hilos = min(8, (os.cpu_count() or 1) + 2)
+    return hilos
+
+def copiar_contenido(origen, destino, tamanio_bloque=TAMANIO_BLOQUE_COPIA):
+    """
+    Copia el contenido de un archivo usando la vía más rápida disponible.
+
+    Se prueba os.copy_file_range (Linux, Python 3.8+), después os.sendfile
+    y, si ninguna está disponible o el sistema la rechaza, una copia normal
+    por bloques. Si una vía falla a mitad, la siguiente continúa desde el
+    mismo punto.
+
+    Args:
+        origen (str): Archivo a copiar
+        destino (str): Archivo a crear
+        tamanio_bloque (int): Bytes por llamada
+
+    Returns:
+        int: Bytes copiados
+    """
+    with open(origen, 'rb') as archivo_origen, open(destino, 'wb') as archivo_destino:
+        fd_origen, fd_destino = archivo_origen.fileno(), archivo_destino.fileno()
+        tamanio = os.fstat(fd_origen).st_size
+        copiado = 0
+
+        if hasattr(os, 'copy_file_range'):
+            try:
+                while copiado < tamanio:
+                    enviados = os.copy_file_range(fd_origen, fd_destino, tamanio_bloque,
+                                                  copiado, copiado)
+                    if not enviados:
+                        break
+                    copiado += enviados
+            except OSError as e:
+                if e.errno not in (errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.EPERM):
+                    raise
+
+        if copiado < tamanio and hasattr(os, 'sendfile'):
+            try:
+                os.lseek(fd_destino, copiado, os.SEEK_SET)
+                while copiado < tamanio:
+                    enviados = os.sendfile(fd_destino, fd_origen, copiado, tamanio_bloque)
+                    if not enviados:
+                        break
+                    copiado += enviados
+            except OSError as e:
+                if e.errno not in (errno.ENOSYS, errno.EINVAL, errno.ENOTSOCK, errno.EOPNOTSUPP):
+                    raise
+
+        # Copia normal para lo que falte (o si el archivo creció durante la copia)
+        archivo_origen.seek(copiado)
+        os.lseek(fd_destino, copiado, os.SEEK_SET)
+        while True:
+            bloque = archivo_origen.read(tamanio_bloque)
+            if not bloque:
+                break
+            archivo_destino.write(bloque)
+            copiado += len(bloque)
+
+    return copiado
+
+def ruta_temporal_movimiento(destino):
+    """
+    Devuelve el nombre temporal con el que se copia un archivo a otro disco.
+
+    Se deriva del destino anotado en el diario, así que al reanudar se sabe
+    que un archivo con este nombre es la copia a medias de ese movimiento.
+    """
+    carpeta, nombre = os.path.split(destino)
+    return os.path.join(carpeta, f".{nombre}.orgest_mov")
+
+def mover_entre_discos(origen, destino):
+    """
+    Mueve un archivo a otro disco: copia contenido y metadatos y borra el original.
+
+    La copia se hace con un nombre temporal (ruta_temporal_movimiento) y se
+    renombra al terminar, así que 'destino' nunca es una copia a medias. Si
+    la copia falla se borra el temporal y el original queda intacto.
+
+    Args:
+        origen (str): Archivo a mover
+        destino (str): Ruta de destino
+
+    Returns:
+        int: Bytes copiados
+    """
+    if os.path.islink(origen):
+        os.symlink(os.readlink(origen), destino)
+        os.unlink(origen)
+        return 0
+
+    temporal = ruta_temporal_movimiento(destino)
+    try:
+        copiado = copiar_contenido(origen, temporal)
+        shutil.copystat(origen, temporal)
+        os.replace(temporal, destino)
+    except BaseException:
+        if os.path.lexists(temporal):
+            os.remove(temporal)
+        raise
+    os.remove(origen)
+    return copiado
+
+class MotorMovimientos:
+    """
+    Mueve los archivos de un paso y mide su velocidad.
+
+    Los movimientos dentro del mismo disco se hacen al momento con os.rename.
+    Los que van a otro disco se encolan en un grupo de hilos; el inventario
+    se actualiza en el hilo principal cuando cada copia termina, y terminar()
+    espera a las que falten antes de mostrar el resumen.
+
+    Por carpeta de destino solo se agrupa la consulta de st_dev. Los
+    renombrados no se acumulan por carpeta: cada uno es una única llamada al
+    sistema y quien mueve (el asignador de nombres, el inventario, el diario)
+    cuenta con que el archivo ya esté en su destino cuando mover() devuelve True.
+    """
+
+    def __init__(self, nombre_paso, inventario=None, hilos=None):
+        """
+        Args:
+            nombre_paso (str): Nombre del paso para el resumen de velocidad
+            inventario (FileInventory): Inventario a actualizar con cada movimiento (opcional)
+            hilos (int): Hilos para copias entre discos (por defecto CONFIG['hilos_copia'])
+        """
+        self.nombre_paso = nombre_paso
+        self.inventario = inventario
+        self.hilos = hilos or obtener_hilos_copia()
+        self.resultados = {'renombrados': 0, 'copiados': 0, 'bytes_copiados': 0, 'fallos': 0}
+        self._dispositivos = {}  # carpeta de destino -> st_dev, una consulta por carpeta
+        self._ejecutor = None
+        self._pendientes = []  # (futuro, origen, destino)
+        self._inicio = time.perf_counter()
+
+    def _dispositivo_carpeta(self, carpeta):
+        """Devuelve el st_dev de una carpeta de destino, consultándolo una sola vez"""
+        dispositivo = self._dispositivos.get(carpeta)
+        if dispositivo is None:
+            dispositivo = self._dispositivos[carpeta] = os.stat(carpeta).st_dev
+        return dispositivo
+
+    def mover(self, origen, destino, esperar=False, registrar=True):
+        """
+        Mueve un archivo a 'destino' (que no debe existir).
+
+        El movimiento se anota en el diario activo antes de hacerlo.
+
+        Args:
+            origen (str): Archivo a mover
+            destino (str): Ruta de destino completa
+            esperar (bool): Si es True, una copia entre discos se hace al momento
+                (para quien necesita usar el destino justo después)
+            registrar (bool): False si el movimiento ya se anotó en el diario (por ejemplo, en un plan)
+
+        Returns:
+            bool: True si ya está movido, False si quedó encolado para copiarse
+
+        Raises:
+            OSError: Si no se pudo mover (en copias encoladas, el error se
+                muestra al recogerla)
+        """
+        dispositivo_origen = os.lstat(origen).st_dev
+        if registrar:
+            registrar_operacion('mover', origen=os.path.abspath(origen), destino=os.path.abspath(destino))
+        if dispositivo_origen == self._dispositivo_carpeta(os.path.dirname(destino) or '.'):
+            try:
+                os.rename(origen, destino)
+                self._registrar(origen, destino)
+                self.resultados['renombrados'] += 1
+                return True
+            except OSError as e:
+                if e.errno != errno.EXDEV:  # Mismo st_dev pero distinto punto de montaje
+                    raise
+
+        if esperar:
+            self.resultados['bytes_copiados'] += mover_entre_discos(origen, destino)
+            self._registrar(origen, destino)
+            self.resultados['copiados'] += 1
+            return True
+
+        if self._ejecutor is None:
+            self._ejecutor = ThreadPoolExecutor(max_workers=self.hilos)
+        self._pendientes.append((self._ejecutor.submit(mover_entre_discos, origen, destino), origen, destino))
+        if len(self._pendientes) >= self.hilos * 4:
+            self._recoger(self.hilos * 2)  # Acotar las copias en cola
+        return False
+
+    def _registrar(self, origen, destino):
+        """Refleja un movimiento terminado en el inventario"""
+        if self.inventario is not None:
+            self.inventario.mover(origen, destino)
+
+    def _recoger(self, quedan=0):
+        """Espera a las copias más antiguas hasta dejar como mucho 'quedan' en cola"""
+        from main import CONFIG  # Importar configuración para modo verbose
+
+        while len(self._pendientes) > quedan:
+            futuro, origen, destino = self._pendientes.pop(0)
+            try:
+                self.resultados['bytes_copiados'] += futuro.result()
+                self.resultados['copiados'] += 1
+                self._registrar(origen, destino)
+            except OSError as e:
+                self.resultados['fallos'] += 1
+                if CONFIG['modo_verbose']:
+                    print(f"   ❌ ERROR copiando {os.path.basename(origen)} a otro disco: {e}")
+                else:
+                    print(f"❌ Error al mover {os.path.basename(origen)} a otro disco: {e}")
+
+    def terminar(self):
+        """
+        Espera a las copias pendientes y muestra la velocidad del paso.
+
+        Returns:
+            dict: Renombrados, copiados, bytes copiados y fallos de copias encoladas
+        """
+        self._recoger()
+        if self._ejecutor is not None:
+            self._ejecutor.shutdown()
+            self._ejecutor = None
+
+        movidos = self.resultados['renombrados'] + self.resultados['copiados']
+        if movidos:
+            duracion = max(time.perf_counter() - self._inicio, 1e-6)
+            texto = (f"🚚 {self.nombre_paso}: {movidos} archivos movidos en {duracion:.1f}s "
+                     f"({movidos / duracion:.0f} archivos/s)")
+            if self.resultados['copiados']:
+                mb = self.resultados['bytes_copiados'] / (1024 * 1024)
+                texto += f", {self.resultados['copiados']} copiados a otro disco ({mb:.1f} MB a {mb / duracion:.1f} MB/s)"
+            print(texto)
+        return self.resultados
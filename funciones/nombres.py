@@ -0,0 +1,66 @@
+"""
+MÓDULO DE ASIGNACIÓN DE NOMBRES DE DESTINO
+Elige un nombre libre en la carpeta de destino al mover archivos, añadiendo
+_1, _2... si el nombre ya existe. Los nombres ocupados de cada carpeta se
+leen con un único listado y se guardan en memoria junto con el siguiente
+sufijo libre de cada nombre, así que mover miles de 'IMG_0001.jpg' a la
+misma carpeta no repite miles de comprobaciones en disco por archivo.
+"""
+
+import os
+
+class AsignadorNombres:
+    """Asigna nombres de destino sin colisiones con un índice en memoria por carpeta"""
+
+    def __init__(self):
+        self._ocupados = {}  # carpeta -> set de nombres ya usados
+        self._siguiente = {}  # (carpeta, nombre) -> siguiente sufijo a probar
+
+    def _nombres_ocupados(self, carpeta):
+        """Devuelve los nombres ocupados de una carpeta, listándola solo la primera vez"""
+        ocupados = self._ocupados.get(carpeta)
+        if ocupados is None:
+            try:
+                ocupados = set(os.listdir(carpeta))
+            except OSError:
+                ocupados = set()  # La carpeta aún no existe
+            self._ocupados[carpeta] = ocupados
+        return ocupados
+
+    def asignar(self, carpeta, nombre):
+        """
+        Reserva un nombre libre para 'nombre' dentro de 'carpeta'.
+
+        Se comprueba una sola vez en disco el nombre elegido por si otro
+        proceso lo creó después del listado.
+
+        Args:
+            carpeta (str): Carpeta de destino
+            nombre (str): Nombre de archivo deseado
+
+        Returns:
+            str: Ruta de destino libre (el nombre original o con sufijo _N)
+        """
+        ocupados = self._nombres_ocupados(carpeta)
+        candidato = nombre
+        base, extension = os.path.splitext(nombre)
+        contador = self._siguiente.get((carpeta, nombre), 1)
+
+        while candidato in ocupados or os.path.exists(os.path.join(carpeta, candidato)):
+            ocupados.add(candidato)  # Creado fuera de este asignador: recordarlo
+            candidato = f"{base}_{contador}{extension}"
+            while candidato in ocupados:
+                contador += 1
+                candidato = f"{base}_{contador}{extension}"
+            contador += 1
+
+        self._siguiente[(carpeta, nombre)] = contador
+        ocupados.add(candidato)
+        return os.path.join(carpeta, candidato)
+
+    def liberar(self, ruta):
+        """Libera un nombre reservado (el movimiento falló o el archivo salió de la carpeta)"""
+        carpeta, nombre = os.path.split(ruta)
+        ocupados = self._ocupados.get(carpeta)
+        if ocupados is not None:
+            ocupados.discard(nombre)
@@ -1,18 +1,69 @@
 import os
-import shutil
+from concurrent.futures import ThreadPoolExecutor
+
+from .clasificador import clasificar_archivos, tipo_por_extension
+from .duplicados import obtener_hilos_hash
+from .fechas import carpeta_por_fecha, fechas_de_archivos
+from .movimientos import MotorMovimientos
+from .nombres import AsignadorNombres
+from .progreso import Progreso
 
 def es_imagen(archivo):
-    """Verifica si un archivo es una imagen (excluyendo webp)"""
-    extensiones_imagen = ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.tif', '.ico']
-    return any(archivo.lower().endswith(ext) for ext in extensiones_imagen)
+    """Verifica si un archivo es una imagen por su extensión (excluyendo webp)"""
+    return tipo_por_extension(archivo) == 'imagen'
 
 def es_video(archivo):
-    """Verifica si un archivo es un video (excluyendo ts)"""
-    extensiones_video = ['.mp4', '.avi', '.mov', '.mkv', '.wmv', '.flv', '.mpeg', '.mpg']
-    return any(archivo.lower().endswith(ext) for ext in extensiones_video)
+    """Verifica si un archivo es un video por su extensión (excluyendo ts)"""
+    return tipo_por_extension(archivo) == 'video'
+
+def clasificar_carpeta(root, archivos, inventario=None, ejecutor=None):
+    """
+    Clasifica de una vez los archivos de una carpeta (WEBP y TS esperan a la conversión).
+    
+    Args:
+        root (str): Carpeta de los archivos
+        archivos (list): Nombres de archivo
+        inventario (FileInventory): Inventario del que tomar las fechas de modificación (opcional)
+        ejecutor (ThreadPoolExecutor): Grupo de hilos para leer las cabeceras en paralelo
+        
+    Returns:
+        tuple: ({nombre: 'imagen', 'video' o None}, {nombre: (año, mes)} si hay carpetas por fecha)
+    """
+    from main import CONFIG  # Importar configuración
+    
+    a_clasificar = [archivo for archivo in archivos if not archivo.lower().endswith(('.webp', '.ts'))]
+    if CONFIG['clasificar_por_contenido']:
+        tipos = clasificar_archivos([os.path.join(root, archivo) for archivo in a_clasificar], ejecutor)
+    else:
+        tipos = [tipo_por_extension(archivo) for archivo in a_clasificar]
+    tipos = dict(zip(a_clasificar, tipos))
+    
+    fechas = {}
+    if CONFIG['carpetas_por_fecha']:
+        # Fecha de cada imagen o video para elegir su subcarpeta AAAA/MM
+        con_fecha = [archivo for archivo in a_clasificar if tipos[archivo] is not None]
+        rutas_con_fecha = [os.path.join(root, archivo) for archivo in con_fecha]
+        stats = [inventario.stat(ruta_archivo) for ruta_archivo in rutas_con_fecha] if inventario is not None else None
+        fechas = dict(zip(con_fecha, fechas_de_archivos(rutas_con_fecha, [tipos[archivo] for archivo in con_fecha],
+                                                        stats, ejecutor)))
+    return tipos, fechas
+
+def crear_ejecutor_cabeceras():
+    """Grupo de hilos para leer cabeceras (tipo por contenido, fecha EXIF), o None si no hace falta"""
+    from main import CONFIG  # Importar configuración
+    
+    if CONFIG['clasificar_por_contenido'] or CONFIG['carpetas_por_fecha']:
+        return ThreadPoolExecutor(max_workers=obtener_hilos_hash())
+    return None
 
-def ordenar_archivos(ruta):
-    """Ordena archivos en carpetas de imágenes y videos"""
+def ordenar_archivos(ruta, inventario=None):
+    """
+    Ordena archivos en carpetas de imágenes y videos.
+    
+    Con el inventario de un paso anterior el total se conoce de antemano; sin
+    él, los archivos se ordenan mientras se recorre la carpeta y el total del
+    progreso se estima sobre la marcha, sin una pasada previa para contar.
+    """
     from main import CONFIG  # Importar configuración para modo verbose
     
     if CONFIG['modo_verbose']:
@@ -31,6 +82,9 @@ def ordenar_archivos(ruta):
     os.makedirs(carpeta_imagenes, exist_ok=True)
     os.makedirs(carpeta_videos, exist_ok=True)
     os.makedirs(carpeta_basura, exist_ok=True)
+    if inventario is not None:
+        for carpeta in (carpeta_imagenes, carpeta_videos, carpeta_basura):
+            inventario.agregar_carpeta(carpeta)
     
     if CONFIG['modo_verbose']:
         print(f"   ✅ Carpeta creada/mantenida: {carpeta_imagenes}")
@@ -45,45 +99,49 @@ def ordenar_archivos(ruta):
         'ts': 0
     }
     
-    # Primero contar el total de archivos para el progreso
-    if CONFIG['modo_verbose']:
-        print("📊 CONTANDO ARCHIVOS A ORDENAR...")
-    else:
-        print("📊 Contando archivos a ordenar...")
-        
-    total_archivos = 0
-    for root, dirs, files in os.walk(ruta):
-        if any(x in root for x in ["Imagenes", "Videos", "basura"]):
-            continue
-        total_archivos += len(files)
-    
-    if CONFIG['modo_verbose']:
-        print(f"📊 TOTAL DE ARCHIVOS A ORDENAR: {total_archivos}")
+    excluidas = ["Imagenes", "Videos", "basura"]
+    if inventario is not None:
+        # Total conocido sin tocar el disco
+        total_archivos = inventario.contar(ruta, excluir=excluidas)
+        recorrido = inventario.recorrer(ruta)
+        if CONFIG['modo_verbose']:
+            print(f"📊 TOTAL DE ARCHIVOS A ORDENAR: {total_archivos}")
+        else:
+            print(f"📁 Total de archivos a ordenar: {total_archivos}")
     else:
-        print(f"📁 Total de archivos a ordenar: {total_archivos}")
+        total_archivos = None  # Se estima durante el recorrido
+        recorrido = os.walk(ruta)
     
     print()
     
-    archivos_procesados = 0
+    progreso = Progreso("📦 Progreso: {actual}/{total} archivos ordenados", total_archivos, cada=10)
+    asignador = AsignadorNombres()  # Nombres libres en cada carpeta de destino
+    motor = MotorMovimientos("Ordenar", inventario)
+    # Las cabeceras de cada carpeta (tipo por contenido, fecha EXIF) se leen en paralelo
+    por_fecha = CONFIG['carpetas_por_fecha']
+    ejecutor = crear_ejecutor_cabeceras()
+    carpetas_creadas = {carpeta_imagenes, carpeta_videos, carpeta_basura}
     
-    for root, dirs, files in os.walk(ruta):
+    for root, dirs, files in recorrido:
         # Ignorar las carpetas de destino y basura
-        if any(x in root for x in ["Imagenes", "Videos", "basura"]):
+        omitida = any(x in root for x in excluidas)
+        progreso.carpeta_visitada(len(files), len(dirs), contar=not omitida)
+        if omitida:
             continue
             
         if CONFIG['modo_verbose'] and files:
             print(f"📂 PROCESANDO CARPETA: {os.path.basename(root) if os.path.basename(root) else 'raíz'}")
+        
+        tipos, fechas = clasificar_carpeta(root, files, inventario, ejecutor)
             
         for archivo in files:
-            archivos_procesados += 1
             ruta_completa = os.path.join(root, archivo)
             
             # Mostrar progreso según el modo
             if CONFIG['modo_verbose']:
                 print(f"   📄 Procesando: {archivo}")
             else:
-                if archivos_procesados % 10 == 0 or archivos_procesados == total_archivos:
-                    print(f"📦 Progreso: {archivos_procesados}/{total_archivos} archivos ordenados", end='\r')
+                progreso.avanzar()
             
             # Contar archivos webp y ts que se dejarán para convertir después
             if archivo.lower().endswith('.webp'):
@@ -97,36 +155,44 @@ def ordenar_archivos(ruta):
                     print(f"   ⏳ TS - Pendiente de conversión: {archivo}")
                 continue
             
-            if es_imagen(archivo):
-                destino = os.path.join(carpeta_imagenes, archivo)
+            if tipos[archivo] == 'imagen':
+                carpeta_destino = carpeta_imagenes
                 contadores['imagenes'] += 1
                 tipo = "🖼️  IMAGEN"
-            elif es_video(archivo):
-                destino = os.path.join(carpeta_videos, archivo)
+            elif tipos[archivo] == 'video':
+                carpeta_destino = carpeta_videos
                 contadores['videos'] += 1
                 tipo = "🎥 VIDEO"
             else:
-                destino = os.path.join(carpeta_basura, archivo)
+                carpeta_destino = carpeta_basura
                 contadores['basura'] += 1
                 tipo = "🗑️  BASURA"
+            if por_fecha and tipos[archivo] is not None:
+                carpeta_destino = carpeta_por_fecha(carpeta_destino, fechas[archivo])
+            destino = os.path.join(carpeta_destino, archivo)
             
             # Mover el archivo
             try:
+                if carpeta_destino not in carpetas_creadas:
+                    os.makedirs(carpeta_destino, exist_ok=True)
+                    if inventario is not None:
+                        inventario.agregar_carpeta(carpeta_destino)
+                    carpetas_creadas.add(carpeta_destino)
+                
                 # Si ya existe en destino, renombrar
-                contador = 1
-                nombre_base, extension = os.path.splitext(archivo)
-                destino_temp = destino
-                while os.path.exists(destino_temp):
-                    destino_temp = os.path.join(os.path.dirname(destino), f"{nombre_base}_{contador}{extension}")
-                    contador += 1
+                destino_temp = asignador.asignar(os.path.dirname(destino), archivo)
                 
-                shutil.move(ruta_completa, destino_temp)
+                try:
+                    motor.mover(ruta_completa, destino_temp)
+                except Exception:
+                    asignador.liberar(destino_temp)
+                    raise
                 
                 if CONFIG['modo_verbose']:
                     if destino_temp != destino:
                         print(f"   ✅ {tipo} (renombrado): {archivo} → {os.path.basename(destino_temp)}")
                     else:
-                        print(f"   ✅ {tipo}: {archivo} → {os.path.basename(os.path.dirname(destino))}/")
+                        print(f"   ✅ {tipo}: {archivo} → {os.path.relpath(carpeta_destino, ruta)}/")
                         
             except Exception as e:
                 if CONFIG['modo_verbose']:
@@ -134,27 +200,33 @@ def ordenar_archivos(ruta):
                 else:
                     print(f"❌ Error al mover archivo: {e}")
     
+    if ejecutor is not None:
+        ejecutor.shutdown()
     if not CONFIG['modo_verbose']:
-        print()  # Nueva línea después de la barra de progreso
+        progreso.terminar()
+    motor.terminar()  # Esperar a las copias entre discos y mostrar la velocidad
     
     if CONFIG['modo_verbose']:
+        if total_archivos is None:
+            print(f"📊 TOTAL DE ARCHIVOS RECORRIDOS: {progreso.total}")
         print("✅ ORDENAMIENTO COMPLETADO")
     
     return contadores
 
-def organizar_archivos_carpetas(ruta):
+def organizar_archivos_carpetas(ruta, inventario=None):
     """
     Función principal para organizar archivos en carpetas.
     
     Args:
         ruta (str): Ruta de la carpeta a procesar
+        inventario (FileInventory): Inventario compartido entre pasos (opcional)
         
     Returns:
         dict: Resultados del ordenamiento para el estado del programa
     """
     from main import CONFIG  # ✅ CORRECCIÓN: Importar CONFIG aquí también
     
-    contadores = ordenar_archivos(ruta)
+    contadores = ordenar_archivos(ruta, inventario)
     
     # Mostrar resumen según el modo
     if CONFIG['modo_verbose']:
@@ -0,0 +1,229 @@
+"""
+MÓDULO DE PLANIFICACIÓN DE MOVIMIENTOS
+En el modo automático, 'Organizar' mueve las imágenes y videos a Imagenes y
+Videos y 'Extraer' los vuelve a sacar a la raíz, así que cada archivo se
+movía dos veces para acabar casi donde estaba. El planificador calcula en
+memoria, a partir del inventario, el destino final de cada archivo teniendo
+en cuenta ambos pasos y después aplica solo los movimientos netos: cada
+archivo se mueve como mucho una vez y los que ya están en su sitio no se tocan.
+"""
+
+import os
+
+from .diario import obtener_diario
+from .extraer import se_conserva
+from .fechas import carpeta_por_fecha
+from .inventario import FileInventory
+from .movimientos import MotorMovimientos
+from .nombres import AsignadorNombres
+from .ordenar import clasificar_carpeta, crear_ejecutor_cabeceras
+from .progreso import Progreso
+
+CARPETAS_ORDENAR = ("Imagenes", "Videos")
+
+def planificar_destinos(ruta, inventario):
+    """
+    Calcula la carpeta final de cada archivo tras organizar y extraer, sin mover nada.
+
+    Reproduce las reglas de ambos pasos: las imágenes y videos acaban en la
+    raíz (o en Imagenes/AAAA/MM y Videos/AAAA/MM con carpetas por fecha), el
+    resto en basura, y los WEBP y TS se quedan donde están para convertirlos.
+
+    Args:
+        ruta (str): Carpeta a organizar
+        inventario (FileInventory): Inventario de la carpeta
+
+    Returns:
+        tuple: (plan, contadores, movimientos_por_pasos) donde plan es una lista
+            de (ruta_origen, carpeta_destino, categoría)
+    """
+    from main import CONFIG  # Importar configuración
+
+    carpeta_imagenes = os.path.join(ruta, "Imagenes")
+    carpeta_videos = os.path.join(ruta, "Videos")
+    carpeta_basura = os.path.join(ruta, "basura")
+    por_fecha = CONFIG['carpetas_por_fecha']
+
+    plan = []
+    contadores = {'imagenes': 0, 'videos': 0, 'basura': 0, 'webp': 0, 'ts': 0, 'extraidos': 0}
+    movimientos_por_pasos = 0  # Los que habrían hecho Organizar y Extraer por separado
+    ejecutor = crear_ejecutor_cabeceras()
+
+    try:
+        for root, dirs, files in inventario.recorrer(ruta):
+            relativa = os.path.relpath(root, ruta)  # Sin la parte de la ruta elegida por el usuario
+            if "basura" in relativa:
+                continue
+
+            if any(x in relativa for x in CARPETAS_ORDENAR):
+                # Organizar no toca estas carpetas; Extraer las vacía salvo las carpetas por fecha
+                if not se_conserva(root, ruta):
+                    for archivo in files:
+                        plan.append((os.path.join(root, archivo), ruta, 'extraidos'))
+                        contadores['extraidos'] += 1
+                        movimientos_por_pasos += 1
+                continue
+
+            tipos, fechas = clasificar_carpeta(root, files, inventario, ejecutor)
+            for archivo in files:
+                if archivo.lower().endswith('.webp'):
+                    contadores['webp'] += 1
+                    continue
+                elif archivo.lower().endswith('.ts'):
+                    contadores['ts'] += 1
+                    continue
+
+                tipo = tipos[archivo]
+                if tipo is None:
+                    categoria, carpeta_destino = 'basura', carpeta_basura
+                    movimientos_por_pasos += 1
+                elif por_fecha:
+                    categoria = 'imagenes' if tipo == 'imagen' else 'videos'
+                    carpeta_base = carpeta_imagenes if tipo == 'imagen' else carpeta_videos
+                    carpeta_destino = carpeta_por_fecha(carpeta_base, fechas[archivo])
+                    movimientos_por_pasos += 1
+                else:
+                    # Organizar lo llevaría a Imagenes o Videos y Extraer de vuelta a la raíz
+                    categoria = 'imagenes' if tipo == 'imagen' else 'videos'
+                    carpeta_destino = ruta
+                    movimientos_por_pasos += 2
+
+                plan.append((os.path.join(root, archivo), carpeta_destino, categoria))
+                contadores[categoria] += 1
+    finally:
+        if ejecutor is not None:
+            ejecutor.shutdown()
+
+    return plan, contadores, movimientos_por_pasos
+
+def ejecutar_plan(ruta, plan, inventario):
+    """
+    Aplica los movimientos netos de un plan.
+
+    Los nombres de destino se eligen antes de mover nada y el plan entero se
+    anota en el diario de una vez (un solo fsync), así que si se interrumpe
+    se puede reanudar sin volver a planificar.
+
+    Args:
+        ruta (str): Carpeta organizada
+        plan (list): Lista de (ruta_origen, carpeta_destino, categoría)
+        inventario (FileInventory): Inventario a actualizar con los movimientos
+
+    Returns:
+        int: Número de archivos movidos
+    """
+    from main import CONFIG  # Importar configuración para modo verbose
+
+    asignador = AsignadorNombres()
+    pendientes = [(origen, asignador.asignar(carpeta_destino, os.path.basename(origen)), categoria)
+                  for origen, carpeta_destino, categoria in plan
+                  if os.path.dirname(origen) != carpeta_destino]
+
+    diario = obtener_diario()
+    if diario is not None:
+        diario.registrar_lote([('mover', {'origen': os.path.abspath(origen), 'destino': os.path.abspath(destino),
+                                          'plan': True})
+                               for origen, destino, categoria in pendientes])
+
+    progreso = Progreso("📦 Progreso: {actual}/{total} archivos movidos", len(pendientes), cada=10)
+    motor = MotorMovimientos("Organizar (plan)", inventario)
+    carpetas_creadas = set()
+    movidos = 0
+
+    for origen, destino, categoria in pendientes:
+        archivo = os.path.basename(origen)
+        carpeta_destino = os.path.dirname(destino)
+        if not CONFIG['modo_verbose']:
+            progreso.avanzar()
+
+        try:
+            if carpeta_destino not in carpetas_creadas:
+                os.makedirs(carpeta_destino, exist_ok=True)
+                inventario.agregar_carpeta(carpeta_destino)
+                carpetas_creadas.add(carpeta_destino)
+
+            motor.mover(origen, destino, registrar=diario is None)
+            movidos += 1
+
+            if CONFIG['modo_verbose']:
+                carpeta_relativa = os.path.relpath(carpeta_destino, ruta)
+                carpeta_relativa = 'raíz' if carpeta_relativa == '.' else carpeta_relativa + '/'
+                if os.path.basename(destino) != archivo:
+                    print(f"   ✅ {categoria.upper()} (renombrado): {archivo} → {os.path.basename(destino)}")
+                else:
+                    print(f"   ✅ {categoria.upper()}: {archivo} → {carpeta_relativa}")
+
+        except Exception as e:
+            if CONFIG['modo_verbose']:
+                print(f"   ❌ ERROR moviendo {archivo}: {e}")
+            else:
+                print(f"❌ Error al mover archivo: {e}")
+
+    if not CONFIG['modo_verbose']:
+        progreso.terminar()
+    movidos -= motor.terminar()['fallos']
+    return movidos
+
+def organizar_archivos_planificado(ruta, inventario=None):
+    """
+    Organiza y extrae en un solo paso, moviendo cada archivo como mucho una vez.
+
+    Args:
+        ruta (str): Ruta de la carpeta a procesar
+        inventario (FileInventory): Inventario compartido entre pasos (opcional)
+
+    Returns:
+        dict: Resultados con las mismas claves que organizar_archivos_carpetas
+    """
+    from main import CONFIG  # Importar configuración
+
+    if CONFIG['modo_verbose']:
+        print("🧭 PLANIFICANDO DESTINOS FINALES (ORGANIZAR + EXTRAER)...")
+        print(f"📁 Ruta: {ruta}")
+    else:
+        print("🧭 Calculando el destino final de cada archivo...")
+
+    if inventario is None:
+        inventario = FileInventory(ruta)
+    os.makedirs(os.path.join(ruta, "basura"), exist_ok=True)
+    inventario.agregar_carpeta(os.path.join(ruta, "basura"))
+
+    plan, contadores, movimientos_por_pasos = planificar_destinos(ruta, inventario)
+    en_su_sitio = sum(1 for origen, destino, categoria in plan if os.path.dirname(origen) == destino)
+
+    if CONFIG['modo_verbose']:
+        print(f"📊 ARCHIVOS PLANIFICADOS: {len(plan)} ({en_su_sitio} ya están en su destino)")
+    else:
+        print(f"📁 Archivos a colocar: {len(plan) - en_su_sitio} ({en_su_sitio} ya en su sitio)")
+    print()
+
+    movidos = ejecutar_plan(ruta, plan, inventario)
+
+    if CONFIG['modo_verbose']:
+        print("\n📊 RESUMEN DETALLADO DE ORDENAMIENTO:")
+        print(f"   🖼️  Imágenes colocadas: {contadores['imagenes']}")
+        print(f"   🎥 Videos colocados: {contadores['videos']}")
+        print(f"   🗑️  Archivos movidos a 'basura': {contadores['basura']}")
+        print(f"   📤 Archivos sacados de Imagenes/Videos: {contadores['extraidos']}")
+        print(f"   ⏳ Archivos WEBP pendientes de conversión: {contadores['webp']}")
+        print(f"   ⏳ Archivos TS pendientes de conversión: {contadores['ts']}")
+        print(f"   🚚 Movimientos realizados: {movidos} (por pasos habrían sido {movimientos_por_pasos})")
+    else:
+        print("\n📊 RESUMEN DE ORDENAMIENTO:")
+        print(f"🖼️  Imágenes colocadas: {contadores['imagenes']}")
+        print(f"🎥 Videos colocados: {contadores['videos']}")
+        print(f"🗑️  Archivos movidos a 'basura': {contadores['basura']}")
+        print(f"⏳ Archivos WEBP pendientes de conversión: {contadores['webp']}")
+        print(f"⏳ Archivos TS pendientes de conversión: {contadores['ts']}")
+        print(f"🚚 Movimientos: {movidos} en lugar de {movimientos_por_pasos}")
+
+    return {
+        'total_archivos_procesados': sum(contadores.values()),
+        'imagenes_movidas': contadores['imagenes'],
+        'videos_movidos': contadores['videos'],
+        'basura_movida': contadores['basura'],
+        'webp_pendientes': contadores['webp'],
+        'ts_pendientes': contadores['ts'],
+        'movimientos': movidos,
+        'movimientos_por_pasos': movimientos_por_pasos
+    }
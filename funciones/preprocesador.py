@@ -4,8 +4,16 @@ import subprocess
 import sys
 from pathlib import Path
 
+from .diario import registrar_operacion
+from .herramientas import obtener_herramientas, pillow_disponible
+from .movimientos import MotorMovimientos
+from .nombres import AsignadorNombres
+
 def install_package(package):
     """Instala un paquete pip si no está disponible de forma silenciosa"""
+    # Pillow se comprueba con el sondeo de herramientas guardado, sin importarlo
+    if package == "Pillow" and pillow_disponible():
+        return True
     try:
         __import__("PIL" if package == "Pillow" else package)
         return True
@@ -21,6 +29,8 @@ def install_package(package):
             if result.returncode == 0:
                 try:
                     __import__("PIL" if package == "Pillow" else package)
+                    if package == "Pillow":
+                        obtener_herramientas(refrescar=True)  # Sondear el Pillow recién instalado
                     return True
                 except ImportError:
                     return False
@@ -39,9 +49,15 @@ def check_dependencies():
     
     return True
 
+_pillow_compatible = None  # Módulo Image ya configurado (se configura una sola vez)
+
 # 🔥 CORRECCIÓN: Definir ANTIALIAS para compatibilidad
 def setup_pillow_compatibility():
     """Configura compatibilidad para versiones antiguas y nuevas de Pillow"""
+    global _pillow_compatible
+    if _pillow_compatible is not None:
+        return _pillow_compatible
+    
     from PIL import Image
     try:
         # Para Pillow >= 10.0.0
@@ -51,18 +67,23 @@ def setup_pillow_compatibility():
             Image.Resampling = type('Resampling', (), {'LANCZOS': Image.LANCZOS})
     except AttributeError:
         pass
+    _pillow_compatible = Image
     return Image
 
 class ImagePreprocessor:
     """Pre-procesa imágenes para compatibilidad con Pillow 10.0.0"""
     
-    def __init__(self, ruta_base):
+    def __init__(self, ruta_base, inventario=None, punto_control=None):
         self.supported_extensions = {'.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.webp'}
         self.processed_count = 0
         self.failed_count = 0
         self.moved_count = 0
         self.ruta_base = ruta_base
         self.carpeta_fallos = os.path.join(ruta_base, "fallos")
+        self.inventario = inventario  # FileInventory compartido con los pasos anteriores (opcional)
+        self.punto_control = punto_control  # PuntosControl del modo automático (opcional)
+        self.asignador = AsignadorNombres()  # Nombres libres en sin_edit y fallos
+        self.motor = MotorMovimientos("Pre-procesar imágenes", inventario)
         
         # 🔥 CORRECCIÓN: Configurar compatibilidad al inicializar
         self.Image = setup_pillow_compatibility()
@@ -80,6 +101,8 @@ class ImagePreprocessor:
         sin_edit_folder = os.path.join(folder_path, "sin_edit")
         if not os.path.exists(sin_edit_folder):
             os.makedirs(sin_edit_folder)
+            if self.inventario is not None:
+                self.inventario.agregar_carpeta(sin_edit_folder)
             if CONFIG['modo_verbose']:
                 print(f"   📁 Carpeta 'sin_edit' creada: {sin_edit_folder}")
         return sin_edit_folder
@@ -90,12 +113,14 @@ class ImagePreprocessor:
         
         if not os.path.exists(self.carpeta_fallos):
             os.makedirs(self.carpeta_fallos)
+            if self.inventario is not None:
+                self.inventario.agregar_carpeta(self.carpeta_fallos)
             if CONFIG['modo_verbose']:
                 print(f"   📁 Carpeta 'fallos' creada: {self.carpeta_fallos}")
         return self.carpeta_fallos
     
     def move_original_to_backup(self, original_path, sin_edit_folder):
-        """Mueve el archivo original a la carpeta sin_edit de forma segura"""
+        """Mueve el archivo original a la carpeta sin_edit de forma segura y devuelve su nueva ruta"""
         from main import CONFIG
         
         try:
@@ -106,15 +131,15 @@ class ImagePreprocessor:
             destination = os.path.join(sin_edit_folder, filename)
             
             # Si el archivo ya existe en el destino, agregar un sufijo numérico
-            counter = 1
             base_destination = destination
-            name, ext = os.path.splitext(filename)
+            destination = self.asignador.asignar(sin_edit_folder, filename)
             
-            while os.path.exists(destination):
-                destination = os.path.join(sin_edit_folder, f"{name}_{counter}{ext}")
-                counter += 1
-            
-            shutil.move(original_path, destination)
+            try:
+                # Esperar también las copias entre discos: el original se abre justo después
+                self.motor.mover(original_path, destination, esperar=True)
+            except Exception:
+                self.asignador.liberar(destination)
+                raise
             self.moved_count += 1
             
             if CONFIG['modo_verbose']:
@@ -123,7 +148,7 @@ class ImagePreprocessor:
                 else:
                     print(f"   📦 Original movido a sin_edit: {filename}")
                     
-            return True
+            return destination
             
         except Exception as e:
             if CONFIG['modo_verbose']:
@@ -145,20 +170,22 @@ class ImagePreprocessor:
             destination = os.path.join(self.carpeta_fallos, filename)
             
             # Si ya existe en fallos, renombrar
-            counter = 1
-            name, ext = os.path.splitext(filename)
-            while os.path.exists(destination):
-                destination = os.path.join(self.carpeta_fallos, f"{name}_{counter}{ext}")
-                counter += 1
+            destination = self.asignador.asignar(self.carpeta_fallos, filename)
             
-            shutil.move(image_path, destination)
+            try:
+                self.motor.mover(image_path, destination)
+            except Exception:
+                self.asignador.liberar(destination)
+                raise
             
             # Crear archivo de log con el error
-            log_file = os.path.join(self.carpeta_fallos, f"{os.path.splitext(filename)[0]}_error.txt")
+            log_file = os.path.join(self.carpeta_fallos, f"{os.path.splitext(os.path.basename(destination))[0]}_error.txt")
             with open(log_file, 'w', encoding='utf-8') as f:
                 f.write(f"Error al procesar: {filename}\n")
                 f.write(f"Error: {error_message}\n")
                 f.write(f"Fecha: {subprocess.getoutput('date /t' if os.name == 'nt' else 'date')}\n")
+            if self.inventario is not None:
+                self.inventario.agregar(log_file)
             
             if CONFIG['modo_verbose']:
                 print(f"   🚨 Imagen fallida movida a 'fallos': {filename}")
@@ -179,7 +206,8 @@ class ImagePreprocessor:
         images = []
         
         try:
-            for root, dirs, files in os.walk(folder_path):
+            recorrido = self.inventario.recorrer(folder_path) if self.inventario is not None else os.walk(folder_path)
+            for root, dirs, files in recorrido:
                 # Excluir carpetas de respaldo del procesamiento, pero permitir que existan
                 # No excluir "fallos" aquí para que la carpeta pueda ser creada
                 if "sin_edit" in root or "YaRespaldo" in root or "basura" in root:
@@ -230,8 +258,8 @@ class ImagePreprocessor:
             if not original_moved:
                 return False
             
-            # Ahora procesar la imagen (que ahora está en sin_edit, trabajar con copia)
-            original_in_backup = os.path.join(sin_edit_folder, os.path.basename(image_path))
+            # Ahora procesar la imagen (que ahora está en sin_edit, posiblemente renombrada)
+            original_in_backup = original_moved
             
             # 🔥 CORRECCIÓN: Usar self.Image que ya tiene la compatibilidad configurada
             with self.Image.open(original_in_backup) as img:
@@ -290,8 +318,11 @@ class ImagePreprocessor:
                     if CONFIG['modo_verbose']:
                         print(f"      Guardado como WEBP con calidad: {output_quality}%")
                 
+                registrar_operacion('crear', ruta=os.path.abspath(image_path), origen=os.path.abspath(original_in_backup))
                 img.save(image_path, **save_kwargs)
                 self.processed_count += 1
+                if self.inventario is not None:
+                    self.inventario.agregar(image_path)
                 
                 if CONFIG['modo_verbose']:
                     print(f"      ✅ Procesamiento completado")
@@ -328,6 +359,13 @@ class ImagePreprocessor:
         
         images = self.find_images_needing_processing(folder_path)
         
+        # Al reanudar una ejecución interrumpida, no repetir las ya procesadas
+        if self.punto_control is not None:
+            pendientes = [image_path for image_path in images if not self.punto_control.procesado(image_path)]
+            if len(pendientes) < len(images):
+                print(f"⏭️  {len(images) - len(pendientes)} imágenes ya procesadas en la ejecución interrumpida")
+            images = pendientes
+        
         if not images:
             print("✅ No se encontraron imágenes para procesar")
             return {
@@ -356,6 +394,8 @@ class ImagePreprocessor:
                 print("-" * 40)
             
             self.process_image(image_path, sin_edit_folder, output_quality, max_dimension)
+            if self.punto_control is not None:
+                self.punto_control.marcar_procesado(image_path)
         
         # Mostrar resumen final
         return self._print_summary()
@@ -367,6 +407,7 @@ class ImagePreprocessor:
         # Limpiar consola antes de mostrar el resumen final si está configurado
         if CONFIG['limpiar_consola']:
             self.limpiar_consola()
+        self.motor.terminar()  # Esperar a los movimientos pendientes y mostrar la velocidad
             
         if CONFIG['modo_verbose']:
             print("\n" + "=" * 50)
@@ -387,7 +428,10 @@ class ImagePreprocessor:
                     try:
                         # Verificar si la carpeta está vacía
                         if not any(os.scandir(self.carpeta_fallos)):
+                            registrar_operacion('eliminar_carpeta', ruta=os.path.abspath(self.carpeta_fallos))
                             shutil.rmtree(self.carpeta_fallos)
+                            if self.inventario is not None:
+                                self.inventario.eliminar_carpeta(self.carpeta_fallos)
                             print(f"\n   🗑️  Carpeta 'fallos' eliminada (estaba vacía)")
                         else:
                             print(f"\n   📁 Carpeta 'fallos' conservada (contiene archivos)")
@@ -414,7 +458,10 @@ class ImagePreprocessor:
                     try:
                         # Verificar si la carpeta está vacía
                         if not any(os.scandir(self.carpeta_fallos)):
+                            registrar_operacion('eliminar_carpeta', ruta=os.path.abspath(self.carpeta_fallos))
                             shutil.rmtree(self.carpeta_fallos)
+                            if self.inventario is not None:
+                                self.inventario.eliminar_carpeta(self.carpeta_fallos)
                             print(f"\n🗑️  Carpeta 'fallos' eliminada (estaba vacía)")
                     except Exception as e:
                         pass  # En modo normal, no mostrar errores de limpieza
@@ -429,13 +476,15 @@ class ImagePreprocessor:
             'movidas_sin_edit': self.moved_count
         }
 
-def preprocesar_imagenes(ruta, modo_automatico=False):
+def preprocesar_imagenes(ruta, modo_automatico=False, inventario=None, punto_control=None):
     """
     Función principal para el pre-procesamiento de imágenes.
     
     Args:
         ruta (str): Ruta de la carpeta a procesar
         modo_automatico (bool): Si es True, salta las confirmaciones
+        inventario (FileInventory): Inventario compartido entre pasos (opcional)
+        punto_control (PuntosControl): Para continuar desde la última imagen procesada (opcional)
         
     Returns:
         dict: Resultados del preprocesamiento para el estado del programa
@@ -491,7 +540,7 @@ def preprocesar_imagenes(ruta, modo_automatico=False):
         print("🖼️  Ejecutando pre-procesamiento automáticamente...\n")
         
         # Procesar imágenes
-        preprocessor = ImagePreprocessor(ruta)
+        preprocessor = ImagePreprocessor(ruta, inventario, punto_control)
         resultados = preprocessor.process_folder(
             ruta, 
             output_quality=85,
@@ -512,7 +561,7 @@ def preprocesar_imagenes(ruta, modo_automatico=False):
             print("🚀 Iniciando pre-procesamiento de imágenes...\n")
             
             # Procesar imágenes
-            preprocessor = ImagePreprocessor(ruta)
+            preprocessor = ImagePreprocessor(ruta, inventario)
             resultados = preprocessor.process_folder(
                 ruta, 
                 output_quality=85,
@@ -0,0 +1,79 @@
+"""
+MÓDULO DE PROGRESO
+Muestra el avance de un paso sin necesidad de un recorrido previo solo para
+contar archivos. Si el total se conoce (por ejemplo, desde el inventario) se
+usa directamente; si no, se estima durante el propio recorrido a partir de
+las carpetas ya visitadas y las que quedan pendientes, y se va ajustando
+hasta ser exacto al terminar.
+"""
+
+class Progreso:
+    """Contador de progreso con total conocido o estimado sobre la marcha"""
+
+    def __init__(self, mensaje, total=None, cada=10):
+        """
+        Args:
+            mensaje (str): Plantilla con {actual} y {total}, por ejemplo
+                "📦 Progreso: {actual}/{total} archivos ordenados"
+            total (int): Total conocido de antemano, None para estimarlo
+            cada (int): Cada cuántas unidades se refresca la línea
+        """
+        self.mensaje = mensaje
+        self.actual = 0
+        self.cada = max(1, cada)
+        self.total_conocido = total is not None
+        self._total = total or 0
+        self._archivos_vistos = 0  # Archivos de las carpetas ya visitadas que cuentan
+        self._carpetas_contadas = 0
+        self._carpetas_pendientes = 1  # La carpeta raíz aún no se ha visitado
+        self._ultimo = None  # Último texto escrito
+
+    def carpeta_visitada(self, num_archivos, num_subcarpetas, contar=True):
+        """
+        Registra una carpeta del recorrido para afinar la estimación del total.
+
+        Args:
+            num_archivos (int): Archivos de la carpeta
+            num_subcarpetas (int): Subcarpetas que quedan por visitar
+            contar (bool): False si los archivos de esta carpeta no se procesarán
+        """
+        self._carpetas_pendientes = max(0, self._carpetas_pendientes - 1) + num_subcarpetas
+        if contar:
+            self._archivos_vistos += num_archivos
+            self._carpetas_contadas += 1
+
+    @property
+    def estimado(self):
+        """Indica si el total mostrado es todavía una estimación"""
+        return not self.total_conocido and self._carpetas_pendientes > 0
+
+    @property
+    def total(self):
+        """Total conocido, o estimado como archivos vistos + carpetas pendientes × media por carpeta"""
+        if self.total_conocido:
+            return self._total
+        media = self._archivos_vistos / self._carpetas_contadas if self._carpetas_contadas else 0
+        return max(self.actual, self._archivos_vistos + int(round(self._carpetas_pendientes * media)))
+
+    def avanzar(self, cantidad=1):
+        """Suma unidades procesadas y refresca la línea de progreso cuando toca"""
+        anterior = self.actual
+        self.actual += cantidad
+        if self.actual // self.cada != anterior // self.cada or (self.total_conocido and self.actual == self._total):
+            self.mostrar()
+
+    def mostrar(self):
+        """Escribe la línea de progreso en su sitio (sin salto de línea)"""
+        total = f"~{self.total}" if self.estimado else f"{self.total}"
+        texto = self.mensaje.format(actual=self.actual, total=total)
+        if texto != self._ultimo:
+            # Espacios finales para borrar restos si la estimación se acorta
+            print(texto + "   ", end='\r')
+            self._ultimo = texto
+
+    def terminar(self):
+        """Muestra el valor final (ya exacto) y pasa a la línea siguiente"""
+        if self._ultimo is not None or self.actual:
+            self._carpetas_pendientes = 0
+            self.mostrar()
+            print()  # Nueva línea después de la barra de progreso
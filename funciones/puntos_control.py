@@ -0,0 +1,149 @@
+"""
+MÓDULO DE PUNTOS DE CONTROL DEL MODO AUTOMÁTICO
+Cada paso del modo automático guarda en ~/.orgest/puntos_control, al
+terminar, sus resultados y la huella del inventario que dejó. Si la
+ejecución se interrumpe, al repetirla sobre la misma carpeta se comprueba
+que la carpeta sigue exactamente como quedó (misma huella y misma
+configuración): los pasos completados se omiten y el paso que quedó a
+medias continúa desde el último elemento procesado. Si algo cambió, se
+empieza desde el principio.
+"""
+
+import hashlib
+import json
+import os
+import time
+
+from .datos_locales import ruta_datos
+
+VERSION_PUNTOS_CONTROL = 1
+SEGUNDOS_GUARDADO = 2.0  # Frecuencia máxima de guardado del avance de un paso a medias
+CLAVES_SIN_EFECTO = ('mostrar_banners', 'pausa_entre_pasos', 'modo_verbose', 'limpiar_consola')
+
+def huella_configuracion():
+    """Devuelve una huella de las opciones de CONFIG que cambian el resultado de los pasos"""
+    from main import CONFIG  # Importar configuración
+
+    opciones = {clave: valor for clave, valor in CONFIG.items() if clave not in CLAVES_SIN_EFECTO}
+    texto = json.dumps(opciones, sort_keys=True, default=str)
+    return hashlib.blake2b(texto.encode('utf-8'), digest_size=8).hexdigest()
+
+class PuntosControl:
+    """Puntos de control de una ejecución del modo automático sobre una carpeta"""
+
+    def __init__(self, ruta):
+        """
+        Args:
+            ruta (str): Carpeta que se organiza
+        """
+        self.ruta = os.path.abspath(ruta)
+        carpeta = ruta_datos("puntos_control")
+        os.makedirs(carpeta, exist_ok=True)
+        nombre = hashlib.blake2b(self.ruta.encode('utf-8', 'surrogateescape'), digest_size=8).hexdigest()
+        self.ruta_archivo = os.path.join(carpeta, nombre + ".json")
+        self.datos = None
+        self.inventario = None
+        self._paso_actual = None
+        self._procesados = set()
+        self._ultimo_guardado = 0.0
+
+    def _cargar(self):
+        """Lee los puntos de control guardados (None si no hay o no son válidos)"""
+        try:
+            with open(self.ruta_archivo, 'r', encoding='utf-8') as archivo:
+                datos = json.load(archivo)
+        except (OSError, ValueError):
+            return None
+        if datos.get('version') != VERSION_PUNTOS_CONTROL or datos.get('ruta') != self.ruta:
+            return None
+        return datos
+
+    def _guardar(self, huella=None):
+        """Escribe los puntos de control de forma atómica (archivo temporal + rename)"""
+        self.datos['huella'] = huella or self.inventario.huella()
+        self.datos['fecha'] = time.time()
+        temporal = self.ruta_archivo + ".tmp"
+        try:
+            with open(temporal, 'w', encoding='utf-8') as archivo:
+                json.dump(self.datos, archivo, ensure_ascii=False, default=str)
+                archivo.flush()
+                os.fsync(archivo.fileno())
+            os.replace(temporal, self.ruta_archivo)
+        except OSError as e:
+            print(f"⚠️  No se pudo guardar el punto de control: {e}")
+        self._ultimo_guardado = time.monotonic()
+
+    def preparar(self, inventario):
+        """
+        Decide qué se puede reanudar de una ejecución interrumpida anterior.
+
+        Args:
+            inventario (FileInventory): Inventario recién construido de la carpeta
+
+        Returns:
+            int: Número de pasos completados que se omitirán
+        """
+        self.inventario = inventario
+        anteriores = self._cargar()
+        huella_config = huella_configuracion()
+
+        if anteriores is not None:
+            if anteriores.get('huella') == inventario.huella() and anteriores.get('configuracion') == huella_config:
+                self.datos = anteriores
+                completados = sum(1 for paso in self.datos['pasos'].values() if paso['estado'] == 'completado')
+                print(f"♻️  Reanudando la ejecución interrumpida: {completados} pasos ya completados se omitirán")
+                return completados
+            print("ℹ️  La carpeta o la configuración cambiaron desde la ejecución interrumpida; se empieza de nuevo")
+
+        self.datos = {'version': VERSION_PUNTOS_CONTROL, 'ruta': self.ruta,
+                      'configuracion': huella_config, 'pasos': {}}
+        return 0
+
+    def completado(self, nombre):
+        """Devuelve los resultados guardados de un paso completado, o None si hay que ejecutarlo"""
+        paso = self.datos['pasos'].get(nombre)
+        if paso is not None and paso['estado'] == 'completado':
+            return paso['resultados']
+        return None
+
+    def empezar(self, nombre):
+        """Marca el comienzo de un paso, recuperando lo que procesó si quedó a medias"""
+        paso = self.datos['pasos'].get(nombre)
+        self._paso_actual = nombre
+        self._procesados = set(paso.get('procesados', [])) if paso is not None else set()
+        self.datos['pasos'][nombre] = {'estado': 'parcial', 'procesados': sorted(self._procesados)}
+
+    def procesado(self, ruta_archivo):
+        """Indica si el paso en curso ya procesó este archivo en la ejecución interrumpida"""
+        return os.path.relpath(ruta_archivo, self.ruta) in self._procesados
+
+    def marcar_procesado(self, ruta_archivo):
+        """
+        Anota un archivo procesado por el paso en curso.
+
+        El avance se guarda como mucho cada SEGUNDOS_GUARDADO segundos.
+        """
+        self._procesados.add(os.path.relpath(ruta_archivo, self.ruta))
+        if time.monotonic() - self._ultimo_guardado >= SEGUNDOS_GUARDADO:
+            self.guardar_avance()
+
+    def guardar_avance(self):
+        """Guarda el avance del paso en curso tal como está ahora"""
+        if self._paso_actual is not None:
+            self.datos['pasos'][self._paso_actual]['procesados'] = sorted(self._procesados)
+            self._guardar()
+
+    def completar(self, nombre, resultados):
+        """Marca un paso como completado con sus resultados y la huella que dejó"""
+        huella = self.inventario.huella()
+        self.datos['pasos'][nombre] = {'estado': 'completado', 'resultados': resultados or {}, 'huella': huella}
+        self._paso_actual = None
+        self._procesados = set()
+        self._guardar(huella)
+
+    def descartar(self):
+        """Borra los puntos de control cuando la ejecución termina entera"""
+        try:
+            os.remove(self.ruta_archivo)
+        except OSError:
+            pass
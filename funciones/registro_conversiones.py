@@ -0,0 +1,186 @@
+"""
+MÓDULO DE REGISTRO DE CONVERSIONES
+Guarda en una base SQLite local qué salida produjo cada conversión, indexada
+por el hash del contenido del archivo de origen y los parámetros de la
+conversión. Así, al repetir las conversiones tras un fallo parcial, un
+origen ya convertido se reconoce con una sola consulta (su hash sale de la
+cache de hashes sin leerlo) y un PNG o MP4 junto al original se sabe si lo
+produjo una ejecución anterior comparando su checksum. Los orígenes con el
+mismo contenido y distinto nombre se convierten una sola vez y el resto de
+salidas son enlaces a la primera.
+
+También se guarda el tamaño de cada origen: un archivo cuyo tamaño no está
+en el registro ni coincide con el de otro origen no puede estar ya
+convertido, así que su hash no se calcula antes de convertir, sino a la vez
+que se lee para la conversión.
+"""
+
+import os
+import shutil
+import sqlite3
+import time
+
+from .datos_locales import ruta_datos
+from .enlaces import crear_reflink
+
+NOMBRE_BASE_REGISTRO = "registro_conversiones.sqlite3"
+VERSION_ESQUEMA_REGISTRO = 2  # Si cambia, el registro anterior se descarta
+LOTE_ESCRITURA_REGISTRO = 100  # Conversiones registradas antes de hacer commit
+
+# Parámetros de cada conversión: si cambian, las salidas anteriores no sirven
+PARAMETROS_CONVERSION = {
+    'webp': 'png',  # WEBP → PNG (Pillow o ffmpeg dan la misma imagen sin pérdidas)
+    'ts': 'mp4 -c copy',  # TS → MP4 sin recodificar
+}
+
+class RegistroConversiones:
+    """Registro persistente de conversiones respaldado por SQLite"""
+
+    def __init__(self, ruta_db):
+        self.ruta_db = ruta_db
+        self._pendientes = 0
+
+        self._conexion = sqlite3.connect(ruta_db)
+        self._conexion.execute("PRAGMA journal_mode=WAL")
+        self._conexion.execute("PRAGMA synchronous=NORMAL")
+        version = self._conexion.execute("PRAGMA user_version").fetchone()[0]
+        if version != VERSION_ESQUEMA_REGISTRO:
+            self._conexion.execute("DROP TABLE IF EXISTS conversiones")
+            self._conexion.execute(f"PRAGMA user_version={VERSION_ESQUEMA_REGISTRO}")
+        self._conexion.execute("""
+            CREATE TABLE IF NOT EXISTS conversiones (
+                algoritmo TEXT NOT NULL,
+                digest_origen TEXT NOT NULL,
+                parametros TEXT NOT NULL,
+                tamanio_origen INTEGER NOT NULL,
+                ruta_salida TEXT NOT NULL,
+                digest_salida TEXT NOT NULL,
+                tamanio_salida INTEGER NOT NULL,
+                fecha INTEGER NOT NULL,
+                PRIMARY KEY (algoritmo, digest_origen, parametros)
+            ) WITHOUT ROWID
+        """)
+        self._conexion.execute("CREATE INDEX IF NOT EXISTS idx_tamanio_origen ON conversiones (parametros, tamanio_origen)")
+        self._conexion.commit()
+
+    def buscar(self, algoritmo, digest_origen, parametros):
+        """
+        Busca la salida registrada para un contenido de origen y unos parámetros.
+
+        Returns:
+            tuple or None: (ruta_salida, digest_salida, tamanio_salida), None si no se convirtió
+        """
+        return self._conexion.execute(
+            "SELECT ruta_salida, digest_salida, tamanio_salida FROM conversiones "
+            "WHERE algoritmo=? AND digest_origen=? AND parametros=?",
+            (algoritmo, digest_origen, parametros)
+        ).fetchone()
+
+    def tamanios_origen(self, parametros):
+        """
+        Devuelve los tamaños de los orígenes ya convertidos con unos parámetros.
+
+        Returns:
+            set: Tamaños en bytes; un origen de otro tamaño no tiene conversión registrada
+        """
+        return {fila[0] for fila in self._conexion.execute(
+            "SELECT DISTINCT tamanio_origen FROM conversiones WHERE parametros=?", (parametros,))}
+
+    def registrar(self, algoritmo, digest_origen, parametros, tamanio_origen, ruta_salida, digest_salida,
+                  tamanio_salida):
+        """Anota la salida de una conversión (sustituye a la anterior del mismo origen)"""
+        self._conexion.execute(
+            "INSERT OR REPLACE INTO conversiones VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (algoritmo, digest_origen, parametros, tamanio_origen, os.path.abspath(ruta_salida), digest_salida,
+             tamanio_salida, int(time.time()))
+        )
+        self._pendientes += 1
+        if self._pendientes >= LOTE_ESCRITURA_REGISTRO:
+            self._conexion.commit()
+            self._pendientes = 0
+
+    def olvidar(self, algoritmo, digest_origen, parametros):
+        """Elimina una conversión cuya salida ya no existe o cambió"""
+        self._conexion.execute(
+            "DELETE FROM conversiones WHERE algoritmo=? AND digest_origen=? AND parametros=?",
+            (algoritmo, digest_origen, parametros)
+        )
+        self._pendientes += 1
+
+    def cerrar(self):
+        """Confirma los cambios pendientes y cierra la conexión"""
+        self._conexion.commit()
+        self._conexion.close()
+
+def abrir_registro_conversiones():
+    """
+    Abre el registro de conversiones si está activado en CONFIG.
+
+    Returns:
+        RegistroConversiones or None: Registro listo para usar, None si está desactivado o no se pudo abrir
+    """
+    from main import CONFIG  # Importar configuración
+
+    if not CONFIG['usar_registro_conversiones']:
+        return None
+    try:
+        return RegistroConversiones(ruta_datos(NOMBRE_BASE_REGISTRO))
+    except (sqlite3.Error, OSError) as e:
+        print(f"⚠️  No se pudo abrir el registro de conversiones, se convertirá todo de nuevo: {e}")
+        return None
+
+def salida_registrada(registro, algoritmo, digest_origen, parametros):
+    """
+    Devuelve la salida registrada de una conversión si sigue intacta.
+
+    Se comprueba que existe con el mismo tamaño y checksum; el checksum suele
+    salir de la cache de hashes sin leer el archivo.
+
+    Returns:
+        tuple or None: (ruta_salida, digest_salida) si sigue válida, None si no hay o ya no coincide
+    """
+    from .duplicados import calcular_hash_archivo
+
+    entrada = registro.buscar(algoritmo, digest_origen, parametros)
+    if entrada is None:
+        return None
+    ruta_salida, digest_salida, tamanio_salida = entrada
+    try:
+        valida = os.path.getsize(ruta_salida) == tamanio_salida
+    except OSError:
+        valida = False
+    if valida and calcular_hash_archivo(ruta_salida, algoritmo) == digest_salida:
+        return ruta_salida, digest_salida
+    registro.olvidar(algoritmo, digest_origen, parametros)
+    return None
+
+def enlazar_salida(existente, nueva):
+    """
+    Crea 'nueva' con el mismo contenido que una salida ya convertida.
+
+    Se usa un reflink si el sistema de archivos lo admite, si no un enlace
+    duro y, entre discos distintos, una copia. Se crea con un nombre temporal
+    y se renombra, así que 'nueva' nunca queda a medias.
+
+    Returns:
+        str: 'reflink', 'hardlink' o 'copia'
+    """
+    carpeta, nombre = os.path.split(nueva)
+    temporal = os.path.join(carpeta, f".{nombre}.orgest_tmp")
+    try:
+        try:
+            crear_reflink(existente, temporal)
+            tipo = 'reflink'
+        except OSError:
+            try:
+                os.link(existente, temporal)
+                tipo = 'hardlink'
+            except OSError:
+                shutil.copy2(existente, temporal)
+                tipo = 'copia'
+        os.replace(temporal, nueva)
+    except OSError:
+        if os.path.lexists(temporal):
+            os.remove(temporal)
+        raise
+    return tipo
@@ -0,0 +1,477 @@
+"""
+MÓDULO DE DETECCIÓN DE IMÁGENES Y VIDEOS CASI DUPLICADOS
+Encuentra copias de una misma imagen aunque no sean idénticas byte a byte
+(redimensionadas, recomprimidas o convertidas de WEBP a PNG) usando un hash
+perceptual (dHash) de 64 bits y un índice BK-tree para buscar por distancia
+de Hamming sin comparar todos los pares.
+
+Para videos (mismo clip en .ts y .mp4, o con otro bitrate) se extraen con
+ffmpeg unos pocos fotogramas en posiciones relativas fijas y se comparan sus
+dHash, agrupando antes por duración.
+"""
+
+import bisect
+import os
+import subprocess
+
+from .cache_hashes import obtener_cache_hashes, guardar_cache_hashes
+from .calidad import ordenar_por_calidad
+from .duplicados import calcular_en_paralelo, obtener_hilos_hash, mover_duplicados_a_basura
+
+EXTENSIONES_IMAGEN_SIMILAR = frozenset(('.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.tif', '.webp'))
+EXTENSIONES_VIDEO_SIMILAR = frozenset(('.mp4', '.avi', '.mov', '.mkv', '.wmv', '.flv', '.mpeg', '.mpg', '.ts'))
+LADO_HASH = 8  # dHash de 8x8 = 64 bits
+CARPETAS_EXCLUIDAS = ("basura", "sin_edit", "fallos")
+POSICIONES_FOTOGRAMAS = (0.1, 0.3, 0.5, 0.7, 0.9)  # Posiciones relativas de los fotogramas muestreados
+TOLERANCIA_DURACION = 0.02  # Diferencia relativa de duración admitida entre copias
+TOLERANCIA_DURACION_MINIMA = 1.0  # Segundos de diferencia admitidos como mínimo
+
+def distancia_hamming(hash_a, hash_b):
+    """Cuenta los bits distintos entre dos hashes perceptuales"""
+    return bin(hash_a ^ hash_b).count('1')
+
+class BKTree:
+    """
+    Árbol BK para buscar hashes dentro de un radio de distancia de Hamming.
+
+    Cada nodo guarda sus hijos por distancia; la desigualdad triangular permite
+    descartar ramas enteras, así que una búsqueda con radio pequeño visita solo
+    una fracción de los nodos.
+    """
+
+    def __init__(self):
+        self.raiz = None  # Nodo: [hash, valor, {distancia: nodo_hijo}]
+        self.total = 0
+
+    def agregar(self, hash_imagen, valor):
+        """Inserta un hash con el valor asociado (por ejemplo, la ruta del archivo)"""
+        self.total += 1
+        if self.raiz is None:
+            self.raiz = [hash_imagen, valor, {}]
+            return
+
+        nodo = self.raiz
+        while True:
+            distancia = distancia_hamming(hash_imagen, nodo[0])
+            hijo = nodo[2].get(distancia)
+            if hijo is None:
+                nodo[2][distancia] = [hash_imagen, valor, {}]
+                return
+            nodo = hijo
+
+    def buscar(self, hash_imagen, radio):
+        """
+        Busca todos los valores cuyo hash está a distancia <= radio.
+
+        Args:
+            hash_imagen (int): Hash a buscar
+            radio (int): Distancia de Hamming máxima
+
+        Returns:
+            list: Lista de (distancia, valor) ordenada por distancia
+        """
+        encontrados = []
+        pendientes = [self.raiz] if self.raiz is not None else []
+
+        while pendientes:
+            nodo = pendientes.pop()
+            distancia = distancia_hamming(hash_imagen, nodo[0])
+            if distancia <= radio:
+                encontrados.append((distancia, nodo[1]))
+            for distancia_hijo, hijo in nodo[2].items():
+                if distancia - radio <= distancia_hijo <= distancia + radio:
+                    pendientes.append(hijo)
+
+        encontrados.sort(key=lambda elemento: elemento[0])
+        return encontrados
+
+def _dhash_desde_pixeles(pixeles):
+    """Calcula el dHash a partir de una imagen en grises de (LADO_HASH + 1) x LADO_HASH píxeles"""
+    valor = 0
+    for fila in range(LADO_HASH):
+        inicio = fila * (LADO_HASH + 1)
+        for columna in range(LADO_HASH):
+            valor = (valor << 1) | (pixeles[inicio + columna] > pixeles[inicio + columna + 1])
+    return valor
+
+def calcular_dhash(ruta_imagen):
+    """
+    Calcula el hash perceptual dHash de 64 bits de una imagen.
+
+    Pide a Pillow una decodificación reducida (draft) para no descomprimir la
+    imagen completa cuando el formato lo permite (JPEG), y consulta la cache
+    de hashes para no repetir el cálculo en ejecuciones posteriores.
+
+    Args:
+        ruta_imagen (str): Ruta completa a la imagen
+
+    Returns:
+        int or None: Hash perceptual, None si la imagen no se pudo leer
+    """
+    from PIL import Image
+
+    try:
+        info_stat = os.stat(ruta_imagen)
+        cache = obtener_cache_hashes()
+        if cache is not None:
+            guardado = cache.obtener(info_stat, 'dhash', 'imagen')
+            if guardado:
+                return int(guardado, 16)
+
+        with Image.open(ruta_imagen) as img:
+            img.draft('L', (LADO_HASH * 8, LADO_HASH * 8))  # Decodificación reducida si es posible
+            reducida = img.convert('L').resize((LADO_HASH + 1, LADO_HASH), Image.BILINEAR)
+            pixeles = list(reducida.getdata())
+
+        valor = _dhash_desde_pixeles(pixeles)
+
+        if cache is not None:
+            cache.guardar(info_stat, 'dhash', 'imagen', f"{valor:016x}")
+        return valor
+
+    except Exception:
+        return None
+
+def _separar_conservados(grupos, etiqueta):
+    """
+    Elige la mejor copia de cada grupo de similares y devuelve las demás.
+
+    Args:
+        grupos (list): Grupos de rutas [referencia, similar1, ...]
+        etiqueta (str): Texto para los mensajes en modo verbose
+
+    Returns:
+        list: Rutas de las copias que no se conservan
+    """
+    from main import CONFIG  # Importar configuración para modo verbose
+
+    similares = []
+    for grupo in ordenar_por_calidad(grupos):
+        conservado = grupo[0]
+        for ruta_archivo in grupo[1:]:
+            similares.append(ruta_archivo)
+            if CONFIG['modo_verbose']:
+                print(f"   🔍 {etiqueta}: {os.path.basename(ruta_archivo)} ≈ {os.path.basename(conservado)}")
+    return similares
+
+def encontrar_imagenes_similares(ruta, distancia_maxima=None, inventario=None):
+    """
+    Busca imágenes casi duplicadas en una carpeta.
+
+    Se recorre la carpeta en orden y cada imagen se busca en el BK-tree de
+    las anteriores: si hay alguna dentro del radio, pasa a su grupo. De cada
+    grupo se conserva la mejor copia según CONFIG['criterios_conservar']
+    (mayor resolución, con EXIF...).
+
+    Args:
+        ruta (str): Ruta de la carpeta a escanear
+        distancia_maxima (int): Bits distintos permitidos; por defecto CONFIG['distancia_similitud']
+        inventario (FileInventory): Inventario compartido entre pasos (opcional)
+
+    Returns:
+        tuple: (lista_de_similares, total_imagenes_analizadas)
+    """
+    from main import CONFIG  # Importar configuración para modo verbose
+
+    if distancia_maxima is None:
+        distancia_maxima = CONFIG['distancia_similitud']
+
+    if CONFIG['modo_verbose']:
+        print("🧩 INICIANDO BÚSQUEDA DE IMÁGENES SIMILARES...")
+        print(f"📁 Ruta: {ruta}")
+        print(f"📏 Distancia máxima: {distancia_maxima} bits de {LADO_HASH * LADO_HASH}")
+    else:
+        print("🧩 Buscando imágenes similares...")
+
+    imagenes = []
+    recorrido = inventario.recorrer(ruta) if inventario is not None else os.walk(ruta)
+    for root, dirs, files in recorrido:
+        if any(x in root for x in CARPETAS_EXCLUIDAS):
+            continue
+        for archivo in files:
+            if os.path.splitext(archivo)[1].lower() in EXTENSIONES_IMAGEN_SIMILAR:
+                imagenes.append(os.path.join(root, archivo))
+
+    total_imagenes = len(imagenes)
+    if CONFIG['modo_verbose']:
+        print(f"📊 IMÁGENES A ANALIZAR: {total_imagenes}")
+    else:
+        print(f"📁 Imágenes a analizar: {total_imagenes}")
+
+    progreso = {'procesadas': 0}
+
+    def mostrar_progreso(ruta_imagen):
+        """Actualiza el progreso desde el hilo principal"""
+        progreso['procesadas'] += 1
+        procesadas = progreso['procesadas']
+        if CONFIG['modo_verbose']:
+            if procesadas % 5 == 0 or procesadas == total_imagenes:
+                print(f"   🖼️  Analizando: {os.path.basename(ruta_imagen)} ({procesadas}/{total_imagenes})")
+        elif procesadas % 10 == 0 or procesadas == total_imagenes:
+            print(f"🧩 Progreso: {procesadas}/{total_imagenes} imágenes analizadas", end='\r')
+
+    tareas = [(orden, (ruta_imagen,)) for orden, ruta_imagen in enumerate(imagenes)]
+    hashes = calcular_en_paralelo(calcular_dhash, tareas, obtener_hilos_hash(), mostrar_progreso)
+    guardar_cache_hashes()
+
+    if not CONFIG['modo_verbose'] and total_imagenes > 0:
+        print()
+
+    indice = BKTree()
+    grupos = {}  # Imagen de referencia del BK-tree -> [referencia, similar1, ...]
+    for orden, ruta_imagen in enumerate(imagenes):
+        hash_imagen = hashes[orden]
+        if hash_imagen is None:
+            continue
+        coincidencias = indice.buscar(hash_imagen, distancia_maxima)
+        if coincidencias:
+            original = coincidencias[0][1]
+            grupos[original].append(ruta_imagen)
+        else:
+            indice.agregar(hash_imagen, ruta_imagen)
+            grupos[ruta_imagen] = [ruta_imagen]
+
+    similares = _separar_conservados([grupo for grupo in grupos.values() if len(grupo) > 1], "SIMILAR")
+
+    if CONFIG['modo_verbose']:
+        print(f"✅ BÚSQUEDA COMPLETADA: {len(similares)} imágenes similares encontradas")
+
+    return similares, total_imagenes
+
+def obtener_duracion_video(ruta_video):
+    """
+    Obtiene la duración de un video en segundos con ffprobe.
+
+    Args:
+        ruta_video (str): Ruta completa al video
+
+    Returns:
+        float or None: Duración en segundos, None si no se pudo leer
+    """
+    comando = ['ffprobe', '-v', 'error', '-show_entries', 'format=duration',
+               '-of', 'default=noprint_wrappers=1:nokey=1', ruta_video]
+    try:
+        resultado = subprocess.run(comando, capture_output=True, text=True, timeout=60)
+        return float(resultado.stdout.strip())
+    except (ValueError, OSError, subprocess.TimeoutExpired):
+        return None
+
+def _extraer_fotograma_reducido(ruta_video, segundo):
+    """Extrae con ffmpeg un fotograma en grises de (LADO_HASH + 1) x LADO_HASH píxeles"""
+    tamanio_fotograma = (LADO_HASH + 1) * LADO_HASH
+    comando = ['ffmpeg', '-v', 'error', '-ss', f"{segundo:.3f}", '-i', ruta_video,
+               '-frames:v', '1', '-vf', f"scale={LADO_HASH + 1}:{LADO_HASH},format=gray",
+               '-f', 'rawvideo', '-']
+    resultado = subprocess.run(comando, capture_output=True, timeout=120)
+    if resultado.returncode != 0 or len(resultado.stdout) < tamanio_fotograma:
+        return None
+    return resultado.stdout[:tamanio_fotograma]
+
+def calcular_huella_video(ruta_video):
+    """
+    Calcula la huella perceptual de un video: su duración y el dHash de varios fotogramas.
+
+    Los fotogramas se toman en posiciones relativas fijas (10%, 30%...), así
+    que dos copias del mismo clip con distinto contenedor o bitrate producen
+    huellas casi iguales. La huella se guarda en la cache por identidad de
+    archivo para calcularla una sola vez.
+
+    Args:
+        ruta_video (str): Ruta completa al video
+
+    Returns:
+        tuple or None: (duracion, [dhash, ...]), None si el video no se pudo leer
+    """
+    try:
+        info_stat = os.stat(ruta_video)
+        cache = obtener_cache_hashes()
+        if cache is not None:
+            guardado = cache.obtener(info_stat, 'dhash', 'video')
+            if guardado:
+                duracion, hashes = guardado.split('|')
+                return float(duracion), [int(valor, 16) for valor in hashes.split(',')]
+
+        duracion = obtener_duracion_video(ruta_video)
+        if not duracion:
+            return None
+
+        hashes = []
+        for posicion in POSICIONES_FOTOGRAMAS:
+            fotograma = _extraer_fotograma_reducido(ruta_video, duracion * posicion)
+            if fotograma is None:
+                return None
+            hashes.append(_dhash_desde_pixeles(fotograma))
+
+        if cache is not None:
+            cache.guardar(info_stat, 'dhash', 'video',
+                          f"{duracion:.3f}|" + ",".join(f"{valor:016x}" for valor in hashes))
+        return duracion, hashes
+
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+
+def _duraciones_compatibles(duracion_a, duracion_b):
+    """Indica si dos duraciones son lo bastante parecidas para ser el mismo clip"""
+    tolerancia = max(TOLERANCIA_DURACION_MINIMA, TOLERANCIA_DURACION * max(duracion_a, duracion_b))
+    return abs(duracion_a - duracion_b) <= tolerancia
+
+def encontrar_videos_similares(ruta, distancia_maxima=None, inventario=None):
+    """
+    Busca videos casi duplicados en una carpeta.
+
+    Las huellas se calculan en paralelo (cada fotograma es un proceso ffmpeg).
+    Después, cada video solo se compara con los de referencia de duración
+    compatible, localizados por búsqueda binaria sobre la lista ordenada por
+    duración, en lugar de con todos los pares. De cada grupo se conserva el
+    video de mayor resolución y bitrate según CONFIG['criterios_conservar'].
+
+    Args:
+        ruta (str): Ruta de la carpeta a escanear
+        distancia_maxima (int): Bits distintos permitidos por fotograma; por defecto CONFIG['distancia_similitud']
+        inventario (FileInventory): Inventario compartido entre pasos (opcional)
+
+    Returns:
+        tuple: (lista_de_similares, total_videos_analizados)
+    """
+    from main import CONFIG  # Importar configuración para modo verbose
+
+    if distancia_maxima is None:
+        distancia_maxima = CONFIG['distancia_similitud']
+
+    if CONFIG['modo_verbose']:
+        print("🎞️  INICIANDO BÚSQUEDA DE VIDEOS SIMILARES...")
+        print(f"📁 Ruta: {ruta}")
+    else:
+        print("🎞️  Buscando videos similares...")
+
+    videos = []
+    recorrido = inventario.recorrer(ruta) if inventario is not None else os.walk(ruta)
+    for root, dirs, files in recorrido:
+        if any(x in root for x in CARPETAS_EXCLUIDAS):
+            continue
+        for archivo in files:
+            if os.path.splitext(archivo)[1].lower() in EXTENSIONES_VIDEO_SIMILAR:
+                videos.append(os.path.join(root, archivo))
+
+    total_videos = len(videos)
+    if CONFIG['modo_verbose']:
+        print(f"📊 VIDEOS A ANALIZAR: {total_videos}")
+    else:
+        print(f"📁 Videos a analizar: {total_videos}")
+
+    progreso = {'procesados': 0}
+
+    def mostrar_progreso(ruta_video):
+        """Actualiza el progreso desde el hilo principal"""
+        progreso['procesados'] += 1
+        procesados = progreso['procesados']
+        if CONFIG['modo_verbose']:
+            print(f"   🎞️  Huella calculada: {os.path.basename(ruta_video)} ({procesados}/{total_videos})")
+        elif procesados % 5 == 0 or procesados == total_videos:
+            print(f"🎞️  Progreso: {procesados}/{total_videos} videos analizados", end='\r')
+
+    tareas = [(orden, (ruta_video,)) for orden, ruta_video in enumerate(videos)]
+    huellas = calcular_en_paralelo(calcular_huella_video, tareas, obtener_hilos_hash(), mostrar_progreso)
+    guardar_cache_hashes()
+
+    if not CONFIG['modo_verbose'] and total_videos > 0:
+        print()
+
+    conservados = []  # Lista ordenada de (duracion, orden) de videos de referencia
+    grupos = {}  # Video de referencia -> [referencia, similar1, ...]
+    for orden, ruta_video in enumerate(videos):
+        huella = huellas[orden]
+        if huella is None:
+            continue
+        duracion, hashes = huella
+
+        # Solo comparar con videos conservados de duración parecida
+        tolerancia = max(TOLERANCIA_DURACION_MINIMA, TOLERANCIA_DURACION * duracion)
+        inicio = bisect.bisect_left(conservados, (duracion - tolerancia, -1))
+        original = None
+        for duracion_otro, orden_otro in conservados[inicio:]:
+            if duracion_otro > duracion + tolerancia:
+                break
+            if not _duraciones_compatibles(duracion, duracion_otro):
+                continue
+            hashes_otro = huellas[orden_otro][1]
+            if all(distancia_hamming(a, b) <= distancia_maxima for a, b in zip(hashes, hashes_otro)):
+                original = videos[orden_otro]
+                break
+
+        if original is not None:
+            grupos[original].append(ruta_video)
+        else:
+            bisect.insort(conservados, (duracion, orden))
+            grupos[ruta_video] = [ruta_video]
+
+    similares = _separar_conservados([grupo for grupo in grupos.values() if len(grupo) > 1], "VIDEO SIMILAR")
+
+    if CONFIG['modo_verbose']:
+        print(f"✅ BÚSQUEDA COMPLETADA: {len(similares)} videos similares encontrados")
+
+    return similares, total_videos
+
+def eliminar_similares(ruta, modo_automatico=False, inventario=None):
+    """
+    Función principal para mover imágenes y videos casi duplicados a la carpeta basura.
+
+    Los videos solo se analizan si ffmpeg está disponible.
+
+    Args:
+        ruta (str): Ruta de la carpeta a procesar
+        modo_automatico (bool): Si es True, no pide confirmación antes de mover
+        inventario (FileInventory): Inventario compartido entre pasos (opcional)
+
+    Returns:
+        dict: Resultados del proceso para el estado del programa
+    """
+    from main import CONFIG  # Importar configuración para modo verbose
+    from .preprocesador import check_dependencies
+    from .herramientas import ffmpeg_disponible, ffprobe_disponible
+
+    resultados = {
+        'total_imagenes': 0,
+        'total_videos': 0,
+        'similares_encontradas': 0,
+        'similares_movidas': 0
+    }
+    similares = []
+
+    if check_dependencies():
+        similares_imagenes, resultados['total_imagenes'] = encontrar_imagenes_similares(ruta, inventario=inventario)
+        similares.extend(similares_imagenes)
+        print(f"📊 Imágenes analizadas: {resultados['total_imagenes']}")
+        print(f"🧩 Imágenes similares encontradas: {len(similares_imagenes)}")
+    else:
+        print("⚠️  Se necesita Pillow para comparar imágenes. Se omitirán las imágenes.")
+
+    if ffmpeg_disponible() and ffprobe_disponible():
+        similares_videos, resultados['total_videos'] = encontrar_videos_similares(ruta, inventario=inventario)
+        similares.extend(similares_videos)
+        print(f"📊 Videos analizados: {resultados['total_videos']}")
+        print(f"🎞️  Videos similares encontrados: {len(similares_videos)}")
+    else:
+        print("⚠️  Se necesitan ffmpeg y ffprobe para comparar videos. Se omitirán los videos.")
+
+    resultados['similares_encontradas'] = len(similares)
+
+    if not similares:
+        print("✅ No se encontraron archivos similares.")
+        return resultados
+
+    if not modo_automatico:
+        print("💡 Las copias similares se moverán a 'basura' para que las revises.")
+        respuesta = input("¿Mover los archivos similares a 'basura'? (s/n): ").strip().lower()
+        if respuesta not in ('s', 'si', 'sí', 'y', 'yes'):
+            print("✅ Archivos similares conservados")
+            return resultados
+
+    resultados['similares_movidas'] = mover_duplicados_a_basura(ruta, similares, inventario)
+
+    if CONFIG['modo_verbose']:
+        print(f"🗑️  ARCHIVOS SIMILARES MOVIDOS A BASURA: {resultados['similares_movidas']}")
+    else:
+        print(f"🗑️  Archivos similares movidos a basura: {resultados['similares_movidas']}")
+
+    return resultados
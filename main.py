@@ -13,12 +13,19 @@ sys.path.append(os.path.join(os.path.dirname(__file__), 'funciones'))
 
 # Importar funciones específicas de cada módulo
 try:
-    from funciones.duplicados import eliminar_duplicados, verificar_duplicados
+    from funciones.duplicados import eliminar_duplicados, verificar_duplicados, eliminar_duplicados_multiples
+    from funciones.cache_hashes import IndiceIdentidad, cerrar_cache_hashes
+    from funciones.inventario import FileInventory
     from funciones.ordenar import organizar_archivos_carpetas
+    from funciones.planificador import organizar_archivos_planificado
     from funciones.conversiones import convertir_formatos_archivos
     from funciones.extraer import extraer_archivos_raiz
     from funciones.preprocesador import preprocesar_imagenes
     from funciones.limpieza_final import limpiar_carpetas_temporales
+    from funciones.similares import eliminar_similares
+    from funciones.puntos_control import PuntosControl
+    from funciones.diario import (abrir_diario, cerrar_diario, obtener_diario, buscar_diarios,
+                                  reanudar_diario, revertir_diario)
 except ImportError as e:
     print(f"❌ Error: No se pudieron cargar los módulos necesarios: {e}")
     print("Asegúrate de que todos los archivos estén en la carpeta 'funciones'")
@@ -29,7 +36,26 @@ CONFIG = {
     'mostrar_banners': True,
     'pausa_entre_pasos': True,  # Valor por defecto - se puede cambiar en modo automático
     'modo_verbose': False,
-    'limpiar_consola': True
+    'limpiar_consola': True,
+    'usar_cache_hashes': True,  # Reutilizar hashes de archivos sin cambios entre ejecuciones
+    'hilos_hash': 0,  # Hilos para calcular hashes (0 = automático según los núcleos)
+    'algoritmo_hash': 'auto',  # 'auto' (xxHash si está instalado, si no BLAKE2b), 'md5', 'sha256', 'blake2b'...
+    'tamanio_bloque_hash': 1024 * 1024,  # Bytes por lectura al calcular hashes
+    'umbral_mmap_hash': 0,  # Usar mmap en archivos desde este tamaño (0 = desactivado)
+    'distancia_similitud': 6,  # Bits distintos (de 64) para considerar similares dos imágenes o fotogramas
+    'modo_duplicados': 'basura',  # 'basura' (mover), 'enlace' (reflink o enlace duro), 'reflink' o 'hardlink'
+    'criterios_conservar': [],  # Qué copia conservar de cada grupo, en orden de importancia (vacío = la primera encontrada; ej. ['rutas_preferidas', 'evitar_temporales', 'resolucion', 'bitrate', 'exif', 'mas_antiguo'])
+    'rutas_preferidas': [],  # Prefijos de ruta cuyas copias se prefieren (ej. ['~/Fotos/Archivo'])
+    'hilos_copia': 0,  # Hilos para mover archivos a otro disco (0 = automático)
+    'clasificar_por_contenido': True,  # Reconocer imágenes y videos por sus primeros bytes, no solo por la extensión
+    'carpetas_por_fecha': False,  # Repartir en Imagenes/AAAA/MM y Videos/AAAA/MM (fecha EXIF o de modificación)
+    'planificar_movimientos': True,  # Modo automático: calcular el destino final y mover cada archivo una sola vez
+    'usar_diario': True,  # Anotar cada movimiento en ~/.orgest/diarios para reanudar o deshacer
+    'diario_sincronizacion': 'lotes',  # 'ninguna', 'lotes' o 'estricta' (fsync de cada operación)
+    'conversiones_simultaneas': 0,  # Procesos de ffmpeg que recodifican (WEBP → PNG) a la vez (0 = uno por núcleo)
+    'remux_simultaneos': 0,  # Procesos de ffmpeg que solo cambian de contenedor (TS → MP4) a la vez (0 = automático)
+    'conversor_webp': 'pillow',  # 'pillow' (en el propio programa; ffmpeg solo si Pillow no puede) o 'ffmpeg'
+    'usar_registro_conversiones': True  # Recordar cada conversión por el hash del original para no repetirla
 }
 
 class EstadoPrograma:
@@ -155,27 +181,177 @@ def obtener_ruta():
         else:
             return os.path.abspath(ruta)  # Retornar ruta absoluta
 
-def contar_archivos_totales(ruta):
+def obtener_carpetas_adicionales(ruta):
+    """
+    Solicita las carpetas extra a comparar con la ruta actual y cuáles son autoritativas.
+    
+    Args:
+        ruta (str): Ruta actual, siempre incluida en la comparación
+        
+    Returns:
+        tuple: (lista de carpetas, lista de carpetas autoritativas)
+    """
+    rutas = [ruta]
+    print("📁 Ingresa otras carpetas a comparar (una por línea, Enter vacío para terminar):")
+    
+    while True:
+        carpeta = input(f"📁 Carpeta {len(rutas) + 1}: ").strip()
+        if not carpeta:
+            break
+        
+        carpeta = os.path.expanduser(carpeta)
+        if not os.path.isdir(carpeta):
+            print(f"❌ La ruta '{carpeta}' no existe o no es una carpeta.")
+        elif os.path.abspath(carpeta) in rutas:
+            print("⚠️  Esa carpeta ya está en la lista.")
+        else:
+            rutas.append(os.path.abspath(carpeta))
+    
+    print("\n📋 Carpetas a comparar:")
+    for i, carpeta in enumerate(rutas, 1):
+        print(f"   {i}. {carpeta}")
+    
+    seleccion = input("⭐ Números de las carpetas autoritativas, cuyas copias se conservan siempre "
+                      "(separados por comas, Enter para ninguna): ").strip()
+    autoritativas = []
+    for numero in seleccion.replace(' ', '').split(','):
+        if numero.isdigit() and 1 <= int(numero) <= len(rutas):
+            autoritativas.append(rutas[int(numero) - 1])
+        elif numero:
+            print(f"⚠️  Número ignorado: {numero}")
+    
+    return rutas, autoritativas
+
+def contar_archivos_totales(ruta, inventario=None):
     """
     Cuenta el total de archivos en una carpeta (para estadísticas).
     
     Args:
         ruta (str): Ruta de la carpeta a contar
+        inventario (FileInventory): Inventario ya construido; evita recorrer el disco
         
     Returns:
         int: Total de archivos en la carpeta
     """
-    total_archivos = 0
     try:
-        for root, dirs, files in os.walk(ruta):
-            # Excluir carpetas del sistema
-            if any(x in root for x in ["basura", "fallos", "sin_edit"]):
-                continue
-            total_archivos += len(files)
-        return total_archivos
+        if inventario is None:
+            inventario = FileInventory(ruta)
+        # Excluir carpetas del sistema
+        return inventario.contar(ruta, excluir=["basura", "fallos", "sin_edit"])
     except Exception:
         return 0
 
+def contar_movimientos(entradas):
+    """Cuenta los movimientos anotados en las entradas de un diario"""
+    return sum(1 for entrada in entradas if entrada.get('op') == 'mover')
+
+def revisar_diario_interrumpido(ruta):
+    """
+    Ofrece completar o deshacer la última ejecución interrumpida sobre la carpeta.
+    
+    Args:
+        ruta (str): Ruta de la carpeta a organizar
+    """
+    if not CONFIG['usar_diario']:
+        return
+    diarios = buscar_diarios(ruta, estados=('interrumpido',))
+    if not diarios:
+        return
+    
+    ruta_diario, entradas = diarios[0]
+    print("⚠️  La última ejecución sobre esta carpeta se interrumpió a mitad")
+    print(f"   📝 {entradas[0].get('descripcion') or 'Ejecución'}: {contar_movimientos(entradas)} movimientos anotados")
+    print("1. ▶️  Completar los movimientos pendientes")
+    print("2. ↩️  Deshacer todo lo que hizo")
+    print("3. ⏭️  Ignorar")
+    
+    while True:
+        opcion = input("\nSelecciona una opción (1-3): ").strip()
+        if opcion == "1":
+            resultados = reanudar_diario(ruta_diario)
+            print(f"✅ Movimientos completados: {resultados['completados']} "
+                  f"(ya hechos: {resultados['hechos']}, perdidos: {resultados['perdidos']}, "
+                  f"en conflicto: {resultados['conflictos']}, errores: {resultados['errores']})")
+            break
+        elif opcion == "2":
+            resultados = revertir_diario(ruta_diario)
+            print(f"✅ Archivos restaurados: {resultados['restaurados']} "
+                  f"(irreversibles: {resultados['irreversibles']}, errores: {resultados['errores']})")
+            break
+        elif opcion == "3":
+            break
+        else:
+            print("❌ Opción no válida. Por favor selecciona 1, 2 o 3.")
+    esperar_continuar()
+
+def deshacer_ultima_ejecucion(ruta):
+    """
+    Deshace la última ejecución sobre la carpeta usando su diario.
+    
+    Args:
+        ruta (str): Ruta de la carpeta organizada
+    """
+    diarios = buscar_diarios(ruta, estados=('completado', 'interrumpido'))
+    if not diarios:
+        print("ℹ️  No hay ninguna ejecución anotada que deshacer en esta carpeta.")
+        return None
+    
+    ruta_diario, entradas = diarios[0]
+    fecha = datetime.fromtimestamp(entradas[0].get('fecha', 0)).strftime('%Y-%m-%d %H:%M')
+    print(f"📝 Última ejecución: {entradas[0].get('descripcion') or 'Ejecución'} ({fecha})")
+    print(f"   🚚 {contar_movimientos(entradas)} movimientos anotados")
+    print("⚠️  Los archivos eliminados definitivamente (al vaciar 'basura') no se pueden recuperar.")
+    
+    while True:
+        respuesta = input("\n¿Deshacer esta ejecución? (s/n): ").strip().lower()
+        if respuesta in ['s', 'si', 'sí', 'y', 'yes']:
+            break
+        elif respuesta in ['n', 'no']:
+            print("❌ Operación cancelada.")
+            return None
+        else:
+            print("❌ Respuesta no válida. Por favor responde 's' o 'n'.")
+    
+    resultados = revertir_diario(ruta_diario)
+    print("\n📊 RESUMEN:")
+    print(f"↩️  Archivos devueltos a su sitio: {resultados['restaurados']}")
+    print(f"🗑️  Archivos creados eliminados: {resultados['borrados']}")
+    print(f"📁 Carpetas restauradas: {resultados['carpetas']}")
+    if resultados['irreversibles']:
+        print(f"⚠️  Operaciones irreversibles: {resultados['irreversibles']}")
+    if resultados['errores']:
+        print(f"❌ Errores: {resultados['errores']}")
+    return resultados
+
+def ejecutar_paso(puntos, nombre, funcion, *args, **kwargs):
+    """
+    Ejecuta un paso del modo automático guardando su punto de control.
+    
+    Si el paso ya se completó en una ejecución interrumpida y la carpeta no
+    cambió desde entonces, no se repite y se devuelven sus resultados guardados.
+    
+    Args:
+        puntos (PuntosControl): Puntos de control de la ejecución
+        nombre (str): Nombre del paso
+        funcion (callable): Función del paso; recibe el resto de argumentos
+        
+    Returns:
+        dict: Resultados del paso
+    """
+    resultados = puntos.completado(nombre)
+    if resultados is not None:
+        print(f"⏭️  Paso ya completado en la ejecución anterior, se omite: {nombre}")
+        return resultados
+    
+    puntos.empezar(nombre)
+    try:
+        resultados = funcion(*args, **kwargs)
+    except BaseException:
+        puntos.guardar_avance()  # Guardar hasta dónde llegó antes de propagar el error o Ctrl+C
+        raise
+    puntos.completar(nombre, resultados)
+    return resultados
+
 def ejecutar_modo_automatico(ruta, estado):
     """
     Ejecuta todos los pasos de organización en secuencia automática.
@@ -187,8 +363,15 @@ def ejecutar_modo_automatico(ruta, estado):
     # Preguntar sobre las pausas antes de empezar
     CONFIG['pausa_entre_pasos'] = preguntar_pausas_automatico()
     
+    # Si una ejecución anterior se cortó, completarla o deshacerla antes de inventariar
+    revisar_diario_interrumpido(ruta)
+    
+    # Inventario de archivos construido una sola vez y compartido por todos los
+    # pasos, que lo actualizan al mover, convertir o eliminar archivos
+    inventario = FileInventory(ruta)
+    
     # Contar archivos totales para estadísticas
-    archivos_totales = contar_archivos_totales(ruta)
+    archivos_totales = contar_archivos_totales(ruta, inventario)
     
     # Ahora pedir la ruta
     limpiar_consola()
@@ -201,12 +384,28 @@ def ejecutar_modo_automatico(ruta, estado):
     print(f"📊 Archivos totales en la carpeta: {archivos_totales}")
     print()
     
+    # Índice de identidades compartido entre el paso 1 y la verificación final,
+    # para no volver a leer los archivos que solo se movieron de carpeta
+    indice = IndiceIdentidad()
+    
+    # Puntos de control: si una ejecución anterior sobre esta carpeta se cortó y
+    # nada cambió desde entonces, se omiten los pasos que ya había completado
+    puntos = PuntosControl(ruta)
+    puntos.preparar(inventario)
+    
+    # Diario de la ejecución (salvo que se llame desde el modo personalizable, que ya tiene uno)
+    propio = obtener_diario() is None
+    if propio:
+        abrir_diario(ruta, "Modo automático")
+    completado = False
+    
     try:
         # Paso 1: Eliminar archivos duplicados
         print("\n" + "="*50)
         print("PASO 1: BUSCAR Y ELIMINAR DUPLICADOS")
         print("="*50)
-        resultados = eliminar_duplicados(ruta, modo_automatico=True)
+        resultados = ejecutar_paso(puntos, "Eliminar duplicados", eliminar_duplicados,
+                                   ruta, modo_automatico=True, indice=indice, inventario=inventario)
         estado.agregar_paso("Eliminar duplicados")
         if resultados:
             estado.archivos_procesados += resultados.get('duplicados_eliminados', 0)
@@ -220,7 +419,13 @@ def ejecutar_modo_automatico(ruta, estado):
         print("\n" + "="*50)
         print("PASO 2: ORGANIZAR ARCHIVOS EN CARPETAS")
         print("="*50)
-        resultados = organizar_archivos_carpetas(ruta)
+        if CONFIG['planificar_movimientos']:
+            # Destino final calculado de antemano: el paso 4 ya no tendrá que volver a moverlos
+            resultados = ejecutar_paso(puntos, "Organizar archivos en carpetas", organizar_archivos_planificado,
+                                       ruta, inventario)
+        else:
+            resultados = ejecutar_paso(puntos, "Organizar archivos en carpetas", organizar_archivos_carpetas,
+                                       ruta, inventario)
         estado.agregar_paso("Organizar archivos en carpetas")
         if resultados:
             estado.archivos_procesados += resultados.get('imagenes_movidas', 0)
@@ -236,7 +441,9 @@ def ejecutar_modo_automatico(ruta, estado):
         print("\n" + "="*50)
         print("PASO 3: CONVERTIR ARCHIVOS WEBP Y TS")
         print("="*50)
-        resultados = convertir_formatos_archivos(ruta)
+        carpeta_salida = ruta if CONFIG['planificar_movimientos'] else None
+        resultados = ejecutar_paso(puntos, "Convertir formatos de archivo", convertir_formatos_archivos,
+                                   ruta, inventario, carpeta_salida)
         estado.agregar_paso("Convertir formatos de archivo")
         if resultados:
             estado.archivos_procesados += resultados.get('webp_convertidos', 0)
@@ -252,7 +459,8 @@ def ejecutar_modo_automatico(ruta, estado):
         print("PASO 4: EXTRAER ARCHIVOS A LA RAIZ")
         print("="*50)
         print("🔄 Ejecutando extracción automáticamente...")
-        resultados = extraer_archivos_raiz(ruta, modo_automatico=True)
+        resultados = ejecutar_paso(puntos, "Extraer archivos a la raíz", extraer_archivos_raiz,
+                                   ruta, modo_automatico=True, inventario=inventario)
         estado.agregar_paso("Extraer archivos a la raíz")
         if resultados:
             estado.archivos_procesados += resultados.get('archivos_extraidos', 0)
@@ -266,7 +474,8 @@ def ejecutar_modo_automatico(ruta, estado):
         print("\n" + "="*50)
         print("VERIFICACIÓN FINAL: BUSCAR DUPLICADOS")
         print("="*50)
-        resultados = verificar_duplicados(ruta, modo_automatico=True)
+        resultados = ejecutar_paso(puntos, "Verificación final de duplicados", verificar_duplicados,
+                                   ruta, modo_automatico=True, indice=indice, inventario=inventario)
         estado.agregar_paso("Verificación final de duplicados")
         if resultados:
             estado.archivos_procesados += resultados.get('duplicados_eliminados', 0)
@@ -281,7 +490,8 @@ def ejecutar_modo_automatico(ruta, estado):
         print("PASO 6: PRE-PROCESAMIENTO DE IMÁGENES")
         print("="*50)
         print("🖼️  Ejecutando pre-procesamiento automáticamente...")
-        resultados = preprocesar_imagenes(ruta, modo_automatico=True)
+        resultados = ejecutar_paso(puntos, "Pre-procesamiento de imágenes", preprocesar_imagenes,
+                                   ruta, modo_automatico=True, inventario=inventario, punto_control=puntos)
         estado.agregar_paso("Pre-procesamiento de imágenes")
         if resultados:
             estado.archivos_procesados += resultados.get('procesadas', 0)
@@ -289,7 +499,8 @@ def ejecutar_modo_automatico(ruta, estado):
         # Paso 7: Limpieza final de carpetas temporales
         if CONFIG['pausa_entre_pasos']:
             limpiar_consola()
-        resultados = limpiar_carpetas_temporales(ruta)
+        resultados = ejecutar_paso(puntos, "Limpieza final de carpetas temporales", limpiar_carpetas_temporales,
+                                   ruta)
         estado.agregar_paso("Limpieza final de carpetas temporales")
         
         # Calcular archivos no procesables
@@ -303,11 +514,17 @@ def ejecutar_modo_automatico(ruta, estado):
         print(f"   📁 Archivos totales en carpeta: {archivos_totales}")
         print(f"   ✅ Archivos procesados: {estado.archivos_procesados}")
         print(f"   ❌ Archivos no procesables: {estado.archivos_no_procesables}")
+        completado = True
+        puntos.descartar()  # Ejecución terminada: no queda nada que reanudar
         
     except Exception as e:
         estado.agregar_error(e, "Modo automático")
         estado.agregar_paso("Modo automático", exitoso=False)
         print(f"\n❌ Error durante el proceso automático: {e}")
+    finally:
+        cerrar_cache_hashes()  # Guardar y purgar la cache de hashes una sola vez por ejecución
+        if propio:
+            cerrar_diario(completado)
 
 def mostrar_menu_personalizado():
     """Muestra el menú de opciones para el modo personalizable"""
@@ -319,6 +536,9 @@ def mostrar_menu_personalizado():
     print("4. 📤 Extraer archivos a la raíz")
     print("5. 🖼️  Pre-procesamiento de imágenes")
     print("6. 🚀 Ejecutar todos los pasos")
+    print("7. 🧩 Buscar imágenes y videos similares")
+    print("8. 🗂️  Buscar duplicados entre varias carpetas")
+    print("9. ⏪ Deshacer la última ejecución")
     print("0. ↩️  Volver al menú principal")
     print("=" * 40)
 
@@ -330,13 +550,16 @@ def ejecutar_modo_personalizable(ruta, estado):
         ruta (str): Ruta de la carpeta a organizar
         estado (EstadoPrograma): Instancia para trackear el progreso
     """
+    revisar_diario_interrumpido(ruta)
+    abrir_diario(ruta, "Modo personalizable")
+    
     while True:
         mostrar_banner()
         print(f"📁 Ruta actual: {ruta}")
         mostrar_menu_personalizado()
         
         try:
-            opcion = input("\nSelecciona una opción (0-6): ").strip()
+            opcion = input("\nSelecciona una opción (0-9): ").strip()
             
             if opcion == "0":
                 break
@@ -391,8 +614,45 @@ def ejecutar_modo_personalizable(ruta, estado):
                 CONFIG['pausa_entre_pasos'] = True
                 ejecutar_modo_automatico(ruta, estado)
                 break
+            elif opcion == "7":
+                limpiar_consola()
+                print("🔧 MODO PERSONALIZABLE")
+                print("=" * 50)
+                print("\n" + "="*50)
+                print("BUSCAR IMÁGENES Y VIDEOS SIMILARES")
+                print("="*50)
+                # Un solo recorrido para las imágenes y los videos
+                resultados = eliminar_similares(ruta, modo_automatico=False, inventario=FileInventory(ruta))
+                estado.agregar_paso("Archivos similares (personalizado)")
+                esperar_continuar()
+            elif opcion == "8":
+                limpiar_consola()
+                print("🔧 MODO PERSONALIZABLE")
+                print("=" * 50)
+                print("\n" + "="*50)
+                print("BUSCAR DUPLICADOS ENTRE VARIAS CARPETAS")
+                print("="*50)
+                rutas, autoritativas = obtener_carpetas_adicionales(ruta)
+                resultados = eliminar_duplicados_multiples(rutas, autoritativas, modo_automatico=False,
+                                                           indice=IndiceIdentidad())
+                estado.agregar_paso("Duplicados entre carpetas (personalizado)")
+                esperar_continuar()
+            elif opcion == "9":
+                limpiar_consola()
+                print("🔧 MODO PERSONALIZABLE")
+                print("=" * 50)
+                print("\n" + "="*50)
+                print("DESHACER LA ÚLTIMA EJECUCIÓN")
+                print("="*50)
+                # Cerrar el diario de esta sesión para que también se pueda deshacer
+                cerrar_diario()
+                resultados = deshacer_ultima_ejecucion(ruta)
+                abrir_diario(ruta, "Modo personalizable")
+                if resultados:
+                    estado.agregar_paso("Deshacer última ejecución (personalizado)")
+                esperar_continuar()
             else:
-                print("❌ Opción no válida. Por favor selecciona 0-6.")
+                print("❌ Opción no válida. Por favor selecciona 0-9.")
                 esperar_continuar()
                 
         except KeyboardInterrupt:
@@ -403,6 +663,8 @@ def ejecutar_modo_personalizable(ruta, estado):
             print(f"\n❌ Error inesperado: {e}")
             estado.agregar_error(e, "Modo personalizable")
             esperar_continuar()
+    
+    cerrar_diario()
 
 def mostrar_menu_principal():
     """Muestra el menú principal de Orgest con las opciones disponibles"""
@@ -447,7 +709,10 @@ def main():
             if ruta:
                 estado.ruta_actual = ruta
                 estado.inicio_tiempo = datetime.now()
-                ejecutar_modo_personalizable(ruta, estado)
+                try:
+                    ejecutar_modo_personalizable(ruta, estado)
+                finally:
+                    cerrar_cache_hashes()  # Una vez al salir del menú, no tras cada paso
                 estado.mostrar_resumen()
             
         elif opcion == "3":
@@ -468,4 +733,6 @@ if __name__ == "__main__":
         print("\n\n👋 ¡Hasta pronto! Programa interrumpido por el usuario.")
     except Exception as e:
         print(f"\n❌ Error crítico: {e}")
-        input("Presiona Enter para salir...")
\ No newline at end of file
+        input("Presiona Enter para salir...")
+    finally:
+        cerrar_cache_hashes()
\ No newline at end of file
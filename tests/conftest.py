@@ -0,0 +1,33 @@
+"""
+Configuración común de las pruebas: cada prueba usa su propia carpeta de
+datos de Orgest (ORGEST_DATOS) para que la cache de hashes, los diarios, los
+puntos de control y el registro de conversiones no se mezclen con los reales.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import CONFIG  # noqa: E402
+from funciones.cache_hashes import cerrar_cache_hashes  # noqa: E402
+from funciones.diario import cerrar_diario  # noqa: E402
+
+@pytest.fixture(autouse=True)
+def datos_orgest(tmp_path, monkeypatch):
+    """Carpeta de datos vacía para cada prueba y CONFIG sin mensajes detallados"""
+    carpeta = tmp_path / "datos_orgest"
+    monkeypatch.setenv('ORGEST_DATOS', str(carpeta))
+    monkeypatch.setitem(CONFIG, 'modo_verbose', False)
+    yield carpeta
+    cerrar_diario(completado=False)
+    cerrar_cache_hashes()
+
+def escribir(ruta, contenido):
+    """Crea un archivo (y sus carpetas) con el contenido indicado y devuelve su ruta como str"""
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    with open(ruta, 'wb') as archivo:
+        archivo.write(contenido)
+    return str(ruta)
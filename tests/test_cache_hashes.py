@@ -0,0 +1,136 @@
+"""
+Pruebas de la cache persistente de hashes (funciones/cache_hashes.py) y de
+cuándo un hash guardado deja de valer (_sin_cambios en funciones/duplicados.py).
+"""
+
+import os
+
+from conftest import escribir
+from main import CONFIG
+from funciones import duplicados
+from funciones.cache_hashes import (NOMBRE_BASE_CACHE, CacheHashes, IndiceIdentidad, cerrar_cache_hashes,
+                                    guardar_cache_hashes, obtener_cache_hashes)
+from funciones.datos_locales import ruta_datos
+from funciones.duplicados import _sin_cambios, calcular_hash_archivo, encontrar_grupos_duplicados
+from funciones.hashing import crear_hasher
+
+ALGORITMO = 'blake2b'
+
+def _digest(contenido):
+    hasher = crear_hasher(ALGORITMO)
+    hasher.update(contenido)
+    return hasher.hexdigest()
+
+def _cambiar_mtime(ruta, segundos):
+    info = os.stat(ruta)
+    os.utime(ruta, ns=(info.st_atime_ns, info.st_mtime_ns + segundos * 10 ** 9))
+
+def test_sin_cambios_detecta_tamanio_fecha_y_borrado(tmp_path):
+    ruta = escribir(tmp_path / "a.bin", b"contenido")
+    info = os.stat(ruta)
+    assert _sin_cambios(ruta, info)
+
+    _cambiar_mtime(ruta, 1)
+    assert not _sin_cambios(ruta, info)
+
+    escribir(ruta, b"contenido mas largo")
+    os.utime(ruta, ns=(info.st_atime_ns, info.st_mtime_ns))
+    assert not _sin_cambios(ruta, info)
+
+    os.remove(ruta)
+    assert not _sin_cambios(ruta, info)
+
+def test_hash_de_archivo_sin_cambios_sale_de_la_cache(tmp_path, monkeypatch):
+    ruta = escribir(tmp_path / "a.bin", b"x" * 10000)
+    assert calcular_hash_archivo(ruta, ALGORITMO) == _digest(b"x" * 10000)
+    cerrar_cache_hashes()  # Se guarda en disco y la siguiente consulta abre la cache de nuevo
+
+    def sin_leer(*args, **kwargs):
+        raise AssertionError("el archivo no debería leerse")
+    monkeypatch.setattr(duplicados, 'actualizar_hasher_desde_archivo', sin_leer)
+
+    assert calcular_hash_archivo(ruta, ALGORITMO) == _digest(b"x" * 10000)
+    assert obtener_cache_hashes().aciertos == 1
+
+def test_archivo_modificado_se_vuelve_a_leer(tmp_path):
+    ruta = escribir(tmp_path / "a.bin", b"antes")
+    assert calcular_hash_archivo(ruta, ALGORITMO) == _digest(b"antes")
+
+    escribir(ruta, b"despues")
+    _cambiar_mtime(ruta, 5)  # Por si la fecha no avanzó entre las dos escrituras
+
+    assert calcular_hash_archivo(ruta, ALGORITMO) == _digest(b"despues")
+
+def test_el_hash_depende_del_algoritmo(tmp_path):
+    ruta = escribir(tmp_path / "a.bin", b"contenido")
+    calcular_hash_archivo(ruta, ALGORITMO)
+
+    assert obtener_cache_hashes().obtener(os.stat(ruta), 'md5', 'completo') is None
+    assert obtener_cache_hashes().obtener(os.stat(ruta), ALGORITMO, 'parcial') is None
+
+def test_archivo_que_cambia_mientras_se_lee_no_se_guarda(tmp_path, monkeypatch):
+    ruta = escribir(tmp_path / "a.bin", b"original")
+    info = os.stat(ruta)
+    leer = duplicados.actualizar_hasher_desde_archivo
+
+    def leer_y_modificar(hasher, archivo, *args):
+        leer(hasher, archivo, *args)
+        with open(ruta, 'ab') as otro:
+            otro.write(b" y algo mas")
+    monkeypatch.setattr(duplicados, 'actualizar_hasher_desde_archivo', leer_y_modificar)
+
+    assert calcular_hash_archivo(ruta, ALGORITMO) == _digest(b"original")
+    assert obtener_cache_hashes().obtener(info, ALGORITMO, 'completo') is None
+    assert obtener_cache_hashes().obtener(os.stat(ruta), ALGORITMO, 'completo') is None
+
+def test_indice_de_la_ejecucion_evita_consultar_la_cache(tmp_path):
+    ruta = escribir(tmp_path / "a.bin", b"contenido")
+    indice = IndiceIdentidad()
+    calcular_hash_archivo(ruta, ALGORITMO, indice)
+    aciertos = obtener_cache_hashes().aciertos
+
+    assert indice.obtener(os.stat(ruta), ALGORITMO, 'completo') == _digest(b"contenido")
+    assert calcular_hash_archivo(ruta, ALGORITMO, indice) == _digest(b"contenido")
+    assert obtener_cache_hashes().aciertos == aciertos
+
+def test_cache_desactivada(tmp_path, monkeypatch):
+    monkeypatch.setitem(CONFIG, 'usar_cache_hashes', False)
+    ruta = escribir(tmp_path / "a.bin", b"contenido")
+
+    assert obtener_cache_hashes() is None
+    assert calcular_hash_archivo(ruta, ALGORITMO) == _digest(b"contenido")
+
+def test_purgar_descarta_las_entradas_menos_usadas(tmp_path):
+    cache = CacheHashes(str(tmp_path / "cache.sqlite3"), max_entradas=2)
+    rutas = [escribir(tmp_path / f"{i}.bin", bytes([i])) for i in range(3)]
+    for i, ruta in enumerate(rutas):
+        cache.guardar(os.stat(ruta), ALGORITMO, 'completo', str(i))
+
+    assert cache.purgar() == 1
+    assert sum(cache.obtener(os.stat(ruta), ALGORITMO, 'completo') is not None for ruta in rutas) == 2
+    cache.cerrar()
+
+def test_hash_guardado_despues_de_un_escaneo_se_conserva(tmp_path):
+    escribir(tmp_path / "raiz" / "a.bin", b"igual" * 2000)
+    escribir(tmp_path / "raiz" / "b.bin", b"igual" * 2000)
+    cache = obtener_cache_hashes()
+    encontrar_grupos_duplicados(str(tmp_path / "raiz"))
+
+    # Un paso posterior de la misma ejecución escribe en la cache que dejó abierta el escaneo
+    ruta = escribir(tmp_path / "c.bin", b"despues del escaneo")
+    calcular_hash_archivo(ruta, ALGORITMO)
+    assert obtener_cache_hashes() is cache
+    guardar_cache_hashes()
+
+    otra = CacheHashes(ruta_datos(NOMBRE_BASE_CACHE))
+    assert otra.obtener(os.stat(ruta), ALGORITMO, 'completo') == _digest(b"despues del escaneo")
+    otra.cerrar()
+
+def test_cerrar_al_final_de_la_ejecucion_guarda_lo_pendiente(tmp_path):
+    ruta = escribir(tmp_path / "a.bin", b"pendiente")
+    calcular_hash_archivo(ruta, ALGORITMO)
+    cerrar_cache_hashes()
+
+    otra = CacheHashes(ruta_datos(NOMBRE_BASE_CACHE))
+    assert otra.obtener(os.stat(ruta), ALGORITMO, 'completo') == _digest(b"pendiente")
+    otra.cerrar()
@@ -0,0 +1,37 @@
+"""
+Pruebas de la clasificación por contenido (funciones/clasificador.py).
+"""
+
+import pytest
+
+from conftest import escribir
+from funciones.clasificador import clasificar_archivo, tipo_por_contenido
+
+def _ftyp(marca):
+    return b'\x00\x00\x00\x20ftyp' + marca + b'\x00\x00\x00\x00' + b'isomiso2' + b'\x00' * 8
+
+@pytest.mark.parametrize("marca, tipo", [
+    (b'heic', 'imagen'),
+    (b'avif', 'imagen'),
+    (b'isom', 'video'),
+    (b'qt  ', 'video'),
+    (b'3gp4', 'video'),
+    (b'M4A ', 'otro'),
+    (b'M4B ', 'otro'),
+    (b'zzzz', None),
+])
+def test_marca_bmff(marca, tipo):
+    assert tipo_por_contenido(_ftyp(marca)) == tipo
+
+@pytest.mark.parametrize("nombre, marca, tipo", [
+    ("cancion.mp4", b'M4A ', None),  # Audio con extensión de video: no va a Videos
+    ("foto", b'heic', 'imagen'),  # Sin extensión: decide el contenido
+    ("clip.mp4", b'zzzz', 'video'),  # Marca desconocida: decide la extensión
+    ("raro.bin", b'zzzz', None),
+])
+def test_clasificar_archivo_bmff(tmp_path, nombre, marca, tipo):
+    assert clasificar_archivo(escribir(tmp_path / nombre, _ftyp(marca))) == tipo
+
+def test_firma_manda_sobre_la_extension(tmp_path):
+    assert clasificar_archivo(escribir(tmp_path / "foto.mp4", b'\xff\xd8\xff\xe0' + b'\x00' * 60)) == 'imagen'
+    assert clasificar_archivo(escribir(tmp_path / "video.jpg", b'\x1a\x45\xdf\xa3' + b'\x00' * 60)) == 'video'
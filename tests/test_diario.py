@@ -0,0 +1,134 @@
+"""
+Pruebas del diario de movimientos (funciones/diario.py): deshacer una
+ejecución y reanudar una interrumpida.
+"""
+
+import os
+
+import pytest
+
+from conftest import escribir
+from funciones.diario import (abrir_diario, buscar_diarios, cerrar_diario, estado_diario, leer_diario,
+                              obtener_diario, reanudar_diario, registrar_operacion, revertir_diario)
+from funciones.movimientos import MotorMovimientos, ruta_temporal_movimiento
+
+@pytest.fixture
+def raiz(tmp_path):
+    """Carpeta a organizar con un diario activo; devuelve (raiz, ruta_diario)"""
+    carpeta = tmp_path / "raiz"
+    carpeta.mkdir()
+    abrir_diario(str(carpeta), "prueba")
+    return str(carpeta), obtener_diario().ruta_diario
+
+def _leer(ruta):
+    with open(ruta, 'rb') as archivo:
+        return archivo.read()
+
+def test_deshacer_devuelve_los_archivos_y_quita_carpetas_creadas(raiz):
+    carpeta, ruta_diario = raiz
+    foto = escribir(os.path.join(carpeta, "foto.jpg"), b"foto")
+    destino = os.path.join(carpeta, "Imagenes", "2024", "foto.jpg")
+    os.makedirs(os.path.dirname(destino))
+    motor = MotorMovimientos("Prueba")
+    motor.mover(foto, destino)
+    motor.terminar()
+    cerrar_diario()
+
+    assert estado_diario(leer_diario(ruta_diario)) == 'completado'
+    resultados = revertir_diario(ruta_diario)
+
+    assert resultados['restaurados'] == 1
+    assert _leer(foto) == b"foto"
+    assert not os.path.exists(os.path.join(carpeta, "Imagenes"))
+    assert estado_diario(leer_diario(ruta_diario)) == 'revertido'
+    assert buscar_diarios(carpeta, ('completado', 'interrumpido')) == []
+
+def _convertir(carpeta):
+    """Simula una conversión: el original va a basura y se crea el convertido en su lugar"""
+    original = escribir(os.path.join(carpeta, "imagen.webp"), b"webp")
+    convertido = os.path.join(carpeta, "imagen.png")
+    registrar_operacion('crear', ruta=convertido, origen=original)
+    escribir(convertido, b"png")
+    os.makedirs(os.path.join(carpeta, "basura"))
+    motor = MotorMovimientos("Prueba")
+    motor.mover(original, os.path.join(carpeta, "basura", "imagen.webp"))
+    motor.terminar()
+    cerrar_diario()
+    return original, convertido
+
+def test_deshacer_borra_lo_creado_si_vuelve_su_original(raiz):
+    carpeta, ruta_diario = raiz
+    original, convertido = _convertir(carpeta)
+
+    resultados = revertir_diario(ruta_diario)
+
+    assert resultados['borrados'] == 1 and resultados['irreversibles'] == 0
+    assert _leer(original) == b"webp"
+    assert not os.path.exists(convertido)
+
+def test_deshacer_conserva_lo_creado_si_su_original_ya_no_existe(raiz):
+    carpeta, ruta_diario = raiz
+    original, convertido = _convertir(carpeta)
+    os.remove(os.path.join(carpeta, "basura", "imagen.webp"))  # Se vació la basura
+
+    resultados = revertir_diario(ruta_diario)
+
+    assert resultados['borrados'] == 0
+    assert resultados['irreversibles'] == 2  # El movimiento y el archivo creado
+    assert not os.path.exists(original)
+    assert _leer(convertido) == b"png"
+
+def test_reanudar_completa_movimientos_pendientes(raiz):
+    carpeta, ruta_diario = raiz
+    hecho = escribir(os.path.join(carpeta, "Videos", "hecho.mp4"), b"hecho")
+    pendiente = escribir(os.path.join(carpeta, "pendiente.mp4"), b"pendiente")
+    destino = os.path.join(carpeta, "Videos", "pendiente.mp4")
+    registrar_operacion('mover', origen=os.path.join(carpeta, "hecho.mp4"), destino=hecho)
+    registrar_operacion('mover', origen=pendiente, destino=destino)
+    registrar_operacion('mover', origen=os.path.join(carpeta, "no_existe.mp4"),
+                        destino=os.path.join(carpeta, "Videos", "no_existe.mp4"))
+    escribir(ruta_temporal_movimiento(destino), b"pend")  # Copia a otro disco interrumpida
+    cerrar_diario(completado=False)
+
+    assert [ruta for ruta, _ in buscar_diarios(carpeta, ('interrumpido',))] == [ruta_diario]
+    resultados = reanudar_diario(ruta_diario)
+
+    assert (resultados['hechos'], resultados['completados'], resultados['perdidos']) == (1, 1, 1)
+    assert _leer(destino) == b"pendiente" and not os.path.exists(pendiente)
+    assert not os.path.exists(ruta_temporal_movimiento(destino))
+    assert estado_diario(leer_diario(ruta_diario)) == 'completado'
+
+def test_reanudar_borra_el_original_si_la_copia_ya_termino(raiz):
+    carpeta, ruta_diario = raiz
+    origen = escribir(os.path.join(carpeta, "video.mp4"), b"video")
+    destino = escribir(os.path.join(carpeta, "Videos", "video.mp4"), b"video")
+    registrar_operacion('mover', origen=origen, destino=destino)
+    cerrar_diario(completado=False)
+
+    assert reanudar_diario(ruta_diario)['completados'] == 1
+    assert not os.path.exists(origen) and _leer(destino) == b"video"
+
+def test_reanudar_no_toca_un_destino_con_otro_contenido(raiz):
+    carpeta, ruta_diario = raiz
+    origen = escribir(os.path.join(carpeta, "video.mp4"), b"del diario")
+    destino = escribir(os.path.join(carpeta, "Videos", "video.mp4"), b"de otro archivo, mas largo")
+    registrar_operacion('mover', origen=origen, destino=destino)
+    cerrar_diario(completado=False)
+
+    resultados = reanudar_diario(ruta_diario)
+
+    assert resultados['conflictos'] == 1 and resultados['completados'] == 0
+    assert _leer(origen) == b"del diario"
+    assert _leer(destino) == b"de otro archivo, mas largo"
+
+def test_linea_a_medio_escribir_se_ignora(raiz):
+    carpeta, ruta_diario = raiz
+    registrar_operacion('mover', origen="a", destino="b")
+    cerrar_diario(completado=False)
+    with open(ruta_diario, 'a', encoding='utf-8') as archivo:
+        archivo.write('{"op": "mover", "origen": "c", "dest')
+
+    entradas = leer_diario(ruta_diario)
+
+    assert [entrada['op'] for entrada in entradas] == ['inicio', 'mover']
+    assert estado_diario(entradas) == 'interrumpido'
@@ -0,0 +1,195 @@
+"""
+Pruebas de la búsqueda de duplicados por etapas (funciones/duplicados.py):
+tamaño, contenido directo o hash parcial y, solo si hace falta, hash completo.
+"""
+
+import os
+
+import pytest
+
+from conftest import escribir
+from main import CONFIG
+from funciones import duplicados
+from funciones.cache_hashes import NOMBRE_BASE_CACHE, CacheHashes
+from funciones.datos_locales import ruta_datos
+from funciones.duplicados import (TAMANIO_COMPARACION_DIRECTA, TAMANIO_MUESTRA_PARCIAL, agrupar_por_tamanio,
+                                  calcular_clave_contenido, eliminar_duplicados_multiples, encontrar_grupos_duplicados,
+                                  requiere_hash_completo, sustituir_duplicados_por_enlaces)
+from funciones.hashing import obtener_algoritmo_configurado
+from funciones.inventario import FileInventory
+
+GRANDE = 3 * TAMANIO_MUESTRA_PARCIAL  # El hash parcial deja bytes sin leer en medio
+MEDIANO = TAMANIO_MUESTRA_PARCIAL + 1000  # El inicio y el final cubren todo el archivo
+
+@pytest.fixture
+def hashes_completos(monkeypatch):
+    """Rutas de las que se calcula el hash completo durante la prueba"""
+    calculados = []
+    calcular = duplicados.calcular_hash_archivo
+
+    def contar(ruta_archivo, *args, **kwargs):
+        calculados.append(os.path.basename(ruta_archivo))
+        return calcular(ruta_archivo, *args, **kwargs)
+    monkeypatch.setattr(duplicados, 'calcular_hash_archivo', contar)
+    return calculados
+
+@pytest.fixture
+def hashes_parciales(monkeypatch):
+    """Rutas de las que se calcula el hash parcial durante la prueba"""
+    calculados = []
+    calcular = duplicados.calcular_hash_parcial
+
+    def contar(ruta_archivo, *args, **kwargs):
+        calculados.append(os.path.basename(ruta_archivo))
+        return calcular(ruta_archivo, *args, **kwargs)
+    monkeypatch.setattr(duplicados, 'calcular_hash_parcial', contar)
+    return calculados
+
+def _con_cambio_en_medio(contenido):
+    distinto = bytearray(contenido)
+    distinto[len(distinto) // 2] ^= 0xFF
+    return bytes(distinto)
+
+@pytest.mark.parametrize("tamanio, esperado", [
+    (0, False),
+    (TAMANIO_COMPARACION_DIRECTA, False),
+    (TAMANIO_COMPARACION_DIRECTA + 1, False),
+    (2 * TAMANIO_MUESTRA_PARCIAL, False),
+    (2 * TAMANIO_MUESTRA_PARCIAL + 1, True),
+    (GRANDE, True),
+])
+def test_requiere_hash_completo(tamanio, esperado):
+    assert requiere_hash_completo(tamanio) is esperado
+
+def test_grupos_por_tamanio(tmp_path):
+    escribir(tmp_path / "a.bin", b"x" * 10)
+    escribir(tmp_path / "sub" / "b.bin", b"y" * 10)
+    escribir(tmp_path / "c.bin", b"z" * 20)
+    escribir(tmp_path / "vacio", b"")
+    escribir(tmp_path / "basura" / "d.bin", b"x" * 10)  # La basura no se escanea
+
+    grupos, total = agrupar_por_tamanio(str(tmp_path))
+
+    assert total == 4
+    assert {tamanio: sorted(os.path.basename(ruta) for _, ruta, _ in grupo) for tamanio, grupo in grupos.items()} == {
+        10: ["a.bin", "b.bin"], 20: ["c.bin"], 0: ["vacio"]}
+    ordenes = sorted(orden for grupo in grupos.values() for orden, _, _ in grupo)
+    assert ordenes == sorted(set(ordenes))
+
+def test_enlaces_duros_cuentan_pero_se_comparan_una_vez(tmp_path):
+    original = escribir(tmp_path / "a.bin", b"x" * 10)
+    os.link(original, tmp_path / "enlace.bin")
+    escribir(tmp_path / "b.bin", b"x" * 10)
+
+    grupos, total = agrupar_por_tamanio([str(tmp_path), str(tmp_path)])  # Raíz repetida: mismos inodos
+
+    assert total == 6
+    assert len(grupos[10]) == 2  # Una ruta de a.bin o enlace.bin (la primera del recorrido) y b.bin
+    assert len({info_stat.st_ino for _, _, info_stat in grupos[10]}) == 2
+
+def test_clave_de_contenido_segun_tamanio(tmp_path):
+    vacio = escribir(tmp_path / "vacio", b"")
+    pequenio = escribir(tmp_path / "pequenio", b"p" * TAMANIO_COMPARACION_DIRECTA)
+    grande = os.urandom(GRANDE)
+    ruta_grande = escribir(tmp_path / "grande", grande)
+    ruta_distinto = escribir(tmp_path / "distinto", _con_cambio_en_medio(grande))
+
+    assert calcular_clave_contenido(vacio, 0) == "empty_file"
+    assert calcular_clave_contenido(pequenio, TAMANIO_COMPARACION_DIRECTA) == b"p" * TAMANIO_COMPARACION_DIRECTA
+    # Las muestras del inicio y del final no ven el byte cambiado
+    assert calcular_clave_contenido(ruta_grande, GRANDE) == calcular_clave_contenido(ruta_distinto, GRANDE)
+
+def test_muestras_iguales_en_archivos_grandes_escalan_al_hash_completo(tmp_path, hashes_completos):
+    contenido = os.urandom(GRANDE)
+    escribir(tmp_path / "a.bin", contenido)
+    escribir(tmp_path / "b.bin", contenido)
+    escribir(tmp_path / "c.bin", _con_cambio_en_medio(contenido))
+
+    grupos, total = encontrar_grupos_duplicados(str(tmp_path))
+
+    assert total == 3
+    assert [[os.path.basename(ruta) for ruta in grupo] for grupo in grupos] == [["a.bin", "b.bin"]]
+    assert sorted(hashes_completos) == ["a.bin", "b.bin", "c.bin"]
+
+def test_muestras_distintas_no_necesitan_hash_completo(tmp_path, hashes_completos):
+    escribir(tmp_path / "a.bin", os.urandom(GRANDE))
+    escribir(tmp_path / "b.bin", os.urandom(GRANDE))
+
+    grupos, _ = encontrar_grupos_duplicados(str(tmp_path))
+
+    assert grupos == []
+    assert hashes_completos == []
+
+def test_archivos_cubiertos_por_las_muestras_no_necesitan_hash_completo(tmp_path, hashes_completos):
+    contenido = os.urandom(MEDIANO)
+    escribir(tmp_path / "a.bin", contenido)
+    escribir(tmp_path / "sub" / "b.bin", contenido)
+    escribir(tmp_path / "c.bin", _con_cambio_en_medio(contenido))
+    escribir(tmp_path / "d.bin", b"d" * 100)
+    escribir(tmp_path / "e.bin", b"d" * 100)
+
+    grupos, _ = encontrar_grupos_duplicados(str(tmp_path))
+
+    assert sorted(sorted(os.path.basename(ruta) for ruta in grupo) for grupo in grupos) == [
+        ["a.bin", "b.bin"], ["d.bin", "e.bin"]]
+    assert hashes_completos == []
+
+def test_hash_de_los_duplicados_enlazados_queda_guardado(tmp_path, monkeypatch):
+    monkeypatch.setitem(CONFIG, 'modo_duplicados', 'hardlink')
+    contenido = os.urandom(GRANDE)
+    escribir(tmp_path / "a.bin", contenido)
+    escribir(tmp_path / "b.bin", contenido)
+    grupos, _ = encontrar_grupos_duplicados(str(tmp_path))
+
+    sustituir_duplicados_por_enlaces(grupos, {})
+
+    otra = CacheHashes(ruta_datos(NOMBRE_BASE_CACHE))
+    assert otra.obtener(os.stat(grupos[0][1]), obtener_algoritmo_configurado(), 'completo') is not None
+    otra.cerrar()
+
+def test_duplicado_que_desaparece_al_enlazarlo_no_interrumpe_el_paso(tmp_path, monkeypatch):
+    contenido = os.urandom(GRANDE)
+    escribir(tmp_path / "a.bin", contenido)
+    escribir(tmp_path / "b.bin", contenido)
+    grupos, _ = encontrar_grupos_duplicados(str(tmp_path))
+
+    def enlazar_y_perder(grupos, modo):
+        os.remove(grupos[0][1])
+        return {'reflinks': 0, 'hardlinks': 1, 'bytes_recuperados': GRANDE}
+    monkeypatch.setattr(duplicados, 'enlazar_duplicados', enlazar_y_perder)
+    resultados = {}
+
+    sustituir_duplicados_por_enlaces(grupos, resultados)
+
+    assert resultados['duplicados_enlazados'] == 1
+
+def test_eliminar_entre_varias_raices_actualiza_el_inventario(tmp_path, monkeypatch):
+    monkeypatch.setitem(CONFIG, 'modo_duplicados', 'basura')
+    monkeypatch.setattr('builtins.input', lambda *args: 's')
+    raiz_a, raiz_b = str(tmp_path / "a"), str(tmp_path / "b")
+    for nombre in ("1.bin", "2.bin"):
+        escribir(os.path.join(raiz_a, nombre), b"repetido" * 100)
+    escribir(os.path.join(raiz_b, "3.bin"), b"repetido" * 100)
+    inventario = FileInventory(raiz_a)
+
+    resultados = eliminar_duplicados_multiples([raiz_a, raiz_b], inventario=inventario)
+
+    assert resultados['carpeta_basura_eliminada']
+    assert not os.path.exists(os.path.join(raiz_a, "basura"))
+    assert [carpeta for carpeta, _, _ in inventario.recorrer()] == [raiz_a]
+    assert sum(len(archivos) for _, _, archivos in inventario.recorrer()) == 1
+
+def test_archivos_pequenios_se_comparan_sin_hash(tmp_path, hashes_parciales, hashes_completos):
+    escribir(tmp_path / "a.bin", b"p" * TAMANIO_COMPARACION_DIRECTA)
+    escribir(tmp_path / "b.bin", b"p" * TAMANIO_COMPARACION_DIRECTA)
+    escribir(tmp_path / "c.bin", b"q" * TAMANIO_COMPARACION_DIRECTA)
+    escribir(tmp_path / "d.bin", b"r" * (TAMANIO_COMPARACION_DIRECTA + 1))
+    escribir(tmp_path / "e.bin", b"r" * (TAMANIO_COMPARACION_DIRECTA + 1))
+
+    grupos, total = encontrar_grupos_duplicados(str(tmp_path))
+
+    assert total == 5
+    assert sorted(sorted(os.path.basename(ruta) for ruta in grupo) for grupo in grupos) == [
+        ["a.bin", "b.bin"], ["d.bin", "e.bin"]]
+    assert sorted(hashes_parciales) == ["d.bin", "e.bin"]  # Solo pasan del límite de comparación directa
+    assert hashes_completos == []
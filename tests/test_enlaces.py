@@ -0,0 +1,142 @@
+"""
+Pruebas de la sustitución de duplicados por enlaces (funciones/enlaces.py).
+
+Se ejecutan en la carpeta temporal de pytest y, si existe, en /dev/shm
+(tmpfs, sin reflinks ni FIEMAP). Las de reflink solo se ejecutan donde el
+sistema de archivos los admite: se puede indicar una carpeta en un sistema
+de archivos con reflinks (btrfs, XFS, un montaje en loop...) con la variable
+de entorno ORGEST_PRUEBAS_REFLINK.
+"""
+
+import os
+import tempfile
+
+import pytest
+
+from conftest import escribir
+from funciones import enlaces
+from funciones.diario import abrir_diario, cerrar_diario, obtener_diario, revertir_diario
+from funciones.enlaces import (comparten_bloques, crear_reflink, enlazar_duplicado, enlazar_duplicados,
+                               son_identicos)
+
+CONTENIDO = os.urandom(256 * 1024)
+
+def _admite_reflink(carpeta):
+    """Indica si en 'carpeta' se pueden crear reflinks"""
+    origen = os.path.join(carpeta, "sonda_origen")
+    destino = os.path.join(carpeta, "sonda_destino")
+    escribir(origen, b"sonda")
+    try:
+        crear_reflink(origen, destino)
+        return True
+    except OSError:
+        return False
+    finally:
+        for ruta in (origen, destino):
+            if os.path.lexists(ruta):
+                os.remove(ruta)
+
+@pytest.fixture(params=['disco', 'tmpfs'])
+def carpeta(request, tmp_path):
+    """Carpeta de trabajo en el disco de pytest o en tmpfs"""
+    if request.param == 'disco':
+        yield str(tmp_path)
+        return
+    if not os.path.isdir('/dev/shm'):
+        pytest.skip("no hay tmpfs en /dev/shm")
+    with tempfile.TemporaryDirectory(dir='/dev/shm') as carpeta_tmpfs:
+        yield carpeta_tmpfs
+
+@pytest.fixture
+def carpeta_reflink(tmp_path):
+    """Carpeta en un sistema de archivos con reflinks (se omite la prueba si no hay ninguna)"""
+    base = os.environ.get('ORGEST_PRUEBAS_REFLINK') or str(tmp_path)
+    with tempfile.TemporaryDirectory(dir=base) as carpeta:
+        if not _admite_reflink(carpeta):
+            pytest.skip("el sistema de archivos no admite reflinks (ver ORGEST_PRUEBAS_REFLINK)")
+        yield carpeta
+
+def test_hardlink_sustituye_duplicado(carpeta):
+    original = escribir(os.path.join(carpeta, "a.bin"), CONTENIDO)
+    duplicado = escribir(os.path.join(carpeta, "sub", "b.bin"), CONTENIDO)
+
+    assert enlazar_duplicado(original, duplicado, 'hardlink') == 'hardlink'
+    assert os.path.samefile(original, duplicado)
+    assert os.stat(original).st_nlink == 2
+    assert not any(nombre.endswith('.orgest_tmp') for nombre in os.listdir(os.path.join(carpeta, "sub")))
+
+    # Una segunda pasada reconoce que ya están enlazados
+    assert enlazar_duplicado(original, duplicado, 'hardlink') is None
+
+def test_enlace_sin_reflink_recurre_a_hardlink(carpeta, monkeypatch):
+    def sin_reflink(origen, destino):
+        raise OSError("reflink no admitido")
+    monkeypatch.setattr(enlaces, 'crear_reflink', sin_reflink)
+    original = escribir(os.path.join(carpeta, "a.bin"), CONTENIDO)
+    duplicado = escribir(os.path.join(carpeta, "b.bin"), CONTENIDO)
+
+    assert enlazar_duplicado(original, duplicado, 'enlace') == 'hardlink'
+    assert os.path.samefile(original, duplicado)
+
+def test_modo_reflink_sin_soporte_falla_sin_tocar_el_duplicado(carpeta, monkeypatch):
+    def sin_reflink(origen, destino):
+        raise OSError("reflink no admitido")
+    monkeypatch.setattr(enlaces, 'crear_reflink', sin_reflink)
+    original = escribir(os.path.join(carpeta, "a.bin"), CONTENIDO)
+    duplicado = escribir(os.path.join(carpeta, "b.bin"), CONTENIDO)
+
+    with pytest.raises(OSError):
+        enlazar_duplicado(original, duplicado, 'reflink')
+    assert not os.path.samefile(original, duplicado)
+    assert sorted(os.listdir(carpeta)) == ["a.bin", "b.bin"]
+
+def test_contenido_distinto_no_se_enlaza(carpeta):
+    original = escribir(os.path.join(carpeta, "a.bin"), CONTENIDO)
+    distinto = bytearray(CONTENIDO)
+    distinto[len(distinto) // 2] ^= 0xFF  # Mismo tamaño, mismo inicio y final
+    duplicado = escribir(os.path.join(carpeta, "b.bin"), bytes(distinto))
+
+    assert not son_identicos(original, duplicado)
+    with pytest.raises(ValueError):
+        enlazar_duplicado(original, duplicado)
+    assert not os.path.samefile(original, duplicado)
+    with open(duplicado, 'rb') as archivo:
+        assert archivo.read() == bytes(distinto)
+
+def test_copias_independientes_no_comparten_bloques(carpeta):
+    original = escribir(os.path.join(carpeta, "a.bin"), CONTENIDO)
+    copia = escribir(os.path.join(carpeta, "b.bin"), CONTENIDO)
+
+    assert not comparten_bloques(original, copia)
+
+def test_reflink_sustituye_duplicado_y_se_reconoce(carpeta_reflink):
+    original = escribir(os.path.join(carpeta_reflink, "a.bin"), CONTENIDO)
+    duplicado = escribir(os.path.join(carpeta_reflink, "b.bin"), CONTENIDO)
+    os.chmod(duplicado, 0o640)
+    mtime_ns = os.stat(duplicado).st_mtime_ns - 10 ** 9
+    os.utime(duplicado, ns=(mtime_ns, mtime_ns))
+
+    assert enlazar_duplicado(original, duplicado, 'reflink') == 'reflink'
+    assert not os.path.samefile(original, duplicado)
+    assert os.stat(duplicado).st_mode & 0o7777 == 0o640
+    assert os.stat(duplicado).st_mtime_ns == mtime_ns
+    assert son_identicos(original, duplicado)
+
+    # Los reflinks tienen su propio inodo: se reconocen por sus bloques compartidos
+    assert comparten_bloques(original, duplicado)
+    assert enlazar_duplicado(original, duplicado, 'enlace') is None
+
+def test_enlaces_anotados_se_deshacen(tmp_path):
+    original = escribir(tmp_path / "raiz" / "a.bin", CONTENIDO)
+    duplicado = escribir(tmp_path / "raiz" / "b.bin", CONTENIDO)
+    abrir_diario(str(tmp_path / "raiz"), "prueba")
+    ruta_diario = obtener_diario().ruta_diario
+
+    resultados = enlazar_duplicados([[original, duplicado]], 'hardlink')
+    cerrar_diario()
+    assert resultados['hardlinks'] == 1 and os.path.samefile(original, duplicado)
+
+    assert revertir_diario(ruta_diario)['restaurados'] == 1
+    assert not os.path.samefile(original, duplicado)
+    assert os.stat(original).st_nlink == 1
+    assert son_identicos(original, duplicado)
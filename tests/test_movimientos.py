@@ -0,0 +1,129 @@
+"""
+Pruebas del motor de movimientos (funciones/movimientos.py): renombrado
+dentro del mismo disco, copia a otro disco y copia interrumpida.
+
+Se ejecutan en tmpfs (/dev/shm): entre tmpfs y la carpeta temporal de
+pytest hay dos dispositivos de verdad, y dentro de tmpfs se fuerza la
+copia haciendo que os.rename falle con EXDEV.
+"""
+
+import errno
+import os
+import tempfile
+
+import pytest
+
+from conftest import escribir
+from funciones import movimientos
+from funciones.inventario import FileInventory
+from funciones.movimientos import MotorMovimientos, ruta_temporal_movimiento
+
+CONTENIDO = os.urandom(3 * 1024 * 1024 + 17)
+
+@pytest.fixture
+def tmpfs():
+    """Carpeta de trabajo en tmpfs (se omite la prueba si no hay /dev/shm)"""
+    if not os.path.isdir('/dev/shm'):
+        pytest.skip("no hay tmpfs en /dev/shm")
+    with tempfile.TemporaryDirectory(dir='/dev/shm') as carpeta:
+        yield carpeta
+
+@pytest.fixture
+def sin_rename(monkeypatch):
+    """Hace que os.rename falle como entre dos puntos de montaje"""
+    def rename_entre_discos(origen, destino):
+        raise OSError(errno.EXDEV, os.strerror(errno.EXDEV), origen, destino)
+    monkeypatch.setattr(movimientos.os, 'rename', rename_entre_discos)
+
+def test_mismo_disco_se_renombra(tmpfs):
+    origen = escribir(os.path.join(tmpfs, "origen", "a.bin"), CONTENIDO)
+    destino = os.path.join(tmpfs, "destino", "a.bin")
+    os.makedirs(os.path.dirname(destino))
+    inodo = os.stat(origen).st_ino
+    inventario = FileInventory(tmpfs)
+    motor = MotorMovimientos("prueba", inventario)
+
+    assert motor.mover(origen, destino) is True
+    resultados = motor.terminar()
+
+    assert resultados == {'renombrados': 1, 'copiados': 0, 'bytes_copiados': 0, 'fallos': 0}
+    assert os.stat(destino).st_ino == inodo
+    assert not os.path.exists(origen)
+    assert inventario.existe(destino) and not inventario.existe(origen)
+
+@pytest.mark.parametrize("esperar", [False, True])
+def test_copia_forzada_a_otro_disco(tmpfs, sin_rename, esperar):
+    origen = escribir(os.path.join(tmpfs, "origen", "a.bin"), CONTENIDO)
+    os.utime(origen, (1000000000, 1000000000))
+    destino = os.path.join(tmpfs, "destino", "a.bin")
+    os.makedirs(os.path.dirname(destino))
+    inventario = FileInventory(tmpfs)
+    motor = MotorMovimientos("prueba", inventario, hilos=2)
+
+    assert motor.mover(origen, destino, esperar=esperar) is esperar
+    resultados = motor.terminar()
+
+    assert resultados == {'renombrados': 0, 'copiados': 1, 'bytes_copiados': len(CONTENIDO), 'fallos': 0}
+    with open(destino, 'rb') as archivo:
+        assert archivo.read() == CONTENIDO
+    assert os.stat(destino).st_mtime == 1000000000
+    assert not os.path.exists(origen)
+    assert inventario.existe(destino) and not inventario.existe(origen)
+
+def test_copia_entre_tmpfs_y_disco(tmpfs, tmp_path):
+    origen = escribir(os.path.join(tmpfs, "a.bin"), CONTENIDO)
+    if os.stat(tmpfs).st_dev == os.stat(tmp_path).st_dev:
+        pytest.skip("la carpeta temporal de pytest también está en tmpfs")
+    destino = str(tmp_path / "a.bin")
+    motor = MotorMovimientos("prueba", hilos=2)
+
+    assert motor.mover(origen, destino) is False  # Detectado por st_dev: va a la cola de copias
+    resultados = motor.terminar()
+
+    assert resultados['copiados'] == 1 and resultados['renombrados'] == 0
+    with open(destino, 'rb') as archivo:
+        assert archivo.read() == CONTENIDO
+    assert not os.path.exists(origen)
+
+def test_muchas_copias_a_varias_carpetas(tmpfs, sin_rename):
+    origenes = [escribir(os.path.join(tmpfs, "origen", f"{i}.bin"), b"%d" % i * 1000) for i in range(40)]
+    for carpeta in ("x", "y"):
+        os.makedirs(os.path.join(tmpfs, carpeta))
+    motor = MotorMovimientos("prueba", hilos=2)  # Cola acotada a 8: se recoge por el camino
+
+    for i, origen in enumerate(origenes):
+        motor.mover(origen, os.path.join(tmpfs, "xy"[i % 2], f"{i}.bin"))
+    resultados = motor.terminar()
+
+    assert resultados['copiados'] == 40 and resultados['fallos'] == 0
+    assert os.listdir(os.path.join(tmpfs, "origen")) == []
+    for i in range(40):
+        with open(os.path.join(tmpfs, "xy"[i % 2], f"{i}.bin"), 'rb') as archivo:
+            assert archivo.read() == b"%d" % i * 1000
+
+@pytest.mark.parametrize("esperar", [False, True])
+def test_copia_interrumpida_no_deja_destino(tmpfs, sin_rename, monkeypatch, esperar):
+    origen = escribir(os.path.join(tmpfs, "origen", "a.bin"), CONTENIDO)
+    destino = os.path.join(tmpfs, "destino", "a.bin")
+    os.makedirs(os.path.dirname(destino))
+
+    def copiar_a_medias(origen, destino):
+        with open(destino, 'wb') as archivo:
+            archivo.write(CONTENIDO[:1000])
+        raise OSError(errno.ENOSPC, os.strerror(errno.ENOSPC))
+    monkeypatch.setattr(movimientos, 'copiar_contenido', copiar_a_medias)
+    motor = MotorMovimientos("prueba", hilos=2)
+
+    if esperar:
+        with pytest.raises(OSError):
+            motor.mover(origen, destino, esperar=True)
+    else:
+        assert motor.mover(origen, destino) is False
+    resultados = motor.terminar()
+
+    assert resultados['copiados'] == 0
+    assert resultados['fallos'] == (0 if esperar else 1)  # Con esperar=True el error llega a quien mueve
+    assert os.listdir(os.path.dirname(destino)) == []
+    assert not os.path.exists(ruta_temporal_movimiento(destino))
+    with open(origen, 'rb') as archivo:
+        assert archivo.read() == CONTENIDO
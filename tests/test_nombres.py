@@ -0,0 +1,60 @@
+"""
+Pruebas de la asignación de nombres de destino sin colisiones (funciones/nombres.py).
+"""
+
+import os
+
+from conftest import escribir
+from funciones.nombres import AsignadorNombres
+
+def _nombres_antiguos(existentes, nombre, cantidad):
+    """Nombres que elegía el bucle anterior (os.path.exists con _1, _2...) al mover 'cantidad' archivos"""
+    ocupados = set(existentes)
+    base, extension = os.path.splitext(nombre)
+    elegidos = []
+    for _ in range(cantidad):
+        candidato = nombre
+        contador = 1
+        while candidato in ocupados:
+            candidato = f"{base}_{contador}{extension}"
+            contador += 1
+        ocupados.add(candidato)
+        elegidos.append(candidato)
+    return elegidos
+
+def test_muchas_colisiones_en_una_carpeta_con_archivos(tmp_path):
+    destino = tmp_path / "destino"
+    previos = {"IMG_0001.jpg": b"previo", "IMG_0001_1.jpg": b"previo 1", "IMG_0001_3.jpg": b"previo 3",
+               "IMG_0001_10.jpg": b"previo 10", "IMG_0002.jpg": b"otro"}
+    for nombre, contenido in previos.items():
+        escribir(destino / nombre, contenido)
+    origenes = [escribir(tmp_path / "origen" / str(i) / "IMG_0001.jpg", b"nuevo %d" % i) for i in range(50)]
+    asignador = AsignadorNombres()
+
+    elegidos = []
+    for origen in origenes:
+        ruta = asignador.asignar(str(destino), "IMG_0001.jpg")
+        assert not os.path.exists(ruta)
+        os.rename(origen, ruta)
+        elegidos.append(os.path.basename(ruta))
+
+    assert elegidos == _nombres_antiguos(previos, "IMG_0001.jpg", len(origenes))
+    assert len(set(elegidos)) == len(origenes)
+    for nombre, contenido in previos.items():
+        assert (destino / nombre).read_bytes() == contenido
+    for i, nombre in enumerate(elegidos):
+        assert (destino / nombre).read_bytes() == b"nuevo %d" % i
+
+def test_archivo_creado_despues_del_listado_no_se_pisa(tmp_path):
+    asignador = AsignadorNombres()
+    assert asignador.asignar(str(tmp_path), "IMG_0001.jpg") == str(tmp_path / "IMG_0001.jpg")
+    escribir(tmp_path / "IMG_0001_1.jpg", b"de otro proceso")
+
+    assert asignador.asignar(str(tmp_path), "IMG_0001.jpg") == str(tmp_path / "IMG_0001_2.jpg")
+
+def test_nombre_liberado_se_puede_volver_a_usar(tmp_path):
+    asignador = AsignadorNombres()
+    ruta = asignador.asignar(str(tmp_path), "a.jpg")
+    asignador.liberar(ruta)
+
+    assert asignador.asignar(str(tmp_path), "a.jpg") == ruta
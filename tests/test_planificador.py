@@ -0,0 +1,117 @@
+"""
+Pruebas del planificador de movimientos (funciones/planificador.py): el
+resultado de Organizar + Extraer con plan es el mismo que por pasos, pero
+cada archivo se mueve como mucho una vez y sin pisar nombres.
+"""
+
+import os
+
+import pytest
+
+from conftest import escribir
+from main import CONFIG
+from funciones import movimientos
+from funciones.extraer import extraer_archivos_raiz
+from funciones.inventario import FileInventory
+from funciones.ordenar import organizar_archivos_carpetas
+from funciones.planificador import organizar_archivos_planificado
+
+JPEG = b'\xff\xd8\xff\xe0' + b'\x00' * 60
+PNG = b'\x89PNG\r\n\x1a\n' + b'\x00' * 60
+MP4 = b'\x00\x00\x00\x20ftypisom\x00\x00\x00\x00isomiso2' + b'\x00' * 40
+
+ARBOL = {
+    "a.jpg": JPEG + b"a",
+    "sub/b.jpg": JPEG + b"b",
+    "sub/c.mp4": MP4 + b"c",
+    "sub/notas.txt": b"notas",
+    "sub/d.webp": b"RIFF webp",
+    "sub/mas/e.png": PNG + b"e",
+    "Videos/viejo.mp4": MP4 + b"viejo",
+    "Imagenes/vieja.jpg": JPEG + b"vieja",
+}
+
+@pytest.fixture
+def movidos(monkeypatch):
+    """Movimientos (origen, destino) hechos por el motor durante la prueba"""
+    anotados = []
+    mover = movimientos.MotorMovimientos.mover
+
+    def anotar(self, origen, destino, *args, **kwargs):
+        anotados.append((origen, destino))
+        return mover(self, origen, destino, *args, **kwargs)
+    monkeypatch.setattr(movimientos.MotorMovimientos, 'mover', anotar)
+    return anotados
+
+def _crear_arbol(raiz, archivos):
+    for relativa, contenido in archivos.items():
+        escribir(os.path.join(raiz, relativa), contenido)
+        os.utime(os.path.join(raiz, relativa), (1262304000, 1262304000))  # 2010/01
+
+def _contenido_final(raiz):
+    """{ruta relativa: contenido} de todos los archivos bajo 'raiz'"""
+    final = {}
+    for root, dirs, files in os.walk(raiz):
+        for archivo in files:
+            ruta = os.path.join(root, archivo)
+            with open(ruta, 'rb') as f:
+                final[os.path.relpath(ruta, raiz)] = f.read()
+    return final
+
+def _por_pasos(raiz):
+    inventario = FileInventory(raiz)
+    organizar_archivos_carpetas(raiz, inventario)
+    extraer_archivos_raiz(raiz, modo_automatico=True, inventario=inventario)
+
+def _planificado(raiz):
+    inventario = FileInventory(raiz)
+    organizar_archivos_planificado(raiz, inventario)
+    extraer_archivos_raiz(raiz, modo_automatico=True, inventario=inventario)
+
+@pytest.mark.parametrize("por_fecha", [False, True])
+def test_mismo_resultado_que_por_pasos_con_un_movimiento_por_archivo(tmp_path, monkeypatch, movidos, por_fecha):
+    monkeypatch.setitem(CONFIG, 'carpetas_por_fecha', por_fecha)
+    raiz_pasos, raiz_plan = str(tmp_path / "pasos"), str(tmp_path / "plan")
+    _crear_arbol(raiz_pasos, ARBOL)
+    _crear_arbol(raiz_plan, ARBOL)
+
+    _por_pasos(raiz_pasos)
+    movidos_por_pasos = list(movidos)
+    movidos.clear()
+    _planificado(raiz_plan)
+
+    assert _contenido_final(raiz_plan) == _contenido_final(raiz_pasos)
+    origenes = [origen for origen, destino in movidos]
+    assert len(origenes) == len(set(origenes))
+    assert not set(origenes) & {destino for origen, destino in movidos}  # Nada se vuelve a mover
+    if por_fecha:
+        assert len(movidos) == len(movidos_por_pasos)  # Organizar ya los deja en su carpeta final
+    else:
+        assert len(movidos) < len(movidos_por_pasos)  # Sin el viaje de ida y vuelta a Imagenes y Videos
+        assert os.path.join(raiz_plan, "a.jpg") not in origenes  # Ya estaba en su sitio
+
+def test_colisiones_con_nombres_libres_sin_pisar_nada(tmp_path, movidos):
+    raiz = str(tmp_path / "raiz")
+    archivos = {
+        "IMG_0001.jpg": JPEG + b"raiz",
+        "IMG_0001_1.jpg": JPEG + b"raiz 1",
+        "uno/IMG_0001.jpg": JPEG + b"uno",
+        "dos/IMG_0001.jpg": JPEG + b"dos",
+        "Imagenes/IMG_0001.jpg": JPEG + b"organizada",
+        "uno/notas.txt": b"notas uno",
+        "dos/notas.txt": b"notas dos",
+        "basura/notas.txt": b"notas previas",
+    }
+    _crear_arbol(raiz, archivos)
+
+    _planificado(raiz)
+
+    final = _contenido_final(raiz)
+    assert sorted(final.values()) == sorted(archivos.values())  # Ningún archivo se ha pisado
+    assert sorted(final) == sorted([
+        "IMG_0001.jpg", "IMG_0001_1.jpg", "IMG_0001_2.jpg", "IMG_0001_3.jpg", "IMG_0001_4.jpg",
+        os.path.join("basura", "notas.txt"), os.path.join("basura", "notas_1.txt"),
+        os.path.join("basura", "notas_2.txt")])
+    assert final["IMG_0001.jpg"] == JPEG + b"raiz" and final["IMG_0001_1.jpg"] == JPEG + b"raiz 1"
+    assert final[os.path.join("basura", "notas.txt")] == b"notas previas"
+    assert len(movidos) == 5
@@ -0,0 +1,79 @@
+"""
+Pruebas de los puntos de control del modo automático (funciones/puntos_control.py):
+cuándo se reanuda una ejecución interrumpida y cuándo se empieza de nuevo.
+"""
+
+import os
+
+import pytest
+
+from conftest import escribir
+from main import CONFIG
+from funciones.inventario import FileInventory
+from funciones.puntos_control import PuntosControl
+
+@pytest.fixture
+def carpeta(tmp_path):
+    """Carpeta con un par de archivos y una ejecución interrumpida tras su primer paso"""
+    raiz = str(tmp_path / "raiz")
+    escribir(os.path.join(raiz, "a.jpg"), b"a")
+    escribir(os.path.join(raiz, "sub", "b.mp4"), b"bb")
+
+    puntos = PuntosControl(raiz)
+    assert puntos.preparar(FileInventory(raiz)) == 0
+    puntos.empezar("duplicados")
+    puntos.completar("duplicados", {'eliminados': 0})
+    puntos.empezar("ordenar")
+    puntos.marcar_procesado(os.path.join(raiz, "a.jpg"))
+    puntos.guardar_avance()
+    return raiz
+
+def _reanudar(raiz):
+    puntos = PuntosControl(raiz)
+    return puntos, puntos.preparar(FileInventory(raiz))
+
+def test_sin_cambios_se_omiten_los_pasos_completados(carpeta):
+    puntos, completados = _reanudar(carpeta)
+
+    assert completados == 1
+    assert puntos.completado("duplicados") == {'eliminados': 0}
+    assert puntos.completado("ordenar") is None
+    puntos.empezar("ordenar")
+    assert puntos.procesado(os.path.join(carpeta, "a.jpg"))
+    assert not puntos.procesado(os.path.join(carpeta, "sub", "b.mp4"))
+
+def test_un_archivo_nuevo_invalida_los_puntos_de_control(carpeta):
+    escribir(os.path.join(carpeta, "c.png"), b"c")
+
+    puntos, completados = _reanudar(carpeta)
+
+    assert completados == 0
+    assert puntos.completado("duplicados") is None
+
+def test_un_archivo_modificado_invalida_los_puntos_de_control(carpeta):
+    ruta = os.path.join(carpeta, "sub", "b.mp4")
+    escribir(ruta, b"otro contenido")
+
+    assert _reanudar(carpeta)[1] == 0
+
+def test_un_archivo_renombrado_invalida_los_puntos_de_control(carpeta):
+    os.rename(os.path.join(carpeta, "a.jpg"), os.path.join(carpeta, "z.jpg"))
+
+    assert _reanudar(carpeta)[1] == 0
+
+def test_cambiar_la_configuracion_invalida_los_puntos_de_control(carpeta, monkeypatch):
+    monkeypatch.setitem(CONFIG, 'carpetas_por_fecha', not CONFIG['carpetas_por_fecha'])
+
+    assert _reanudar(carpeta)[1] == 0
+
+def test_opciones_que_no_cambian_el_resultado_no_invalidan(carpeta, monkeypatch):
+    monkeypatch.setitem(CONFIG, 'modo_verbose', True)
+
+    assert _reanudar(carpeta)[1] == 1
+
+def test_descartar_borra_los_puntos_de_control(carpeta):
+    puntos, _ = _reanudar(carpeta)
+    puntos.descartar()
+
+    assert not os.path.exists(puntos.ruta_archivo)
+    assert _reanudar(carpeta)[1] == 0
@@ -0,0 +1,189 @@
+"""
+Pruebas del registro de conversiones (funciones/registro_conversiones.py) y
+del hash del origen calculado durante la propia conversión.
+"""
+
+import os
+import sqlite3
+import sys
+
+import pytest
+
+from conftest import escribir
+from main import CONFIG
+from funciones import conversiones
+from funciones.cache_hashes import NOMBRE_BASE_CACHE, CacheHashes, obtener_cache_hashes
+from funciones.cola_conversiones import ENTRADA_TUBERIA, REMUX, TrabajoConversion, ejecutar_trabajo
+from funciones.datos_locales import ruta_datos
+from funciones.duplicados import guardar_hash_completo
+from funciones.hashing import crear_hasher
+from funciones.inventario import FileInventory
+from funciones.registro_conversiones import (PARAMETROS_CONVERSION, RegistroConversiones, enlazar_salida,
+                                             salida_registrada)
+
+ALGORITMO = 'blake2b'
+PARAMETROS = PARAMETROS_CONVERSION['webp']
+
+def _digest(contenido):
+    hasher = crear_hasher(ALGORITMO)
+    hasher.update(contenido)
+    return hasher.hexdigest()
+
+@pytest.fixture
+def registro(tmp_path):
+    registro = RegistroConversiones(str(tmp_path / "registro.sqlite3"))
+    yield registro
+    registro.cerrar()
+
+@pytest.fixture
+def convertido(tmp_path, registro):
+    """Una conversión registrada cuya salida sigue en su sitio: devuelve (salida, digest del origen)"""
+    salida = escribir(tmp_path / "imagen.png", b"png convertido")
+    digest_origen = _digest(b"webp original")
+    registro.registrar(ALGORITMO, digest_origen, PARAMETROS, 13, salida,
+                       _digest(b"png convertido"), os.path.getsize(salida))
+    return salida, digest_origen
+
+def test_salida_registrada_intacta(registro, convertido):
+    salida, digest_origen = convertido
+
+    assert salida_registrada(registro, ALGORITMO, digest_origen, PARAMETROS) == (salida, _digest(b"png convertido"))
+
+def test_sin_conversion_registrada(registro, convertido):
+    assert salida_registrada(registro, ALGORITMO, _digest(b"otro"), PARAMETROS) is None
+    assert salida_registrada(registro, ALGORITMO, convertido[1], PARAMETROS_CONVERSION['ts']) is None
+    assert salida_registrada(registro, 'md5', convertido[1], PARAMETROS) is None
+
+def test_salida_borrada_se_olvida(registro, convertido):
+    salida, digest_origen = convertido
+    os.remove(salida)
+
+    assert salida_registrada(registro, ALGORITMO, digest_origen, PARAMETROS) is None
+    assert registro.buscar(ALGORITMO, digest_origen, PARAMETROS) is None
+
+@pytest.mark.parametrize("contenido", [b"png modificado", b"png de otro tamanio"])
+def test_salida_modificada_se_olvida(registro, convertido, contenido):
+    salida, digest_origen = convertido
+    escribir(salida, contenido)
+
+    assert salida_registrada(registro, ALGORITMO, digest_origen, PARAMETROS) is None
+    assert registro.buscar(ALGORITMO, digest_origen, PARAMETROS) is None
+
+def test_tamanios_origen_por_parametros(registro, convertido):
+    assert registro.tamanios_origen(PARAMETROS) == {13}
+    assert registro.tamanios_origen(PARAMETROS_CONVERSION['ts']) == set()
+
+def test_registro_de_otra_version_se_descarta(tmp_path):
+    ruta_db = str(tmp_path / "registro.sqlite3")
+    conexion = sqlite3.connect(ruta_db)
+    conexion.execute("CREATE TABLE conversiones (algoritmo TEXT, digest_origen TEXT)")
+    conexion.execute("PRAGMA user_version=1")
+    conexion.commit()
+    conexion.close()
+
+    registro = RegistroConversiones(ruta_db)
+    assert registro.tamanios_origen(PARAMETROS) == set()
+    registro.cerrar()
+
+def test_enlazar_salida_crea_una_copia_completa(tmp_path):
+    existente = escribir(tmp_path / "a.png", b"png")
+    nueva = str(tmp_path / "b.png")
+
+    assert enlazar_salida(existente, nueva) in ('reflink', 'hardlink', 'copia')
+    with open(nueva, 'rb') as archivo:
+        assert archivo.read() == b"png"
+    assert sorted(os.listdir(tmp_path)) == ["a.png", "b.png"]
+
+def test_hash_guardado_tras_convertir_sirve_a_la_cache(tmp_path):
+    ruta = escribir(tmp_path / "video.ts", b"ts")
+    info = os.stat(ruta)
+    guardar_hash_completo(info, _digest(b"ts"), ALGORITMO)
+
+    assert obtener_cache_hashes().obtener(info, ALGORITMO, 'completo') == _digest(b"ts")
+
+def test_trabajo_por_tuberia_calcula_el_hash_del_origen(tmp_path):
+    contenido = os.urandom(300000)
+    origen = escribir(tmp_path / "video.ts", contenido)
+    salida = str(tmp_path / "video.mp4")
+    copiar_stdin = "import shutil, sys; shutil.copyfileobj(sys.stdin.buffer, open(sys.argv[2], 'wb'))"
+    trabajo = TrabajoConversion(origen, salida, REMUX, [sys.executable, '-c', copiar_stdin, ENTRADA_TUBERIA, salida],
+                                algoritmo_hash=ALGORITMO)
+
+    resultado, _ = ejecutar_trabajo(trabajo)
+
+    assert resultado.returncode == 0
+    assert trabajo.digest_origen == _digest(contenido)
+    with open(salida, 'rb') as archivo:
+        assert archivo.read() == contenido
+
+def test_trabajo_que_falla_no_da_hash(tmp_path):
+    origen = escribir(tmp_path / "video.ts", os.urandom(300000))
+    salida = str(tmp_path / "video.mp4")
+    trabajo = TrabajoConversion(origen, salida, REMUX, [sys.executable, '-c', 'import sys; sys.exit(3)',
+                                                        ENTRADA_TUBERIA], algoritmo_hash=ALGORITMO)
+
+    resultado, _ = ejecutar_trabajo(trabajo)
+
+    assert resultado.returncode == 3
+    assert trabajo.digest_origen is None
+
+@pytest.fixture
+def pillow_webp(monkeypatch):
+    """Módulo Image de Pillow con los WEBP convertidos por Pillow (se omite la prueba si no puede)"""
+    Image = pytest.importorskip("PIL.Image")
+    if not conversiones.pillow_puede_leer_webp():
+        pytest.skip("Pillow no puede leer WEBP")
+    monkeypatch.setitem(CONFIG, 'conversor_webp', 'pillow')
+    monkeypatch.setitem(CONFIG, 'algoritmo_hash', ALGORITMO)
+    return Image
+
+def test_checksums_de_la_conversion_quedan_guardados(tmp_path, pillow_webp):
+    carpeta = tmp_path / "raiz"
+    carpeta.mkdir()
+    pillow_webp.new('RGB', (32, 32), (200, 10, 10)).save(carpeta / "a.webp", 'WEBP')
+
+    conversiones.procesar_conversiones(str(carpeta), FileInventory(str(carpeta)))
+
+    # Sin cerrar la cache global: lo confirmado al terminar el paso ya está en disco
+    otra = CacheHashes(ruta_datos(NOMBRE_BASE_CACHE))
+    for ruta in (carpeta / "a.png", carpeta / "basura" / "a.webp"):
+        assert otra.obtener(os.stat(ruta), ALGORITMO, 'completo') == _digest(ruta.read_bytes())
+    otra.cerrar()
+
+def test_conversiones_repetidas_se_reutilizan(tmp_path, monkeypatch, pillow_webp):
+    Image = pillow_webp
+    hasheados = []
+    calcular = conversiones.calcular_en_paralelo
+
+    def anotar(funcion, tareas, *args):
+        hasheados.extend(os.path.basename(argumentos[0]) for _, argumentos in tareas)
+        return calcular(funcion, tareas, *args)
+    monkeypatch.setattr(conversiones, 'calcular_en_paralelo', anotar)
+
+    carpeta = tmp_path / "raiz"
+    carpeta.mkdir()
+    Image.new('RGB', (32, 32), (200, 10, 10)).save(carpeta / "a.webp", 'WEBP')
+    Image.new('RGB', (48, 48), (0, 10, 200)).save(carpeta / "b.webp", 'WEBP')
+    os.link(carpeta / "a.webp", carpeta / "c.webp")  # Mismo contenido que a.webp
+
+    resultados = conversiones.procesar_conversiones(str(carpeta), FileInventory(str(carpeta)))
+
+    assert resultados['webp_convertidos'] == 3
+    assert sorted(hasheados) == ["a.webp", "c.webp"]  # b.webp tiene un tamaño único: su hash sale al convertir
+    assert (carpeta / "c.png").read_bytes() == (carpeta / "a.png").read_bytes()
+
+    # Se repite con los originales de vuelta y una copia nueva de b.webp: todo sale del registro
+    hasheados.clear()
+    for nombre in ("a.webp", "b.webp", "c.webp"):
+        os.replace(carpeta / "basura" / nombre, carpeta / nombre)
+    escribir(carpeta / "d.webp", (carpeta / "b.webp").read_bytes())
+
+    def sin_convertir(*args):
+        raise AssertionError("no debería convertirse nada")
+    monkeypatch.setattr(conversiones, 'convertir_webp_con_pillow', sin_convertir)
+    resultados = conversiones.procesar_conversiones(str(carpeta), FileInventory(str(carpeta)))
+
+    assert resultados['webp_convertidos'] == 4
+    assert sorted(hasheados) == ["a.webp", "b.webp", "c.webp", "d.webp"]
+    assert sorted(os.listdir(carpeta)) == ["a.png", "b.png", "basura", "c.png", "d.png"]
+    assert (carpeta / "d.png").read_bytes() == (carpeta / "b.png").read_bytes()
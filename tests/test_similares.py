@@ -0,0 +1,50 @@
+"""
+Pruebas de la búsqueda de imágenes casi duplicadas (funciones/similares.py)
+recorriendo el inventario compartido en lugar del disco.
+"""
+
+import os
+
+import pytest
+
+from funciones import herramientas, similares
+from funciones.inventario import FileInventory
+from funciones.similares import eliminar_similares, encontrar_imagenes_similares
+
+@pytest.fixture
+def carpeta(tmp_path):
+    """Carpeta con una imagen, la misma reducida y otra distinta (se omite la prueba sin Pillow)"""
+    Image = pytest.importorskip("PIL.Image")
+    raiz = tmp_path / "raiz"
+    (raiz / "sub").mkdir(parents=True)
+    patron = Image.frombytes('L', (16, 16), bytes((i * 97 + 31) % 256 for i in range(256)))
+    patron = patron.resize((256, 256)).convert('RGB')
+    patron.save(raiz / "grande.png")
+    patron.resize((64, 64)).save(raiz / "sub" / "pequenia.png")
+    Image.linear_gradient('L').rotate(90).save(raiz / "otra.png")
+    return str(raiz)
+
+@pytest.fixture
+def sin_os_walk(monkeypatch):
+    """Hace fallar cualquier recorrido del disco con os.walk"""
+    def sin_recorrer(*args, **kwargs):
+        raise AssertionError("con inventario no debería recorrerse el disco")
+    monkeypatch.setattr(similares.os, 'walk', sin_recorrer)
+
+def test_imagenes_similares_desde_el_inventario(carpeta, sin_os_walk):
+    inventario = FileInventory(carpeta)
+
+    encontradas, total = encontrar_imagenes_similares(carpeta, inventario=inventario)
+
+    assert total == 3
+    assert encontradas == [os.path.join(carpeta, "sub", "pequenia.png")]
+
+def test_similares_movidas_actualizan_el_inventario(carpeta, monkeypatch, sin_os_walk):
+    monkeypatch.setattr(herramientas, 'ffmpeg_disponible', lambda: False)
+    inventario = FileInventory(carpeta)
+
+    resultados = eliminar_similares(carpeta, modo_automatico=True, inventario=inventario)
+
+    assert resultados['similares_movidas'] == 1
+    assert inventario.existe(os.path.join(carpeta, "basura", "pequenia.png"))
+    assert not inventario.existe(os.path.join(carpeta, "sub", "pequenia.png"))